@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""Benchmark the vectorized datetime functions against their scalar versions.
+
+Run with `python benchmarks/bench_datetime.py [n_values]`.
+"""
+
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from planetarypy import datetime as ppydt
+
+
+def make_doy_strings(n, n_unique):
+    "Create `n` DOY time strings drawn from `n_unique` different time stamps."
+    rng = np.random.default_rng(42)
+    start = np.datetime64("2006-01-01T00:00:00", "ms")
+    offsets = rng.integers(0, 15 * 365 * 86400 * 1000, n_unique).astype("m8[ms]")
+    uniques = [ppydt.doyformat(t.item()) for t in start + offsets]
+    return np.array(uniques, dtype=object)[rng.integers(0, n_unique, n)]
+
+
+def make_isoz_strings(n, n_unique):
+    "Create `n` ISO strings with trailing 'Z' from `n_unique` time stamps."
+    doy = pd.Series(make_doy_strings(n, n_unique))
+    return doy.map(
+        lambda s: ppydt.fromdoyformat(s).isoformat(timespec="milliseconds") + "Z"
+    ).to_numpy()
+
+
+def bench(label, scalar, vectorized, strings, repeat=3):
+    t_scalar = min(
+        timeit.repeat(lambda: [scalar(s) for s in strings], number=1, repeat=repeat)
+    )
+    t_vector = min(
+        timeit.repeat(lambda: vectorized(strings), number=1, repeat=repeat)
+    )
+    print(
+        f"{label:<32} scalar: {t_scalar:8.3f} s  vectorized: {t_vector:8.3f} s  "
+        f"speed-up: {t_scalar / t_vector:6.1f}x"
+    )
+
+
+def main(n=200_000):
+    print(f"Parsing {n} time strings.")
+    for n_unique in [n, n // 100]:
+        doy = make_doy_strings(n, n_unique)
+        bench(
+            f"fromdoyformat ({n_unique} unique)",
+            ppydt.fromdoyformat,
+            ppydt.fromdoyformat_array,
+            doy,
+        )
+        isoz = make_isoz_strings(n, n_unique)
+        bench(
+            f"fromisozformat ({n_unique} unique)",
+            ppydt.fromisozformat,
+            ppydt.fromisozformat_array,
+            isoz,
+        )
+
+    print(f"Formatting {n} time stamps.")
+    times = ppydt.fromisozformat_array(make_isoz_strings(n, n))
+    bench(
+        "isozformat",
+        ppydt.isozformat,
+        ppydt.isozformat_array,
+        times,
+    )
+    bench(
+        "doyformat",
+        ppydt.doyformat,
+        ppydt.doyformat_array,
+        times,
+    )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
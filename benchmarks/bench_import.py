@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""Benchmark import time and memory of the planetarypy modules.
+
+Each module is imported in fresh interpreters, started with `-X importtime`, and
+compared against the budgets in `import_budgets.toml`.  Every interpreter gets a
+temporary home folder with its own config and storage root, and a proxy setting
+that makes any network access fail at once, so the results don't depend on
+local data or on the network.
+
+Run with `python benchmarks/bench_import.py [--repeat N] [--top N] [modules]`.
+The exit code is 1 if a module exceeds its budget.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    import tomlkit as tomllib
+
+BUDGETS = Path(__file__).with_name("import_budgets.toml")
+
+PROBE = """
+import resource, sys, time
+print("{marker}", file=sys.stderr, flush=True)
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+print("{marker}", file=sys.stderr, flush=True)
+maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    maxrss /= 1024
+spiceypy = sys.modules.get("spiceypy")
+kernels = spiceypy.ktotal("ALL") if spiceypy else 0
+import json
+print(json.dumps(dict(time=elapsed, maxrss=maxrss / 1024, kernels=kernels)))
+"""
+
+
+def make_environment(root: Path) -> dict:
+    "Create an isolated home with config and storage root below `root`."
+    storage = root / "planetarypy_data"
+    storage.mkdir()
+    config = root / ".planetarypy_config.toml"
+    config.write_text(f'storage_root = "{storage.as_posix()}"\n')
+    env = dict(os.environ)
+    env.update(
+        HOME=str(root),
+        PLANETARYPY_CONFIG=str(config),
+        # nothing listens on port 9, so network access fails instantly
+        HTTP_PROXY="http://127.0.0.1:9",
+        HTTPS_PROXY="http://127.0.0.1:9",
+        NO_PROXY="",
+    )
+    env.pop("PYTHONPROFILEIMPORTTIME", None)
+    return env
+
+
+MARKER = "-- measured import --"
+
+
+def parse_importtime(stderr: str) -> list:
+    """Return (cumulative µs, self µs, module) tuples of `-X importtime` output.
+
+    Only imports between the two markers printed by the probe are included,
+    leaving out interpreter startup.
+    """
+    entries = []
+    measured = stderr.split(MARKER)[1] if MARKER in stderr else stderr
+    for line in measured.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        own, cumulative, name = line[len("import time:") :].split("|")
+        entries.append((int(cumulative), int(own), name.strip()))
+    return entries
+
+
+def measure(module: str, env: dict) -> dict:
+    "Import `module` in a fresh interpreter and return its measurements."
+    probe = PROBE.format(module=module, marker=MARKER)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["importtime"] = parse_importtime(proc.stderr)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", help="Modules to measure.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="Slowest imports shown.")
+    parser.add_argument("--budgets", type=Path, default=BUDGETS)
+    args = parser.parse_args(argv)
+
+    budgets = tomllib.loads(args.budgets.read_text())
+    modules = args.modules or list(budgets)
+    failures = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        env = make_environment(Path(tmpdir))
+        for module in modules:
+            # the first run compiles the .pyc files, so it's left out
+            measure(module, env)
+            runs = [measure(module, env) for _ in range(args.repeat)]
+            best = min(runs, key=lambda run: run["time"])
+            maxrss = min(run["maxrss"] for run in runs)
+            budget = budgets.get(module, {})
+            problems = []
+            if best["time"] * 1000 > budget.get("time_ms", float("inf")):
+                problems.append(f"time > {budget['time_ms']} ms")
+            if maxrss > budget.get("maxrss_mb", float("inf")):
+                problems.append(f"memory > {budget['maxrss_mb']} MB")
+            if best["kernels"] > budget.get("kernels", 0):
+                problems.append(f"{best['kernels']} SPICE kernels loaded")
+            status = "FAIL: " + ", ".join(problems) if problems else "ok"
+            print(
+                f"{module:<32} {best['time'] * 1000:8.1f} ms "
+                f"{maxrss:8.1f} MB  {status}"
+            )
+            slowest = sorted(
+                (entry for entry in best["importtime"] if entry[2] != module),
+                reverse=True,
+            )
+            for cumulative, _, name in slowest[: args.top]:
+                print(f"    {cumulative / 1000:8.1f} ms  {name}")
+            if problems:
+                failures.append(module)
+    if failures:
+        print(f"Over budget: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,334 @@
+"""Vectorized implementation of the array functions of `planetarypy.datetime`.
+
+Kept apart, so that importing `planetarypy.datetime` doesn't import NumPy and
+pandas; the array functions import this module when they are called.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+# Parsers
+#
+# PDS index tables contain millions of time strings, most of them repeated.
+# The array parsers therefore parse every unique string only once and
+# assemble datetime64 values with integer NumPy arithmetic instead of calling
+# strptime() per value.  Strings sharing one fixed-width layout (the usual case
+# for a table column) are decoded directly from their bytes; everything else
+# goes through a single regular expression pass.
+
+_NS_PER_SECOND = 1_000_000_000
+# Full years representable by datetime64[ns].
+_YEAR_RANGE = (1678, 2261)
+
+# Time of day and UTC offset, as accepted by datetime.time.fromisoformat().
+_TIME_PATTERN = (
+    r"(?P<hour>\d{2})"
+    r"(?::?(?P<minute>\d{2})"
+    r"(?::?(?P<second>\d{2})"
+    r"(?:[.,](?P<fraction>\d{1,9}))?)?)?"
+    r"(?P<offset>Z|(?P<offset_sign>[+-])"
+    r"(?P<offset_hour>\d{2}):?(?P<offset_minute>\d{2})"
+    r"(?::?(?P<offset_second>\d{2})(?:[.,](?P<offset_fraction>\d{1,6}))?)?)?"
+)
+_DOY_PATTERN = re.compile(
+    r"^(?P<year>\d{4})-?(?P<doy>\d{3})(?:." + _TIME_PATTERN + r")?\Z"
+)
+_ISOZ_PATTERN = re.compile(
+    r"^(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})"
+    r"T(?P<hour>\d{1,2}):(?P<minute>\d{1,2}):(?P<second>\d{1,2})"
+    r"(?:\.(?P<fraction>\d{1,6}))?Z\Z"
+)
+
+# Fixed-width layouts: "#" is a digit, "?" any character, and the fields are
+# (start, stop) character positions.  A fraction of seconds may follow "second".
+_DOY_LAYOUTS = [
+    ("####-###", {"year": (0, 4), "doy": (5, 8)}),
+    (
+        "####-###?##:##:##",
+        {
+            "year": (0, 4),
+            "doy": (5, 8),
+            "hour": (9, 11),
+            "minute": (12, 14),
+            "second": (15, 17),
+        },
+    ),
+]
+_ISOZ_LAYOUTS = [
+    (
+        "####-##-##T##:##:##",
+        {
+            "year": (0, 4),
+            "month": (5, 7),
+            "day": (8, 10),
+            "hour": (11, 13),
+            "minute": (14, 16),
+            "second": (17, 19),
+        },
+    ),
+]
+
+
+def _factorize(date_strings):
+    """Return codes, unique strings and pandas index (if any) of *date_strings*.
+
+    Missing values (None, NaN) are coded as -1.
+    """
+    index = date_strings.index if isinstance(date_strings, pd.Series) else None
+    codes, uniques = pd.factorize(np.asarray(date_strings, dtype=object).ravel())
+    return codes, pd.Series(uniques, dtype=object), index
+
+
+def _fixed_width_fields(uniques: pd.Series, layouts, suffix="", max_fraction=9):
+    """Decode *uniques* of equal length sharing one of *layouts* from their bytes.
+
+    Returns a dict of integer arrays per field, or None if the strings do not
+    all share the same layout.
+    """
+    try:
+        strings = uniques.to_numpy(dtype="S")
+    except (UnicodeEncodeError, ValueError):
+        return None
+    width = strings.dtype.itemsize
+    if (np.char.str_len(strings) != width).any():
+        return None
+    for template, fields in layouts:
+        n_fraction = width - len(template) - len(suffix) - 1
+        if n_fraction == -1:
+            template += suffix
+        elif 1 <= n_fraction <= max_fraction and "second" in fields:
+            template += "." + "#" * n_fraction + suffix
+        else:
+            continue
+        chars = strings.view(np.uint8).reshape(-1, width)
+        digits = chars.astype(np.int64) - ord("0")
+        layout = np.frombuffer(template.encode(), dtype=np.uint8)
+        is_digit = layout == ord("#")
+        is_literal = ~is_digit & (layout != ord("?"))
+        if not (
+            ((digits[:, is_digit] >= 0) & (digits[:, is_digit] <= 9)).all()
+            and (chars[:, is_literal] == layout[is_literal]).all()
+        ):
+            return None
+        parsed = {
+            name: digits[:, start:stop] @ 10 ** np.arange(stop - start)[::-1]
+            for name, (start, stop) in fields.items()
+        }
+        parsed["fraction"] = np.zeros(len(strings), dtype=np.int64)
+        if n_fraction > 0:
+            start = fields["second"][1] + 1
+            scale = 10 ** np.arange(9 - n_fraction, 9)[::-1]
+            parsed["fraction"] = digits[:, start : start + n_fraction] @ scale
+        parsed["offset"] = np.zeros(len(strings), dtype=np.int64)
+        parsed["has_offset"] = np.zeros(len(strings), dtype=bool)
+        return parsed
+    return None
+
+
+def _regex_fields(uniques: pd.Series, pattern: re.Pattern, what: str) -> dict:
+    """Parse *uniques* with *pattern*, returning a dict of integer field arrays."""
+    parts = uniques.astype(str).str.extract(pattern.pattern)
+    _check(uniques, parts["year"].isna().to_numpy(), what, "is not in {} format")
+    parsed = {
+        name: _as_int(parts[name])
+        for name in parts.columns
+        if name != "fraction" and not name.startswith("offset")
+    }
+    parsed["fraction"] = _fraction_ns(parts["fraction"])
+    if "offset" in parts:
+        parsed["offset"] = _offset_ns(uniques, parts)
+        parsed["has_offset"] = parts["offset"].notna().to_numpy()
+    else:
+        parsed["offset"] = np.zeros(len(uniques), dtype=np.int64)
+        parsed["has_offset"] = np.zeros(len(uniques), dtype=bool)
+    return parsed
+
+
+def _parse_fields(uniques, layouts, pattern, what, suffix="", max_fraction=9) -> dict:
+    """Parse *uniques* into a dict of integer field arrays.
+
+    Strings are grouped by length and each group is tried with the fixed-width
+    fast path first.  Groups that don't fit any layout are parsed with *pattern*.
+    """
+    names = [n for n in pattern.groupindex if not n.startswith("offset")] + ["offset"]
+    parsed = {name: np.zeros(len(uniques), dtype=np.int64) for name in names}
+    parsed["has_offset"] = np.zeros(len(uniques), dtype=bool)
+    lengths = uniques.astype(str).str.len().to_numpy()
+    leftover = np.zeros(len(uniques), dtype=bool)
+    for length in np.unique(lengths):
+        group = lengths == length
+        fields = _fixed_width_fields(uniques[group], layouts, suffix, max_fraction)
+        if fields is None:
+            leftover |= group
+            continue
+        for name, values in fields.items():
+            parsed[name][group] = values
+    if leftover.any():
+        fields = _regex_fields(uniques[leftover].reset_index(drop=True), pattern, what)
+        for name, values in fields.items():
+            parsed[name][leftover] = values
+    return parsed
+
+
+def _as_int(column: pd.Series) -> np.ndarray:
+    """Convert a column of digit strings to integers, missing ones to 0."""
+    return column.fillna("0").astype(np.int64).to_numpy()
+
+
+def _fraction_ns(column: pd.Series) -> np.ndarray:
+    """Convert fractional second digits to integer nanoseconds."""
+    return column.fillna("0").str.ljust(9, "0").astype(np.int64).to_numpy()
+
+
+def _check(strings: pd.Series, invalid: np.ndarray, what: str, msg="has an invalid {}"):
+    """Raise ValueError naming the first string flagged as *invalid*."""
+    if invalid.any():
+        raise ValueError(f"{strings[invalid].iloc[0]} " + msg.format(what) + ".")
+
+
+def _check_range(strings: pd.Series, values: np.ndarray, low: int, high: int, what):
+    """Raise ValueError for the first of *values* outside of [*low*, *high*]."""
+    _check(strings, (values < low) | (values > high), what)
+
+
+def _offset_ns(uniques: pd.Series, parts: pd.DataFrame) -> np.ndarray:
+    """Return the UTC offsets in *parts* as nanoseconds (0 for 'Z' or none)."""
+    hour = _as_int(parts["offset_hour"])
+    minute = _as_int(parts["offset_minute"])
+    second = _as_int(parts["offset_second"])
+    _check_range(uniques, hour, 0, 23, "UTC offset")
+    _check_range(uniques, minute, 0, 59, "UTC offset")
+    _check_range(uniques, second, 0, 59, "UTC offset")
+    fraction = _fraction_ns(parts["offset_fraction"])
+    sign = np.where(parts["offset_sign"].to_numpy() == "-", -1, 1)
+    return sign * ((hour * 3600 + minute * 60 + second) * _NS_PER_SECOND + fraction)
+
+
+def _to_ns(uniques: pd.Series, days: np.ndarray, parsed: dict) -> np.ndarray:
+    """Combine *days* since the Unix epoch with the parsed time of day to UTC ns."""
+    hour = parsed.get("hour", 0)
+    minute = parsed.get("minute", 0)
+    second = parsed.get("second", 0)
+    _check_range(uniques, np.asarray(hour), 0, 23, "hour")
+    _check_range(uniques, np.asarray(minute), 0, 59, "minute")
+    _check_range(uniques, np.asarray(second), 0, 59, "second")
+    seconds = days * 86400 + hour * 3600 + minute * 60 + second
+    return seconds * _NS_PER_SECOND + parsed["fraction"] - parsed["offset"]
+
+
+def _wrap(ns: np.ndarray, codes: np.ndarray, index, tz_aware: bool):
+    """Broadcast parsed unique values back to the input shape and type."""
+    values = np.full(len(codes), np.iinfo(np.int64).min)  # NaT
+    values[codes >= 0] = ns[codes[codes >= 0]]
+    result = pd.DatetimeIndex(values.view("datetime64[ns]"))
+    if tz_aware:
+        result = result.tz_localize("UTC")
+    if index is not None:
+        return pd.Series(result, index=index)
+    return result
+
+
+# Formatters
+#
+# The strings are assembled as (n, width) matrices of unicode code points from
+# integer date and time fields, which are finally viewed as a string array.
+
+# Number of characters of "HH:MM:SS.ffffff" to keep for each timespec.
+_TIMESPEC_LENGTHS = {
+    "hours": 2,
+    "minutes": 5,
+    "seconds": 8,
+    "milliseconds": 12,
+    "microseconds": 15,
+}
+
+
+def _digits(values: np.ndarray, width: int) -> np.ndarray:
+    """Return the code points of *values* as zero-padded decimal numbers."""
+    powers = 10 ** np.arange(width - 1, -1, -1, dtype=np.uint32)
+    return values.astype(np.uint32)[:, None] // powers % 10 + np.uint32(ord("0"))
+
+
+def _constant(text: str, n: int) -> np.ndarray:
+    """Return the code points of *text*, repeated for *n* rows."""
+    chars = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    return np.tile(chars, (n, 1))
+
+
+def _join(parts: list, n: int) -> np.ndarray:
+    """Concatenate code point matrices of per-row varying lengths into strings.
+
+    *parts* is a list of (matrix, lengths) tuples, lengths being either an
+    integer or an array with the number of valid characters per row.  Rows are
+    copied in groups sharing the same position and length.
+    """
+    width = sum(chars.shape[1] for chars, _ in parts)
+    out = np.zeros((n, width), dtype=np.uint32)
+    position = 0
+    for chars, lengths in parts:
+        if np.isscalar(position) and np.isscalar(lengths):
+            out[:, position : position + lengths] = chars[:, :lengths]
+            position += lengths
+            continue
+        keys = position * (width + 1) + np.broadcast_to(lengths, (n,))
+        for key in np.unique(keys):
+            rows = keys == key
+            start, length = divmod(int(key), width + 1)
+            out[rows, start : start + length] = chars[rows, :length]
+        position = position + lengths
+    return out.view(f"U{max(1, width)}").reshape(n)
+
+
+def _datetime_index(date_times) -> pd.DatetimeIndex:
+    index = pd.DatetimeIndex(date_times)
+    return index.as_unit("ns") if hasattr(index, "as_unit") else index
+
+
+def _datetime_code_points(index: pd.DatetimeIndex, timespec: str) -> dict:
+    """Return code points of the date and time fields of the naive *index*.
+
+    The "time" entry is 'HH:MM:SS.ffffff' and "time_length" holds the number of
+    its characters to use for *timespec*, as datetime.isoformat() does.
+    """
+    if timespec != "auto" and timespec not in _TIMESPEC_LENGTHS:
+        raise ValueError(f"Unknown timespec value: {timespec}")
+    values = index.fillna(pd.Timestamp(0)).to_numpy(dtype="datetime64[ns]")
+    years = values.astype("M8[Y]")
+    months = values.astype("M8[M]")
+    days = values.astype("M8[D]")
+    ns = (values - days).astype(np.int64)
+    seconds = ns // _NS_PER_SECOND
+    microseconds = ns // 1000 % 1_000_000
+    n = len(values)
+    colon = _constant(":", n)
+    time = np.concatenate(
+        [
+            _digits(seconds // 3600, 2),
+            colon,
+            _digits(seconds // 60 % 60, 2),
+            colon,
+            _digits(seconds % 60, 2),
+            _constant(".", n),
+            _digits(microseconds, 6),
+        ],
+        axis=1,
+    )
+    if timespec == "auto":
+        time_length = np.where(microseconds != 0, 15, 8)
+    else:
+        time_length = _TIMESPEC_LENGTHS[timespec]
+    return {
+        "year": _digits(years.astype(np.int64) + 1970, 4),
+        "month": _digits((months - years).astype(np.int64) + 1, 2),
+        "day": _digits((days - months).astype(np.int64) + 1, 2),
+        "doy": _digits((days - years).astype(np.int64) + 1, 3),
+        "time": time,
+        "time_length": time_length,
+    }
+
+
+def _finish(strings: np.ndarray, index: pd.DatetimeIndex) -> np.ndarray:
+    strings[index.isna()] = "NaT"
+    return strings
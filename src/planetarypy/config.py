@@ -3,14 +3,26 @@ __all__ = ["config", "reset_non_urls", "Config"]
 import json
 import os
 import shutil
+import tempfile
+import time
 from collections.abc import Mapping
-from functools import reduce
+from contextlib import contextmanager
 from importlib.resources import files
 from pathlib import Path
 from typing import Union
 
 import tomlkit
 
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
 
 def reset_non_urls(
     source: dict,  # source dictionary
@@ -36,6 +48,25 @@ class Config:
     class instance after initialization.
     At minimum, there should be the `storage_root` attribute for storing data
     for this package.
+
+    Reading is optimized: the file is parsed into plain dictionaries with the
+    fast, read-only `tomllib` (Python >= 3.11), and the style-preserving
+    `tomlkit` document needed for writing is only built when `tomldoc` is
+    accessed, e.g. by `set_value` or `save`.
+    With `lazy=True`, even the first read of the file (and the creation of a
+    missing config file) is deferred until the config is actually used, which
+    is how the global `config` object is created.
+
+    Saving is atomic and holds an advisory lock on `<config path>.lock`, so
+    several processes can update the config at the same time: if the file was
+    changed by another process since it was read here, it's re-read and the
+    changes made here with `set_value` are applied on top before writing.
+    Use `batch` to write many changes at once.
+
+    Long-running processes can set `reload_interval` (in seconds) to pick up
+    changes of the config file made elsewhere: reads check the file's
+    modification time and size at most once per interval and re-read it if
+    either changed.  `reload` does the same check on demand.
     """
 
     # This part enables a config path location override using env PLANETARYPY_CONFIG
@@ -43,55 +74,190 @@ class Config:
     # separating fname from fpath so that resource_path below is correct.
     path = Path(os.getenv("PLANETARYPY_CONFIG", Path.home() / f".{fname}"))
 
-    def __init__(self, config_path: str = None):  # str or pathlib.Path
+    def __init__(
+        self,
+        config_path: str = None,  # str or pathlib.Path
+        lazy: bool = False,  # Defer reading the file until first use
+        reload_interval: float = None,  # Seconds between checks for file changes
+    ):
         """Switch to other config file location with `config_path`."""
         if config_path is not None:
             self.path = Path(config_path)
+        self.reload_interval = reload_interval
+        self._last_check = time.monotonic()
+        self._text = None
+        self._data = None
+        self._tomldoc = None
+        self._storage_root = None
+        self._storage_root_override = None
+        self._stat = None
+        self._pending = {}
+        self._batch_depth = 0
+        self._invalidate()
+        if not lazy:
+            self._read_config()
+
+    def _read_config(self):
+        """Read the configfile and store config dict.
+
+        A missing config file is created from the default one shipped with
+        the package.
+        """
         if not self.path.exists():
             p = files("planetarypy.data").joinpath(self.fname)
             shutil.copy(p, self.path)
+        self._stat = self._file_stat()
+        self._text = self.path.read_text()
+        self._tomldoc = None
+        self._storage_root = None
+        self._invalidate()
+        if tomllib is None:
+            self._tomldoc = tomlkit.loads(self._text)
+            self._data = None
+        else:
+            self._data = tomllib.loads(self._text)
+
+    def _file_stat(self):
+        "Return (mtime, size) of the config file to detect changes."
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self) -> bool:
+        """Re-read the config file if it changed since it was read.
+
+        Unsaved changes made with `set_value` are kept by not reloading.
+
+        Returns
+        -------
+        bool
+            True if the config was re-read.
+        """
+        self._last_check = time.monotonic()
+        if self._text is None or self._pending or self._batch_depth:
+            return False
+        if self._file_stat() == self._stat:
+            return False
         self._read_config()
+        return True
 
-    def _read_config(self):
-        """Read the configfile and store config dict.
+    def _check_reload(self):
+        "Call `reload` if `reload_interval` seconds passed since the last check."
+        if (
+            self.reload_interval is not None
+            and time.monotonic() - self._last_check >= self.reload_interval
+        ):
+            self.reload()
 
-        `storage_root` will be stored as attribute.
+    @contextmanager
+    def _file_lock(self):
+        "Hold an exclusive advisory lock for changing the config file."
+        if fcntl is None:
+            yield
+            return
+        lockpath = self.path.with_name(self.path.name + ".lock")
+        with open(lockpath, "a") as lockfile:
+            fcntl.flock(lockfile, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lockfile, fcntl.LOCK_UN)
+
+    @property
+    def tomldoc(self) -> tomlkit.TOMLDocument:
+        """The tomlkit document of the config file, used for changing it."""
+        if self._tomldoc is None:
+            if self._text is None:
+                self._read_config()
+            if self._tomldoc is None:
+                self._tomldoc = tomlkit.loads(self._text)
+                # from now on, reads are served from the (possibly changed) doc
+                self._data = None
+                self._invalidate()
+        return self._tomldoc
+
+    @property
+    def storage_root(self) -> Path:
+        """Root folder for storing data for this package.
+
+        Defaults to `~/planetarypy_data` if not set in the config file. The
+        folder is created on first access.
+
+        Setting it overrides the config file for this process, also across
+        reloads of the file, until it's set to None.
         """
-        self.tomldoc = tomlkit.loads(self.path.read_text())
-        if not self.tomldoc["storage_root"]:
-            path = Path.home() / "planetarypy_data"
-            path.mkdir(exist_ok=True)
-            self.tomldoc["storage_root"] = str(path)
-            self.storage_root = path
-            self.save()
-        else:
-            self.storage_root = Path(self.tomldoc["storage_root"])
+        self._check_reload()
+        if self._storage_root_override is not None:
+            return self._storage_root_override
+        if self._storage_root is None:
+            root = self.d["storage_root"]
+            if not root:
+                path = Path.home() / "planetarypy_data"
+                self.tomldoc["storage_root"] = str(path)
+                self.save()
+            else:
+                path = Path(root)
+            path.mkdir(exist_ok=True, parents=True)
+            self._storage_root = path
+        return self._storage_root
+
+    @storage_root.setter
+    def storage_root(self, value):
+        self._storage_root_override = None if value is None else Path(value)
 
     @property
     def d(self):
         """get the Python dic from"""
-        return self.tomldoc
+        self._check_reload()
+        if self._text is None:
+            self._read_config()
+        return self._data if self._data is not None else self.tomldoc
+
+    @property
+    def _flat(self) -> dict:
+        """Flattened dotted-key -> value index of the config, built on demand.
+
+        Contains intermediate tables as well, e.g. `missions.cassini`.
+        """
+        self._check_reload()
+        if self._index is None:
+            index = {}
+
+            def walk(table, prefix):
+                for key, value in table.items():
+                    dotted = prefix + key
+                    index[dotted] = value
+                    if isinstance(value, Mapping):
+                        walk(value, dotted + ".")
+
+            walk(self.d, "")
+            self._index = index
+        return self._index
+
+    def _invalidate(self):
+        "Reset the caches derived from the config content."
+        self._index = None
+        self._index_urls = None
 
     def __getitem__(self, key: str):
         """Get sub-dictionary by nested key."""
-        if not key.startswith("missions"):
-            key = "missions." + key
-        try:
-            return reduce(lambda c, k: c[k], key.split("."), self.d)
-        except KeyError:
-            return ""
+        return self.get_value(key)
 
     def get_value(
         self,
         key: str,  # A nested key in dotted format, e.g. cassini.uvis.indexes
     ) -> str:  # Returning empty string if not existing, because Path('') is False which is handy (e.g. in ctx mod.)
-        """Get sub-dictionary by nested key."""
+        """Get sub-dictionary by nested key.
+
+        Lookups are served from a flattened index of all keys. Changes made via
+        `set_value`, `__setitem__` or `save` update it; direct changes to
+        `tomldoc` are picked up after the next `save`.
+        """
         if not key.startswith("missions"):
             key = "missions." + key
-        try:
-            return reduce(lambda c, k: c[k], key.split("."), self.d)
-        except KeyError:
-            return ""
+        return self._flat.get(key, "")
 
     def set_value(
         self,
@@ -105,25 +271,102 @@ class Config:
         for key in keys[:-1]:
             dic = dic[key]
         dic[keys[-1]] = value
-        if save:
+        self._pending[nested_key] = value
+        self._invalidate()
+        if save and not self._batch_depth:
             self.save()
 
     def __setitem__(self, nested_key: str, value: Union[float, str]):
         """Set value in sub-dic using dotted key."""
-        dic = self.tomldoc
-        keys = nested_key.split(".")
-        for key in keys[:-1]:
-            dic = dic[key]
-        dic[keys[-1]] = value
-        self.save()
+        self.set_value(nested_key, value)
+
+    def index_urls(self) -> dict:
+        """Return the URLs of all configured indexes of all missions.
+
+        Returns
+        -------
+        dict
+            Maps `<mission>.<instrument>.<index>` keys to the index URL.
+        """
+        self._check_reload()
+        if self._index_urls is None:
+            self._index_urls = {
+                key[len("missions.") : -len(".url")].replace(".indexes.", "."): value
+                for key, value in self._flat.items()
+                if key.startswith("missions.")
+                and key.endswith(".url")
+                and ".indexes." in key
+            }
+        return self._index_urls
 
     def save(self):
-        """Write the TOML doc to file."""
-        self.path.write_text(tomlkit.dumps(self.tomldoc))
+        """Write the TOML doc to file.
+
+        The file is replaced atomically, so that readers never see a partially
+        written config.
+        """
+        doc = self.tomldoc
+        with self._file_lock():
+            if self._pending and self._file_stat() != self._stat:
+                # changed by another process: re-read and re-apply our changes
+                pending = self._pending
+                self._read_config()
+                doc = self.tomldoc
+                for nested_key, value in pending.items():
+                    dic = doc
+                    keys = nested_key.split(".")
+                    for key in keys[:-1]:
+                        if key not in dic:
+                            dic[key] = tomlkit.table()
+                        dic = dic[key]
+                    dic[keys[-1]] = value
+            mode = self.path.stat().st_mode if self.path.exists() else 0o644
+            fd, tmppath = tempfile.mkstemp(
+                dir=self.path.parent, prefix=self.path.name, suffix=".tmp"
+            )
+            try:
+                os.chmod(tmppath, mode & 0o777)
+                with os.fdopen(fd, "w") as f:
+                    f.write(tomlkit.dumps(doc))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmppath, self.path)
+            except BaseException:
+                os.unlink(tmppath)
+                raise
+            self._stat = self._file_stat()
+        self._pending = {}
+        self._invalidate()
+
+    @contextmanager
+    def batch(self):
+        """Collect changes and write them to the file once at the end.
+
+        If an exception occurs within the block, the changes are discarded
+        and the config is re-read from the file.
+
+        Examples
+        --------
+        >>> with config.batch():
+        ...     for key in keys:
+        ...         config.set_value(key + ".timestamp", now)
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._pending = {}
+                self._read_config()
+            raise
+        self._batch_depth -= 1
+        if not self._batch_depth and self._pending:
+            self.save()
 
     @property
     def missions(self):
-        return list(self.d["missions"].keys())
+        return list(self.get_value("missions").keys())
 
     def list_instruments(self, mission):
         if not mission.startswith("missions"):
@@ -153,4 +396,4 @@ class Config:
         return json.dumps(self.d, indent=2)
 
 
-config = Config()
+config = Config(lazy=True)
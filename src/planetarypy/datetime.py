@@ -121,3 +121,190 @@ def isozformat(date_time, sep="T", timespec="auto"):
             "or has a non-zero offset from UTC.  Maybe you just want "
             "the datetime object's isoformat() function?"
         )
+
+
+# Vectorized variants of the parsers above, implemented in _datetime_arrays.
+#
+# NumPy and pandas are only imported when one of the array functions is called,
+# so that importing this module stays cheap.
+
+
+def fromdoyformat_array(date_strings, utc: bool = False):
+    """
+    Vectorized version of fromdoyformat() for many *date_strings* at once.
+
+    Accepts a list, NumPy array or pandas Series of strings in any of the formats
+    supported by fromdoyformat() and returns a pandas DatetimeIndex (or a Series
+    with the same index, if a Series was given) of dtype datetime64[ns].
+    Missing values (None, NaN) become NaT.
+
+    If the strings carry UTC offsets, or if *utc* is True, the result is
+    timezone-aware and converted to UTC.  Mixing strings with and without
+    UTC offsets raises a ValueError unless *utc* is True, in which case
+    strings without offset are taken to be in UTC.
+
+    Every unique string is parsed only once, which makes this particularly fast
+    for index tables with many repeated time stamps.
+    """
+    import numpy as np
+
+    from ._datetime_arrays import (
+        _DOY_LAYOUTS,
+        _DOY_PATTERN,
+        _YEAR_RANGE,
+        _check,
+        _check_range,
+        _factorize,
+        _parse_fields,
+        _to_ns,
+        _wrap,
+    )
+
+    codes, uniques, index = _factorize(date_strings)
+    parsed = _parse_fields(uniques, _DOY_LAYOUTS, _DOY_PATTERN, "YYYY-DDD or YYYYDDD")
+
+    year, doy = parsed["year"], parsed["doy"]
+    _check_range(uniques, year, *_YEAR_RANGE, "year for datetime64[ns]")
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    _check(uniques, (doy < 1) | (doy > 365 + leap), "day of year")
+
+    has_offset = parsed["has_offset"]
+    if has_offset.any() and not (has_offset.all() or utc):
+        raise ValueError(
+            "Cannot mix date strings with and without UTC offset. "
+            "Use `utc=True` to interpret the ones without offset as UTC."
+        )
+    year_start = (year - 1970).astype("datetime64[Y]").astype("datetime64[D]")
+    days = year_start.astype(np.int64) + doy - 1
+    ns = _to_ns(uniques, days, parsed)
+    return _wrap(ns, codes, index, tz_aware=utc or bool(has_offset.any()))
+
+
+def fromisozformat_array(date_strings):
+    """
+    Vectorized version of fromisozformat() for many *date_strings* at once.
+
+    Accepts a list, NumPy array or pandas Series of strings in the formats
+    emitted by isozformat() and returns a timezone-aware (UTC) pandas
+    DatetimeIndex (or a Series with the same index, if a Series was given).
+    Missing values (None, NaN) become NaT.
+    """
+    import numpy as np
+
+    from ._datetime_arrays import (
+        _ISOZ_LAYOUTS,
+        _ISOZ_PATTERN,
+        _YEAR_RANGE,
+        _check,
+        _check_range,
+        _factorize,
+        _parse_fields,
+        _to_ns,
+        _wrap,
+    )
+
+    codes, uniques, index = _factorize(date_strings)
+    parsed = _parse_fields(
+        uniques,
+        _ISOZ_LAYOUTS,
+        _ISOZ_PATTERN,
+        "YYYY-MM-DDTHH:MM:SS[.ffffff]Z",
+        suffix="Z",
+        max_fraction=6,
+    )
+
+    year, month, day = parsed["year"], parsed["month"], parsed["day"]
+    _check_range(uniques, year, *_YEAR_RANGE, "year for datetime64[ns]")
+    _check_range(uniques, month, 1, 12, "month")
+    months = ((year - 1970) * 12 + month - 1).astype("datetime64[M]")
+    month_start = months.astype("datetime64[D]").astype(np.int64)
+    next_month_start = (months + 1).astype("datetime64[D]").astype(np.int64)
+    _check(uniques, (day < 1) | (day > next_month_start - month_start), "day")
+
+    ns = _to_ns(uniques, month_start + day - 1, parsed)
+    return _wrap(ns, codes, index, tz_aware=True)
+
+
+# Vectorized variants of the formatters above.
+
+
+def doyformat_array(date_times, sep="T", timespec="auto"):
+    """
+    Vectorized version of doyformat() for many *date_times* at once.
+
+    Accepts a datetime64 array, a pandas DatetimeIndex or Series and returns a
+    NumPy string array with the same strings doyformat() returns for each
+    element.  Like doyformat(), a UTC offset is appended for timezones with a
+    fixed offset, e.g. UTC.  NaT values are returned as "NaT".
+    """
+    from ._datetime_arrays import (
+        _constant,
+        _datetime_code_points,
+        _datetime_index,
+        _finish,
+        _join,
+    )
+
+    index = _datetime_index(date_times)
+    n = len(index)
+    local = index.tz_localize(None) if index.tz is not None else index
+    fields = _datetime_code_points(local, timespec)
+    dash = _constant("-", n)
+    parts = [
+        (fields["year"], 4),
+        (dash, 1),
+        (fields["doy"], 3),
+        (_constant(sep, n), len(sep)),
+        (fields["time"], fields["time_length"]),
+    ]
+    if index.tz is not None and index.tz.utcoffset(None) is not None:
+        # like datetime.timetz(), only fixed offsets are shown
+        offset = datetime.time(tzinfo=index.tz).isoformat()[len("00:00:00") :]
+        parts.append((_constant(offset, n), len(offset)))
+    return _finish(_join(parts, n), index)
+
+
+def isozformat_array(date_times, sep="T", timespec="auto"):
+    """
+    Vectorized version of isozformat() for many *date_times* at once.
+
+    Accepts a datetime64 array, a pandas DatetimeIndex or Series and returns a
+    NumPy string array with the same 'Z'-terminated strings isozformat() returns
+    for each element.  Timezone-naive input is taken to be in UTC, as is usual
+    for datetime64 values, timezone-aware input must have zero UTC offset.
+    NaT values are returned as "NaT".
+    """
+    from ._datetime_arrays import (
+        _constant,
+        _datetime_code_points,
+        _datetime_index,
+        _finish,
+        _join,
+    )
+
+    if not isinstance(sep, str) or len(sep) != 1:
+        # as datetime.isoformat(), which isozformat() uses
+        raise TypeError(f"sep must be a unicode character, not {sep!r}")
+    index = _datetime_index(date_times)
+    n = len(index)
+    if index.tz is not None:
+        local = index.tz_localize(None)
+        if (local != index.tz_convert(None))[index.notna()].any():
+            raise ValueError(
+                "The datetime values have a non-zero offset from UTC. "
+                "Maybe you just want the doyformat_array() function?"
+            )
+        index = local
+    fields = _datetime_code_points(index, timespec)
+    dash = _constant("-", n)
+    parts = [
+        (fields["year"], 4),
+        (dash, 1),
+        (fields["month"], 2),
+        (dash, 1),
+        (fields["day"], 2),
+        (_constant(sep, n), len(sep)),
+        (fields["time"], fields["time_length"]),
+        (_constant("Z", n), 1),
+    ]
+    return _finish(_join(parts, n), index)
@@ -0,0 +1,15 @@
+"""SQLite helpers shared by the kernel catalog and store."""
+
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Union
+
+
+def connect(path: Union[str, Path], foreign_keys: bool = False):
+    "Open a connection that is closed at the end of a with block."
+    # a short-lived connection per operation is safe across threads and forks
+    con = sqlite3.connect(path, timeout=30)
+    if foreign_keys:
+        con.execute("PRAGMA foreign_keys = ON")
+    return closing(con)
@@ -0,0 +1,415 @@
+"""Catalog of local SPICE kernels and their time coverage.
+
+The catalog is an SQLite database that records each kernel file with its type,
+size, checksum and download URL, and the coverage intervals of SPK and CK files
+per body or instrument, extracted once with `spkcov`/`ckcov`.  This allows to
+answer questions like "which local kernels cover this time for Cassini?"
+without loading any kernels or contacting NAIF.
+
+CK coverage is recorded in spacecraft clock time, so converting it to ET needs
+the LSK and the spacecraft's SCLK kernel.  The cataloged LSK and SCLK files are
+loaded for that while CK files are added; CK files whose coverage can't be
+converted yet are retried by later calls of `add`.
+
+The recorded size, modification time and checksum also allow to `verify` the
+files: only files whose modification time changed are hashed again, so
+checking a large kernel archive takes seconds instead of rereading all of it.
+"""
+
+__all__ = ["KernelCatalog"]
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from numbers import Number
+from pathlib import Path
+from typing import Iterable, Union
+
+import pandas as pd
+import spiceypy as spice
+from spiceypy.utils.exceptions import SpiceyError
+
+from ..utils import file_hash, logger
+from ._sqlite import connect
+from .pool import _is_furnished
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kernels (
+    path TEXT PRIMARY KEY,
+    type TEXT,
+    size INTEGER,
+    mtime REAL,
+    sha256 TEXT,
+    added REAL,
+    url TEXT
+);
+CREATE TABLE IF NOT EXISTS coverage (
+    path TEXT REFERENCES kernels(path) ON DELETE CASCADE,
+    id INTEGER,
+    start REAL,
+    stop REAL
+);
+CREATE INDEX IF NOT EXISTS coverage_interval ON coverage (id, start, stop);
+CREATE INDEX IF NOT EXISTS coverage_path ON coverage (path);
+"""
+
+_COVERAGE_FUNCTIONS = {
+    "SPK": (spice.spkobj, spice.spkcov),
+    "CK": (
+        spice.ckobj,
+        lambda path, idcode: spice.ckcov(path, idcode, False, "INTERVAL", 0.0, "TDB"),
+    ),
+}
+
+
+def _coverage_intervals(path: str, kernel_type: str) -> list:
+    "Return (id, start, stop) coverage intervals in ET of an SPK or CK file."
+    if kernel_type not in _COVERAGE_FUNCTIONS:
+        return []
+    get_ids, get_coverage = _COVERAGE_FUNCTIONS[kernel_type]
+    intervals = []
+    for idcode in get_ids(path):
+        window = get_coverage(path, idcode)
+        for i in range(spice.wncard(window)):
+            intervals.append((int(idcode), *spice.wnfetd(window, i)))
+    return intervals
+
+
+@contextmanager
+def _furnished(paths: Iterable[str]):
+    "Load the kernels at `paths` that aren't loaded yet, and unload them again."
+    loaded = []
+    try:
+        for path in paths:
+            if not _is_furnished(path):
+                spice.furnsh(path)
+                loaded.append(path)
+        yield
+    finally:
+        for path in loaded:
+            spice.unload(path)
+
+
+def _to_et(time_value) -> float:
+    "Convert a time to ET, passing through numbers as ET already."
+    if isinstance(time_value, Number):
+        return float(time_value)
+    from .leapseconds import utc2et
+
+    return float(utc2et(time_value)[0])
+
+
+def _to_id(body) -> int:
+    "Convert a body or instrument name to its NAIF ID code."
+    if body is None or isinstance(body, int):
+        return body
+    return spice.bods2c(str(body))
+
+
+class KernelCatalog:
+    """SQLite catalog of local kernel files and their coverage.
+
+    Parameters
+    ----------
+    path : str or Path
+        Location of the database file, created if needed.
+
+    Examples
+    --------
+    >>> catalog = KernelCatalog(KERNEL_STORAGE / "catalog.sqlite")
+    >>> catalog.add(KERNEL_STORAGE.rglob("*.bsp"))
+    >>> catalog.covering("2011-02-13T12:00", "CASSINI")
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(exist_ok=True, parents=True)
+        with self._connect() as con, con:
+            con.executescript(_SCHEMA)
+            columns = [row[1] for row in con.execute("PRAGMA table_info(kernels)")]
+            if "url" not in columns:
+                # catalogs created before URLs were recorded
+                con.execute("ALTER TABLE kernels ADD COLUMN url TEXT")
+
+    def _connect(self):
+        return connect(self.path, foreign_keys=True)
+
+    def add(
+        self,
+        paths: Iterable[Union[str, Path]],
+        checksum: bool = True,
+        sha256: dict = None,
+        urls: dict = None,
+    ) -> int:
+        """Add kernel files to the catalog, or update changed ones.
+
+        Files that are cataloged with unchanged size and modification time are
+        skipped, so this can be called after every download. CK files are
+        added last, with the cataloged LSK and SCLK files loaded to convert
+        their coverage to ET.  Files whose coverage can't be read are cataloged
+        without coverage and read again by the next call.
+
+        Parameters
+        ----------
+        paths : iterable of str or Path
+            Kernel files to add.
+        checksum : bool
+            Calculate the SHA256 checksum of new files.
+        sha256 : dict, optional
+            Known SHA256 hex digests by path, e.g. the blob names of
+            `KernelStore`, used instead of hashing these files again.
+        urls : dict, optional
+            Download URLs by path, recorded to repair the files if `verify`
+            finds them corrupt.
+
+        Returns
+        -------
+        int
+            Number of added or updated files.
+        """
+        if isinstance(paths, (str, Path)):
+            paths = [paths]
+        paths = [Path(p).resolve() for p in paths]
+        known_sha256 = {Path(p).resolve(): v for p, v in (sha256 or {}).items()}
+        urls = {Path(p).resolve(): str(v) for p, v in (urls or {}).items()}
+        with self._connect() as con:
+            rows = con.execute("SELECT path, size, mtime, url FROM kernels").fetchall()
+        known = {path: (size, mtime) for path, size, mtime, _ in rows}
+        known_urls = {path: url for path, *_, url in rows}
+        cks = []
+        new_urls = []
+        n_added = 0
+        for path in paths:
+            stat = path.stat()
+            if known.get(str(path)) == (stat.st_size, stat.st_mtime):
+                if path in urls and known_urls[str(path)] != urls[path]:
+                    new_urls.append((urls[path], str(path)))
+                continue
+            try:
+                kernel_type = spice.getfat(str(path))[1]
+            except SpiceyError as e:
+                logger.warning("Can't read the type of %s: %s", path.name, e)
+                kernel_type = path.suffix.lstrip(".").upper()
+            if kernel_type == "CK":
+                cks.append(path)
+                continue
+            self._insert(
+                path, kernel_type, checksum, known_sha256.get(path), urls.get(path)
+            )
+            n_added += 1
+        if cks:
+            time_kernels = pd.concat([self.kernels("LSK"), self.kernels("SCLK")])
+            with _furnished(time_kernels.path):
+                for path in cks:
+                    self._insert(
+                        path, "CK", checksum, known_sha256.get(path), urls.get(path)
+                    )
+                    n_added += 1
+        if new_urls:
+            with self._connect() as con, con:
+                con.executemany("UPDATE kernels SET url = ? WHERE path = ?", new_urls)
+        return n_added
+
+    def _insert(
+        self, path: Path, kernel_type: str, checksum: bool, sha256: str, url: str
+    ):
+        "Read the coverage of a kernel file and replace its catalog entry."
+        stat = path.stat()
+        mtime = stat.st_mtime
+        try:
+            intervals = _coverage_intervals(str(path), kernel_type)
+        except SpiceyError as e:
+            logger.warning("Can't read coverage of %s: %s", path.name, e)
+            intervals = []
+            # not up to date, so the next `add` tries again
+            mtime = None
+        if sha256 is None and checksum:
+            sha256 = file_hash(path)
+        with self._connect() as con, con:
+            if url is None:
+                # keep the URL of a file that changed locally, for repairs
+                row = con.execute(
+                    "SELECT url FROM kernels WHERE path = ?", (str(path),)
+                ).fetchone()
+                url = row[0] if row else None
+            con.execute("DELETE FROM kernels WHERE path = ?", (str(path),))
+            con.execute(
+                "INSERT INTO kernels (path, type, size, mtime, sha256, added, url) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    str(path),
+                    kernel_type,
+                    stat.st_size,
+                    mtime,
+                    sha256,
+                    time.time(),
+                    url,
+                ),
+            )
+            con.executemany(
+                "INSERT INTO coverage VALUES (?, ?, ?, ?)",
+                [(str(path), *interval) for interval in intervals],
+            )
+
+    def remove(self, path: Union[str, Path]):
+        "Remove a kernel file and its coverage from the catalog."
+        with self._connect() as con, con:
+            con.execute(
+                "DELETE FROM kernels WHERE path = ?", (str(Path(path).resolve()),)
+            )
+
+    def prune(self) -> int:
+        "Remove cataloged files that don't exist anymore and return their number."
+        missing = [p for p in self.kernels().path if not Path(p).exists()]
+        for path in missing:
+            self.remove(path)
+        return len(missing)
+
+    def verify(
+        self,
+        paths: Iterable[Union[str, Path]] = None,
+        rehash: bool = False,
+        max_workers: int = None,
+    ) -> pd.DataFrame:
+        """Check the cataloged files with a checksum against their recorded state.
+
+        Files with the recorded size and modification time are assumed to be
+        intact. Files with another size are corrupt. Only files with another
+        modification time are hashed, in parallel threads (hashlib releases the
+        GIL, so this uses several cores), and their new modification time is
+        recorded if the hash matches.
+
+        Parameters
+        ----------
+        paths : iterable of str or Path, optional
+            Only verify these files. Defaults to all cataloged files.
+        rehash : bool, optional
+            Hash all files, regardless of size and modification time.
+        max_workers : int, optional
+            Number of hashing threads. Defaults to the number of CPUs.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The catalog entries with a `status` column that is "ok", "missing"
+            or "corrupt".
+        """
+        df = self.kernels()
+        df = df[df.sha256.notna()]
+        if paths is not None:
+            df = df[df.path.isin([str(Path(p).resolve()) for p in paths])]
+        df = df.reset_index(drop=True)
+        status = []
+        to_hash = []
+        for i, row in df.iterrows():
+            try:
+                stat = os.stat(row.path)
+            except FileNotFoundError:
+                status.append("missing")
+                continue
+            if stat.st_size != row["size"]:
+                status.append("corrupt")
+            elif stat.st_mtime == row.mtime and not rehash:
+                status.append("ok")
+            else:
+                status.append(None)
+                to_hash.append(i)
+        intact = []
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            hashes = executor.map(file_hash, df.path[to_hash])
+            for i, sha256 in zip(to_hash, hashes):
+                if sha256 == df.sha256[i]:
+                    status[i] = "ok"
+                    intact.append((os.stat(df.path[i]).st_mtime, df.path[i]))
+                else:
+                    status[i] = "corrupt"
+        if intact:
+            with self._connect() as con, con:
+                # files waiting for their coverage (no mtime) keep waiting
+                con.executemany(
+                    "UPDATE kernels SET mtime = ? "
+                    "WHERE path = ? AND mtime IS NOT NULL",
+                    intact,
+                )
+        df["status"] = status
+        return df
+
+    def kernels(self, kernel_type: str = None) -> pd.DataFrame:
+        "Return the cataloged kernel files, optionally only of `kernel_type`."
+        query = "SELECT * FROM kernels"
+        params = ()
+        if kernel_type is not None:
+            query += " WHERE type = ?"
+            params = (kernel_type.upper(),)
+        with self._connect() as con:
+            return pd.read_sql_query(query + " ORDER BY path", con, params=params)
+
+    def coverage(self, body=None) -> pd.DataFrame:
+        """Return the coverage intervals in ET, optionally only for `body`.
+
+        Parameters
+        ----------
+        body : int or str, optional
+            NAIF ID or name of a body, spacecraft or instrument.
+        """
+        query = "SELECT c.path, k.type, c.id, c.start, c.stop FROM coverage c "
+        query += "JOIN kernels k ON c.path = k.path"
+        params = ()
+        if body is not None:
+            query += " WHERE c.id = ?"
+            params = (_to_id(body),)
+        with self._connect() as con:
+            return pd.read_sql_query(
+                query + " ORDER BY c.id, c.start", con, params=params
+            )
+
+    def covering(self, time_value, body=None, kernel_type: str = None) -> list:
+        """Return the kernel files with coverage at a time.
+
+        Parameters
+        ----------
+        time_value : float or str or datetime
+            ET, or a UTC time that is converted with the generic LSK.
+        body : int or str, optional
+            NAIF ID or name of a body, spacecraft or instrument.
+        kernel_type : str, optional
+            Only return kernels of this type, e.g. "SPK" or "CK".
+
+        Returns
+        -------
+        list of Path
+        """
+        return self.overlapping(time_value, time_value, body, kernel_type)
+
+    def overlapping(self, start, stop, body=None, kernel_type: str = None) -> list:
+        """Return the kernel files with coverage between two times.
+
+        Parameters
+        ----------
+        start, stop : float or str or datetime
+            ET, or UTC times that are converted with the generic LSK.
+        body : int or str, optional
+            NAIF ID or name of a body, spacecraft or instrument.
+        kernel_type : str, optional
+            Only return kernels of this type, e.g. "SPK" or "CK".
+
+        Returns
+        -------
+        list of Path
+        """
+        query = (
+            "SELECT DISTINCT c.path FROM coverage c "
+            "JOIN kernels k ON c.path = k.path "
+            "WHERE c.start <= ? AND c.stop >= ?"
+        )
+        params = [_to_et(stop), _to_et(start)]
+        if body is not None:
+            query += " AND c.id = ?"
+            params.append(_to_id(body))
+        if kernel_type is not None:
+            query += " AND k.type = ?"
+            params.append(kernel_type.upper())
+        with self._connect() as con:
+            rows = con.execute(query + " ORDER BY c.path", params).fetchall()
+        return [Path(path) for (path,) in rows]
@@ -0,0 +1,180 @@
+"""Read the segment summaries of DAF kernels (SPK, CK, binary PCK) with NumPy.
+
+SPICE's binary kernels are Double precision Array Files (DAF).  Their segments
+are described by summaries, kept in a linked list of 1024-byte records: each
+summary has `ND` double precision and `NI` integer components, e.g. for an SPK
+segment the start and stop ET, and the target, center, frame, data type and
+address range.  This module memory-maps the file and reads the file record and
+the summaries with structured dtypes, so the bodies, frames and time spans of
+a kernel are known without loading it into the SPICE kernel pool, and
+thousands of files are summarized in seconds.
+
+See NAIF's DAF Required Reading for the format.
+"""
+
+__all__ = ["FileRecord", "read_file_record", "read_summaries", "summarize"]
+
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, Union
+
+import numpy as np
+import pandas as pd
+
+RECORD_BYTES = 1024
+
+FileRecord = namedtuple("FileRecord", "idword nd ni ifname fward bward free byteorder")
+FileRecord.__doc__ = """File record of a DAF.
+
+Attributes
+----------
+idword : str
+    File type, e.g. "DAF/SPK".
+nd, ni : int
+    Number of double precision and integer components of the summaries.
+ifname : str
+    Internal file name.
+fward, bward : int
+    Numbers of the first and last summary record.
+free : int
+    First free address of the file.
+byteorder : str
+    "<" for little-endian (LTL-IEEE), ">" for big-endian (BIG-IEEE) files.
+"""
+
+# names of the summary components by file type and (ND, NI)
+_COLUMNS = {
+    ("SPK", 2, 6): ["start", "stop", "target", "center", "frame", "type"],
+    ("CK", 2, 6): ["start", "stop", "instrument", "frame", "type", "angular_velocity"],
+    ("PCK", 2, 5): ["start", "stop", "body", "frame", "type"],
+}
+
+
+def _byteorder(header: bytes) -> str:
+    "Byte order of a DAF from its format ID, or a guess for old files without it."
+    fmt = header[88:96]
+    if fmt == b"LTL-IEEE":
+        return "<"
+    if fmt == b"BIG-IEEE":
+        return ">"
+    # older files without the format ID: ND is a small positive number
+    nd = int(np.frombuffer(header, "<i4", count=1, offset=8)[0])
+    return "<" if 0 < nd <= 124 else ">"
+
+
+def read_file_record(path: Union[str, Path]) -> FileRecord:
+    "Read the file record of a DAF."
+    with open(path, "rb") as f:
+        header = f.read(RECORD_BYTES)
+    if len(header) < RECORD_BYTES or not header.startswith((b"DAF/", b"NAIF/DAF")):
+        raise ValueError(f"{path} is not a DAF file.")
+    order = _byteorder(header)
+    nd, ni = np.frombuffer(header, f"{order}i4", count=2, offset=8)
+    fward, bward, free = np.frombuffer(header, f"{order}i4", count=3, offset=76)
+    return FileRecord(
+        idword=header[:8].decode("ascii").strip(),
+        nd=int(nd),
+        ni=int(ni),
+        ifname=header[16:76].decode("ascii", "replace").strip(),
+        fward=int(fward),
+        bward=int(bward),
+        free=int(free),
+        byteorder=order,
+    )
+
+
+def read_summaries(path: Union[str, Path]) -> pd.DataFrame:
+    """Read the segment summaries of a DAF.
+
+    Parameters
+    ----------
+    path : str or Path
+        SPK, CK, binary PCK or other DAF file.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per segment, in file order, with the summary components, the
+        `begin` and `end` addresses of the segment data and the segment `name`.
+        The components are named after the file type, e.g. `start`, `stop`
+        (ET, or encoded SCLK for CK files), `target`, `center`, `frame` and
+        `type` for SPK files, or `d0, d1, ..., i0, i1, ...` for unknown types.
+    """
+    record = read_file_record(path)
+    order, nd, ni = record.byteorder, record.nd, record.ni
+    size = nd + (ni + 1) // 2  # summary size in doubles
+    dtype = np.dtype(
+        {
+            "names": ["d", "i"],
+            "formats": [(f"{order}f8", (nd,)), (f"{order}i4", (ni,))],
+            "offsets": [0, 8 * nd],
+            "itemsize": 8 * size,
+        }
+    )
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    summaries, names = [], []
+    number = record.fward
+    visited = set()
+    while number and number not in visited:
+        visited.add(number)
+        offset = (number - 1) * RECORD_BYTES
+        next_record, _, nsum = np.frombuffer(
+            data, f"{order}f8", count=3, offset=offset
+        ).astype(int)
+        summaries.append(np.frombuffer(data, dtype, count=nsum, offset=offset + 24))
+        # the name record follows its summary record
+        name_record = data[offset + RECORD_BYTES : offset + 2 * RECORD_BYTES]
+        names.append(
+            np.frombuffer(name_record, f"S{8 * size}", count=nsum).astype(str)
+        )
+        number = next_record
+    summaries = np.concatenate(summaries) if summaries else np.empty(0, dtype)
+    kind = record.idword.split("/")[-1]
+    columns = _COLUMNS.get(
+        (kind, nd, ni),
+        [f"d{j}" for j in range(nd)] + [f"i{j}" for j in range(ni - 2)],
+    )
+    df = pd.DataFrame(
+        {
+            **{col: summaries["d"][:, j] for j, col in enumerate(columns[:nd])},
+            **{
+                col: summaries["i"][:, j].astype(int)
+                for j, col in enumerate(columns[nd:])
+            },
+            "begin": summaries["i"][:, ni - 2].astype(int),
+            "end": summaries["i"][:, ni - 1].astype(int),
+            "name": np.concatenate(names) if names else np.empty(0, str),
+        }
+    )
+    df["name"] = df["name"].str.strip()
+    return df
+
+
+def summarize(
+    paths: Iterable[Union[str, Path]], max_workers: int = None
+) -> pd.DataFrame:
+    """Read the segment summaries of many DAF files.
+
+    Parameters
+    ----------
+    paths : iterable of str or Path
+        DAF files of the same type, e.g. all SPK files of a mission.
+    max_workers : int, optional
+        Number of reading threads. Defaults to the number of CPUs.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The summaries of all files as returned by `read_summaries`, with the
+        file in the `path` column.
+    """
+    paths = [Path(p) for p in paths]
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        frames = list(executor.map(read_summaries, paths))
+    for path, df in zip(paths, frames):
+        df.insert(0, "path", str(path))
+    if not frames:
+        return pd.DataFrame(columns=["path"])
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,151 @@
+"""Parallel geometry calculations in worker processes with preloaded kernels.
+
+CSPICE is not thread-safe, so parallel SPICE calculations need processes.
+`GeometryExecutor` starts a pool of worker processes that have the required
+kernels loaded once, when they start, splits arrays of inputs (times, surface
+points, ...) into one shard per worker and gathers the NumPy results in order.
+
+Where the "fork" start method is available, the kernels are loaded in the main
+process before the workers are forked, so the text kernels are parsed only once
+and the workers don't import anything.  Binary kernels are reopened in each
+worker, because forked processes would otherwise share their file offsets.
+"""
+
+__all__ = ["GeometryExecutor"]
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, Union
+
+import numpy as np
+import spiceypy as spice
+
+_BINARY_TYPES = {"SPK", "CK", "PCK", "DSK", "EK"}
+
+
+def _reopen_binary_kernels():
+    "Reopen the binary kernels inherited from the parent process, in load order."
+    binary = []
+    for i in range(spice.ktotal("ALL")):
+        path, kernel_type, _, _ = spice.kdata(i, "ALL")
+        if kernel_type in _BINARY_TYPES:
+            binary.append(path)
+    for path in binary:
+        spice.unload(path)
+    for path in binary:
+        spice.furnsh(path)
+
+
+def _initialize_worker(kernels: list, forked: bool):
+    "Initializer of the worker processes."
+    if forked:
+        _reopen_binary_kernels()
+    else:
+        for kernel in kernels:
+            spice.furnsh(kernel)
+
+
+def _call(func: Callable, args: tuple, kwargs: dict):
+    return func(*args, **kwargs)
+
+
+class GeometryExecutor:
+    """Process pool for SPICE calculations on arrays.
+
+    Parameters
+    ----------
+    kernels : str or Path, or iterable of them
+        Kernel files or metakernels loaded in every worker.
+    max_workers : int, optional
+        Number of worker processes. Defaults to the number of CPUs.
+    fork : bool, optional
+        Load the kernels in this process and fork the workers from it, if the
+        platform supports it. Otherwise, every worker loads the kernels when it
+        starts. Defaults to True.
+
+    Examples
+    --------
+    >>> def positions(et):
+    ...     return np.array(spice.spkpos("SATURN", et, "J2000", "NONE", "CASSINI")[0])
+    >>> with GeometryExecutor(metakernel) as executor:
+    ...     xyz = executor.map(positions, ets)
+    """
+
+    def __init__(
+        self,
+        kernels: Union[str, Path, Iterable[Union[str, Path]]] = (),
+        max_workers: int = None,
+        fork: bool = True,
+    ):
+        if isinstance(kernels, (str, Path)):
+            kernels = [kernels]
+        self.kernels = [str(kernel) for kernel in kernels]
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.forked = fork and "fork" in multiprocessing.get_all_start_methods()
+        if self.forked:
+            from .kernels import get_pool
+
+            # loaded before any worker is started, so that they inherit them
+            get_pool().load(self.kernels)
+        context = multiprocessing.get_context("fork" if self.forked else "spawn")
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=context,
+            initializer=_initialize_worker,
+            initargs=(self.kernels, self.forked),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def shutdown(self, wait: bool = True):
+        "Stop the workers and release the kernels loaded for them."
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=wait)
+        self._executor = None
+        if self.forked:
+            from .kernels import get_pool
+
+            get_pool().release(self.kernels)
+
+    def map(self, func: Callable, *arrays, shards: int = None, **kwargs):
+        """Call `func` on shards of `arrays` in the workers and join the results.
+
+        Parameters
+        ----------
+        func : callable
+            Function of the array shards (and `kwargs`) that returns an array, or
+            a tuple of arrays, with one row per input row. It's run in the workers
+            and must be picklable, e.g. defined at module level.
+        *arrays : array-like
+            Inputs of equal length, split along the first axis.
+        shards : int, optional
+            Number of shards. Defaults to the number of workers.
+        **kwargs
+            Passed on to `func` for every shard.
+
+        Returns
+        -------
+        numpy.ndarray or tuple of numpy.ndarray
+            The results of the shards, concatenated in order.
+        """
+        if self._executor is None:
+            raise RuntimeError("The executor has been shut down.")
+        arrays = [np.asarray(array) for array in arrays]
+        if len({len(array) for array in arrays}) > 1:
+            raise ValueError("All arrays need the same length.")
+        n = min(shards or self.max_workers, len(arrays[0])) or 1
+        split = [np.array_split(array, n) for array in arrays]
+        futures = [
+            self._executor.submit(_call, func, shard, kwargs) for shard in zip(*split)
+        ]
+        results = [future.result() for future in futures]
+        if isinstance(results[0], tuple):
+            return tuple(np.concatenate(parts) for parts in zip(*results))
+        return np.concatenate(results)
@@ -13,52 +13,264 @@ stop as parameters.
 
 __all__ = [
     "KERNEL_STORAGE",
+    "get_kernel_storage",
     "NAIF_URL",
     "BASE_URL",
+    "SUBSET_CACHE",
+    "SUBSET_TTL",
+    "SUBSET_RECENT",
+    "SUBSET_RECENT_TTL",
     "GENERIC_STORAGE",
     "GENERIC_URL",
+    "DATASETS_CACHE",
+    "DATASETS_TTL",
+    "get_datasets",
     "generic_kernel_names",
     "generic_kernel_paths",
+    "get_generic_kernel_paths",
     "is_start_valid",
     "is_stop_valid",
     "download_one_url",
     "Subsetter",
     "get_metakernel_and_files",
+    "get_catalog",
+    "get_store",
+    "merge_windows",
+    "plan_subsets",
+    "get_metakernels_and_files",
+    "KERNEL_TYPE_ORDER",
+    "synthesize_metakernel",
+    "verify_kernels",
     "list_kernels_for_day",
     "download_generic_kernels",
     "load_generic_kernels",
+    "ensure_kernels",
+    "get_pool",
+    "loaded_kernels",
     "show_loaded_kernels",
 ]
 
+import hashlib
+import json
+import os
+import threading
+import time
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
+from functools import partial
 from io import BytesIO
-from itertools import repeat
-from multiprocessing import cpu_count
 from pathlib import Path
 
 import pandas as pd
-import requests
-import spiceypy as spice
 from astropy.time import Time
 from tqdm.auto import tqdm
-from tqdm.contrib.concurrent import process_map
 from yarl import URL
 
 from ..config import config
 from ..datetime import fromdoyformat
-from ..utils import url_retrieve
+from ..utils import (
+    download_urls,
+    get_session,
+    logger,
+    record_transfers,
+    url_retrieve_segmented,
+)
+from .catalog import KernelCatalog
+from .pool import KernelPool, loaded_kernels
+from .store import KernelStore
+
+_created_folders = set()
+
+
+def _folder(path: Path) -> Path:
+    "Create `path` once per process and return it."
+    if path not in _created_folders:
+        path.mkdir(exist_ok=True, parents=True)
+        _created_folders.add(path)
+    return path
+
+
+def get_kernel_storage() -> Path:
+    """Return the folder of the downloaded kernels and their caches.
+
+    It's `spice_kernels` in the current `config.storage_root`, so changing the
+    storage root takes effect without restarting.  Also available as
+    `KERNEL_STORAGE`.
+    """
+    return _folder(config.storage_root / "spice_kernels")
+
+
+def _datasets_cache() -> Path:
+    return get_kernel_storage() / "datasets.pkl"
+
+
+def _subset_cache() -> Path:
+    return get_kernel_storage() / "subsets"
 
-KERNEL_STORAGE = config.storage_root / "spice_kernels"
-KERNEL_STORAGE.mkdir(exist_ok=True, parents=True)
 
 datasets_url = "https://raw.githubusercontent.com/planetarypy/planetarypy_configs/main/archived_spice_kernel_sets.csv"
 
-datasets = pd.read_csv(datasets_url).set_index("shorthand")
+DATASETS_TTL = timedelta(days=7)
+"Age after which the cached `datasets` table is refreshed in the background."
+
+_datasets = None
+_datasets_lock = threading.Lock()
+_refresh_thread = None
+
+
+def _download_datasets() -> pd.DataFrame:
+    "Download the datasets table and store it in the cache file."
+    response = get_session().get(datasets_url)
+    response.raise_for_status()
+    df = pd.read_csv(BytesIO(response.content)).set_index("shorthand")
+    cache = _datasets_cache()
+    tmpfile = cache.with_name(f"{cache.name}.{os.getpid()}.tmp")
+    df.to_pickle(tmpfile)
+    os.replace(tmpfile, cache)
+    return df
+
+
+def _read_datasets_cache(cache: Path):
+    "Return the cached datasets table, or None if there's no readable cache."
+    try:
+        return pd.read_pickle(cache)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        # truncated, or written by an incompatible pandas version
+        logger.warning("Deleting the unreadable %s: %s", cache, e)
+        cache.unlink(missing_ok=True)
+        return None
+
+
+def _refresh_datasets():
+    global _datasets
+    try:
+        _datasets = _download_datasets()
+    except Exception as e:
+        logger.warning("Could not refresh the SPICE datasets table: %s", e)
+
+
+def get_datasets(ttl: timedelta = None, refresh: bool = False) -> pd.DataFrame:
+    """
+    Return the table of archived SPICE kernel datasets.
+
+    The table is downloaded once and cached in `DATASETS_CACHE`.  If the cache
+    is older than `ttl`, the cached table is returned right away and updated in
+    a background thread.  If downloading fails, the last cached copy is used.
+    An unreadable cache is deleted and the table is downloaded again.
+
+    Parameters
+    ----------
+    ttl : timedelta, optional
+        Maximum age of the cached table. Defaults to `DATASETS_TTL`.
+    refresh : bool, optional
+        Download the table now. Defaults to False.
+    """
+    global _datasets, _refresh_thread
+    ttl = DATASETS_TTL if ttl is None else ttl
+    cache = _datasets_cache()
+    with _datasets_lock:
+        if _datasets is None and not refresh:
+            _datasets = _read_datasets_cache(cache)
+        if refresh or _datasets is None or not cache.exists():
+            try:
+                _datasets = _download_datasets()
+                return _datasets
+            except Exception as e:
+                if _datasets is None:
+                    _datasets = _read_datasets_cache(cache)
+                if _datasets is None:
+                    raise ConnectionError(
+                        f"Could not download the SPICE datasets table from "
+                        f"{datasets_url}: {e}"
+                    ) from e
+                logger.warning("Using cached SPICE datasets table: %s", e)
+                if not cache.exists():
+                    return _datasets
+        age = time.time() - cache.stat().st_mtime
+        if age > ttl.total_seconds() and not (
+            _refresh_thread and _refresh_thread.is_alive()
+        ):
+            _refresh_thread = threading.Thread(target=_refresh_datasets, daemon=True)
+            _refresh_thread.start()
+        return _datasets
+
+
+_PATHS = {
+    "KERNEL_STORAGE": get_kernel_storage,
+    "DATASETS_CACHE": _datasets_cache,
+    "SUBSET_CACHE": _subset_cache,
+}
+
+
+def __getattr__(name):
+    # `datasets` is loaded on first access instead of at import
+    if name == "datasets":
+        return get_datasets()
+    # the storage paths follow changes of `config.storage_root`
+    if name in _PATHS:
+        return _PATHS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 NAIF_URL = URL("https://naif.jpl.nasa.gov")
 BASE_URL = NAIF_URL / "cgi-bin/subsetds.pl"
 
+SUBSET_TTL = timedelta(days=30)
+"Age after which a cached response of NAIF's subset service is requested again."
+SUBSET_RECENT = timedelta(days=90)
+"Time windows that ended less than this ago may still get new kernels."
+SUBSET_RECENT_TTL = timedelta(days=1)
+"`SUBSET_TTL` of the time windows that ended less than `SUBSET_RECENT` ago."
+
+_catalog = None
+
+
+def get_catalog() -> KernelCatalog:
+    "Return the catalog of the kernels in `KERNEL_STORAGE`."
+    global _catalog
+    path = get_kernel_storage() / "catalog.sqlite"
+    if _catalog is None or _catalog.path != path:
+        _catalog = KernelCatalog(path)
+    return _catalog
+
+
+_store = None
+
+
+def get_store() -> KernelStore:
+    "Return the content-addressed store of the downloaded kernels."
+    global _store
+    root = get_kernel_storage() / "store"
+    if _store is None or _store.root != root:
+        _store = KernelStore(root)
+    return _store
+
+
+_pool = None
+
+
+def get_pool() -> KernelPool:
+    "Return the pool that manages the kernels loaded by planetarypy."
+    global _pool
+    if _pool is None:
+        _pool = KernelPool()
+    return _pool
+
+
+def _catalog_downloads(urls, paths):
+    "Add kernels fetched through the store to the catalog, with their URLs."
+    store = get_store()
+    sha256 = {}
+    for url, path in zip(urls, paths):
+        blob = store.lookup(url)
+        # blobs are named by their hash, so linked files needn't be hashed
+        if blob is not None and blob.samefile(path):
+            sha256[path] = blob.name
+    get_catalog().add(paths, sha256=sha256, urls=dict(zip(paths, urls)))
+
 
 ## Validation helpers
 def is_start_valid(mission: str, start: Time) -> bool:
@@ -72,7 +284,7 @@ def is_start_valid(mission: str, start: Time) -> bool:
     start : astropy.Time
         Start time in astropy.Time format.
     """
-    return Time(datasets.at[mission, "Start Time"]) <= start
+    return Time(get_datasets().at[mission, "Start Time"]) <= start
 
 
 def is_stop_valid(mission: str, stop: Time) -> bool:
@@ -86,14 +298,22 @@ def is_stop_valid(mission: str, stop: Time) -> bool:
     start : astropy.Time
         Start time in astropy.Time format.
     """
-    return Time(datasets.at[mission, "Stop Time"]) >= stop
+    return Time(get_datasets().at[mission, "Stop Time"]) >= stop
 
 
 def download_one_url(url, local_path, overwrite: bool = False):
     if local_path.exists() and not overwrite:
         return
-    local_path.parent.mkdir(exist_ok=True, parents=True)
-    url_retrieve(url, local_path)
+    get_store().fetch(url, local_path, overwrite=overwrite)
+    _catalog_downloads([url], [local_path])
+
+
+def _to_time(value) -> Time:
+    "Convert ISO or yyyy-jjj time strings (or Time-compatible objects) to Time."
+    try:
+        return Time(value)
+    except ValueError:
+        return Time(fromdoyformat(value).isoformat())
 
 
 class Subsetter:
@@ -114,13 +334,28 @@ class Subsetter:
 
     """
 
-    def __init__(self, mission: str, start: str, stop=None, save_location=None):
+    def __init__(
+        self,
+        mission: str,
+        start: str,
+        stop=None,
+        save_location=None,
+        offline: bool = False,
+        cache: bool = True,
+        refresh: bool = False,
+    ):
         """
         Initialize the Subsetter object.
 
         This means that the object at initialization (via internal method below) receives all required
         metadata to query infos, but doesn't do downloading automatically.
 
+        The kernel list and metakernel returned by NAIF are cached in
+        `SUBSET_CACHE` per dataset and time window, so the server is only asked
+        again when the cached response is older than `SUBSET_TTL`, or
+        `SUBSET_RECENT_TTL` for windows that ended recently.  If the server
+        can't be reached, an expired response is used.
+
         Parameters
         ----------
         mission : str
@@ -131,27 +366,100 @@ class Subsetter:
             Stop time in either ISO or yyyy-jjj format. Defaults to None.
         save_location : str, optional
             Overwrite default storing in planetarypy archive. Defaults to None.
+        offline : bool, optional
+            Only use cached NAIF responses, raising an error if the time window
+            isn't cached. Defaults to False.
+        cache : bool, optional
+            Use and store cached NAIF responses. Defaults to True.
+        refresh : bool, optional
+            Ask the server, even if the cached response didn't expire yet.
+            Defaults to False.
         """
         self.mission = mission
         self.start = start
         self.stop = stop
         self.save_location = save_location
+        self.offline = offline
+        self.cache = cache
+        self.refresh = refresh
         self._initialize()
 
+    @property
+    def cache_path(self) -> Path:
+        "Path of the cached NAIF response for this dataset and time window."
+        p = self.payload
+        key = "|".join([p["dataset"], p["start"], p["stop"]])
+        return _subset_cache() / f"{hashlib.sha1(key.encode()).hexdigest()}.json"
+
+    @property
+    def cache_ttl(self) -> timedelta:
+        "Age after which the cached NAIF response for this time window expires."
+        if (Time.now() - self.stop).to_datetime() < SUBSET_RECENT:
+            return SUBSET_RECENT_TTL
+        return SUBSET_TTL
+
+    def _expired(self) -> bool:
+        "Whether the cached NAIF response is older than `cache_ttl`."
+        age = time.time() - self.cache_path.stat().st_mtime
+        return age > self.cache_ttl.total_seconds()
+
     def _initialize(self):
-        "get metadata via self.r and unpack it."
-        r = self.r
-        if r.ok:
-            z = zipfile.ZipFile(BytesIO(r.content))
+        "get metadata via self.r, or from the cache, and unpack it."
+        cache_path = self.cache_path
+        cached = (self.cache or self.offline) and cache_path.exists()
+        if cached and (self.offline or not (self.refresh or self._expired())):
+            subset = json.loads(cache_path.read_text())
+        elif self.offline:
+            raise IOError(
+                f"No cached kernel list for {self.mission} from {self.start.iso} "
+                f"to {self.stop.iso} available in offline mode."
+            )
         else:
-            raise IOError("SPICE Server request returned status code: {r.status_code}")
-        self.z = z
+            try:
+                subset = self._fetch_subset()
+            except Exception as e:
+                if not cached:
+                    raise
+                logger.warning(
+                    "Using the cached kernel list for %s from %s to %s: %s",
+                    self.mission,
+                    self.start.iso,
+                    self.stop.iso,
+                    e,
+                )
+                subset = json.loads(cache_path.read_text())
+            else:
+                if self.cache:
+                    cache_path.parent.mkdir(exist_ok=True, parents=True)
+                    tmpfile = cache_path.with_name(
+                        f"{cache_path.name}.{os.getpid()}.tmp"
+                    )
+                    tmpfile.write_text(json.dumps(subset, indent=1))
+                    os.replace(tmpfile, cache_path)
+        self.urls_file = subset["urls_file"]
+        self.metakernel_file = subset["metakernel_file"]
+        self.metakernel_text = subset["metakernel"]
+        self.kernel_urls = subset["urls"].split()
+
+    def _fetch_subset(self) -> dict:
+        "Request the subset zip file from NAIF and extract what's needed of it."
+        with self.r as r:
+            if not r.ok:
+                raise IOError(
+                    f"SPICE Server request returned status code: {r.status_code}"
+                )
+            z = zipfile.ZipFile(BytesIO(r.content))
         # these files only exist "virtually" in the zip object, but are needed to
         # extract them:
-        self.urls_file = [n for n in z.namelist() if n.startswith("urls_")][0]
-        self.metakernel_file = [n for n in z.namelist() if n.lower().endswith(".tm")][0]
-        with self.z.open(self.urls_file) as f:
-            self.kernel_urls = f.read().decode().split()
+        urls_file = [n for n in z.namelist() if n.startswith("urls_")][0]
+        metakernel_file = [n for n in z.namelist() if n.lower().endswith(".tm")][0]
+        return dict(
+            **self.payload,
+            urls_file=urls_file,
+            urls=z.read(urls_file).decode(),
+            metakernel_file=metakernel_file,
+            metakernel=z.read(metakernel_file).decode(),
+        )
 
     @property
     def r(self):
@@ -159,7 +467,7 @@ class Subsetter:
 
         It uses the property `payload` to create the required request's parameters.
         """
-        return requests.get(BASE_URL, params=self.payload, stream=True)
+        return get_session().get(str(BASE_URL), params=self.payload, stream=True)
 
     @property
     def start(self):
@@ -167,10 +475,7 @@ class Subsetter:
 
     @start.setter
     def start(self, value):
-        try:
-            self._start = Time(value)
-        except ValueError:
-            self._start = Time(fromdoyformat(value).isoformat())
+        self._start = _to_time(value)
 
     @property
     def stop(self):
@@ -181,10 +486,7 @@ class Subsetter:
         if not value:
             self._stop = self.start + timedelta(days=1)
         else:
-            try:
-                self._stop = Time(value)
-            except ValueError:
-                self._stop = Time(fromdoyformat(value).isoformat())
+            self._stop = _to_time(value)
 
     @property
     def payload(self):
@@ -202,7 +504,7 @@ class Subsetter:
                 "One of start/stop is outside the supported date-range. See `datasets`."
             )
         p = {
-            "dataset": datasets.loc[self.mission, "path"],
+            "dataset": get_datasets().loc[self.mission, "path"],
             "start": self.start.iso,
             "stop": self.stop.iso,
             "action": "Subset",
@@ -229,23 +531,32 @@ class Subsetter:
         """
         u = URL(url)
         basepath = (
-            KERNEL_STORAGE / self.mission
+            get_kernel_storage() / self.mission
             if not self.save_location
             else self.save_location
         )
         return basepath / u.parent.name / u.name
 
     def _non_blocking_download(self, overwrite: bool = False):
-        "Use multiprocessing for parallel download."
+        "Download the kernels concurrently with asyncio."
         paths = [self.get_local_path(url) for url in self.kernel_urls]
-        args = zip(self.kernel_urls, paths, repeat(overwrite))
-        _ = process_map(download_one_url, args, max_workers=cpu_count() - 2, 
-                       desc="Kernels downloaded")
+        download_urls(
+            self.kernel_urls,
+            paths,
+            overwrite=overwrite,
+            desc="Kernels downloaded",
+            retrieve=partial(get_store().fetch, overwrite=overwrite),
+        )
 
     def _concurrent_download(self, overwrite: bool = False):
         paths = [self.get_local_path(url) for url in self.kernel_urls]
-        args = zip(self.kernel_urls, paths, repeat(overwrite))
-        _ = process_map(download_one_url, args, max_workers=cpu_count() - 2)
+        download_urls(
+            self.kernel_urls,
+            paths,
+            overwrite=overwrite,
+            progress=False,
+            retrieve=partial(get_store().fetch, overwrite=overwrite),
+        )
 
     def download_kernels(
         self,
@@ -256,27 +567,48 @@ class Subsetter:
         """
         Download SPICE kernels.
 
+        Kernels are fetched through the kernel store (see `get_store`), so a
+        kernel that was downloaded before for another mission or location is
+        linked instead of downloaded again.
+
         Parameters
         ----------
         overwrite : bool, optional
             Overwrite existing kernels. Defaults to False.
         non_blocking : bool, optional
-            Use Dask client for parallel download. Defaults to False.
+            Download the kernels concurrently. Defaults to False.
         quiet : bool, optional
             Suppress name and path of downloaded kernels. Defaults to False.
 
+        In offline mode, only checks that all kernels are available locally.
+        The kernels are added to the kernel catalog (see `get_catalog`).
         """
-        if non_blocking:
-            return self._non_blocking_download(overwrite)
-        # sequential download
-        for url in tqdm(self.kernel_urls, desc="Kernels downloaded"):
-            local_path = self.get_local_path(url)
-            if local_path.exists() and not overwrite:
-                if not quiet:
-                    print(local_path.parent.name, local_path.name, "locally available.")
-                continue
-            local_path.parent.mkdir(exist_ok=True, parents=True)
-            url_retrieve(url, local_path)
+        if self.offline:
+            missing = [
+                url for url in self.kernel_urls if not self.get_local_path(url).exists()
+            ]
+            if missing:
+                raise IOError(
+                    f"{len(missing)} kernels are not available locally in offline "
+                    f"mode, e.g. {missing[0]}"
+                )
+        elif non_blocking:
+            self._non_blocking_download(overwrite)
+        else:
+            # sequential download
+            for url in tqdm(self.kernel_urls, desc="Kernels downloaded"):
+                local_path = self.get_local_path(url)
+                if local_path.exists() and not overwrite:
+                    if not quiet:
+                        print(
+                            local_path.parent.name,
+                            local_path.name,
+                            "locally available.",
+                        )
+                    continue
+                get_store().fetch(url, local_path, overwrite=overwrite)
+        paths = [self.get_local_path(url) for url in self.kernel_urls]
+        _catalog_downloads(self.kernel_urls, paths)
 
     def get_metakernel(self) -> Path:
         """
@@ -286,16 +618,13 @@ class Subsetter:
         Uses self.save_location if given, otherwise `planetarypy` archive.
         """
         basepath = (
-            KERNEL_STORAGE / self.mission
+            get_kernel_storage() / self.mission
             if not self.save_location
             else self.save_location
         )
         savepath = basepath / self.metakernel_file
-        with open(savepath, "w") as outfile, self.z.open(
-            self.metakernel_file
-        ) as infile:
-            for line in infile:
-                linestr = line.decode()
+        with open(savepath, "w") as outfile:
+            for linestr in self.metakernel_text.splitlines(keepends=True):
                 if "'./data'" in linestr:
                     linestr = linestr.replace("'./data'", f"'{savepath.parent}'")
                 outfile.write(linestr)
@@ -303,7 +632,13 @@ class Subsetter:
 
 
 def get_metakernel_and_files(
-    mission: str, start: str, stop: str, save_location: str = None, quiet: bool = False
+    mission: str,
+    start: str,
+    stop: str,
+    save_location: str = None,
+    quiet: bool = False,
+    offline: bool = False,
+    refresh: bool = False,
 ) -> Path:
     """
     For a given mission and start/stop times, download the kernels and get metakernel path.
@@ -320,14 +655,40 @@ def get_metakernel_and_files(
         Overwrite default storing in planetarypy archive. Defaults to None.
     quiet : bool, optional
         Suppress download feedback. Defaults to False.
+    offline : bool, optional
+        Only use the cached kernel list and local kernels. If the kernel list
+        isn't cached or kernels are missing, the metakernel is synthesized from
+        the local kernels with `synthesize_metakernel`. Defaults to False.
+    refresh : bool, optional
+        Ask NAIF for the kernel list, even if the cached one didn't expire yet.
+        Defaults to False.
+
+    A summary of the downloads (`planetarypy.utils.TransferLog.report`) is
+    logged at INFO level.
     """
 
-    subset = Subsetter(mission, start, stop, save_location)
-    subset.download_kernels(non_blocking=True, quiet=quiet)
+    if offline:
+        try:
+            subset = Subsetter(mission, start, stop, save_location, offline=True)
+            subset.download_kernels(quiet=quiet)
+        except IOError as e:
+            logger.info("Using a metakernel of the local kernels: %s", e)
+            return synthesize_metakernel(mission, start, stop, save_location)
+        return subset.get_metakernel()
+    subset = Subsetter(mission, start, stop, save_location, refresh=refresh)
+    with record_transfers() as transfers:
+        subset.download_kernels(non_blocking=True, quiet=quiet)
+    logger.info("%s kernels for %s - %s: %s", mission, start, stop, transfers.report())
     return subset.get_metakernel()
 
 
-def list_kernels_for_day(mission: str, start: str, stop: str = "") -> list:
+def list_kernels_for_day(
+    mission: str,
+    start: str,
+    stop: str = "",
+    offline: bool = False,
+    refresh: bool = False,
+) -> list:
     """
     List all kernels for a given time range of a mission.
 
@@ -339,16 +700,193 @@ def list_kernels_for_day(mission: str, start: str, stop: str = "") -> list:
         Start time in either ISO or yyyy-jjj format.
     stop : str, optional
         Stop time in either ISO or yyyy-jjj format. Defaults to None.
+    offline : bool, optional
+        Only use the cached kernel list. Defaults to False.
+    refresh : bool, optional
+        Ask NAIF for the kernel list, even if the cached one didn't expire yet.
+        Defaults to False.
     """
-    subset = Subsetter(mission, start, stop)
+    subset = Subsetter(mission, start, stop, offline=offline, refresh=refresh)
     return subset.kernel_names
 
 
+def merge_windows(
+    windows, tolerance: timedelta = timedelta(0), max_span: timedelta = None
+) -> list:
+    """
+    Merge overlapping time windows, and those closer than `tolerance`.
+
+    Windows are only merged while the merged window is at most `max_span`
+    long, but windows longer than that on their own are kept.
+
+    Parameters
+    ----------
+    windows : list of (start, stop) tuples
+        Times in any format supported by `Subsetter`.
+    tolerance : timedelta, optional
+        Maximum gap between windows that are merged. Defaults to 0.
+    max_span : timedelta, optional
+        Maximum length of merged windows. Defaults to no limit.
+
+    Returns
+    -------
+    list of (Time, Time, list of int)
+        Start and stop of the merged windows, with the indices of the input
+        windows they contain.
+    """
+    parsed = []
+    for i, (start, stop) in enumerate(windows):
+        start = _to_time(start)
+        stop = _to_time(stop) if stop else start + timedelta(days=1)
+        parsed.append((start, stop, i))
+    parsed.sort(key=lambda window: window[0])
+    merged = []
+    for start, stop, i in parsed:
+        if (
+            merged
+            and start <= merged[-1][1] + tolerance
+            and (
+                max_span is None
+                or (max(merged[-1][1], stop) - merged[-1][0]).to_datetime()
+                <= max_span
+            )
+        ):
+            merged[-1][1] = max(merged[-1][1], stop)
+            merged[-1][2].append(i)
+        else:
+            merged.append([start, stop, [i]])
+    return [tuple(window) for window in merged]
+
+
+def plan_subsets(
+    mission: str,
+    windows,
+    tolerance: timedelta = timedelta(days=1),
+    max_span: timedelta = timedelta(days=7),
+    max_workers: int = 4,
+    **kwargs,
+) -> dict:
+    """
+    Get the kernel lists for many time windows with few NAIF requests.
+
+    Windows that overlap or are less than `tolerance` apart are merged into
+    windows of up to `max_span`, and the subsets of the merged windows are
+    requested concurrently.  The limit keeps NAIF from being asked for the
+    kernels of years at once when the windows are e.g. consecutive days.
+
+    Parameters
+    ----------
+    mission : str
+        Mission shorthand in datasets dataframe.
+    windows : list of (start, stop) tuples
+        Start and stop times in either ISO or yyyy-jjj format.
+    tolerance : timedelta, optional
+        Maximum gap between windows that are merged. Defaults to 1 day.
+    max_span : timedelta, optional
+        Maximum length of merged windows, or None for no limit. Defaults to
+        7 days.
+    max_workers : int, optional
+        Number of concurrent requests. Defaults to 4.
+    **kwargs
+        Passed on to `Subsetter`, e.g. `save_location`, `offline` or `refresh`.
+
+    Returns
+    -------
+    dict
+        Maps each input window to the `Subsetter` of the merged window that
+        contains it.
+    """
+    windows = [tuple(window) for window in windows]
+    merged = merge_windows(windows, tolerance, max_span)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        subsets = list(
+            executor.map(
+                lambda window: Subsetter(mission, window[0], window[1], **kwargs),
+                merged,
+            )
+        )
+    return {
+        windows[i]: subset
+        for (_, _, indices), subset in zip(merged, subsets)
+        for i in indices
+    }
+
+
+def get_metakernels_and_files(
+    mission: str,
+    windows,
+    tolerance: timedelta = timedelta(days=1),
+    max_span: timedelta = timedelta(days=7),
+    save_location: str = None,
+    offline: bool = False,
+    refresh: bool = False,
+) -> dict:
+    """
+    Download the kernels for many time windows and get their metakernel paths.
+
+    Like `get_metakernel_and_files` for each window, but with the NAIF requests
+    planned by `plan_subsets` and every kernel downloaded only once.
+
+    Parameters
+    ----------
+    mission : str
+        Mission shorthand in datasets dataframe.
+    windows : list of (start, stop) tuples
+        Start and stop times in either ISO or yyyy-jjj format.
+    tolerance : timedelta, optional
+        Maximum gap between windows that are merged. Defaults to 1 day.
+    max_span : timedelta, optional
+        Maximum length of merged windows, or None for no limit. Defaults to
+        7 days.
+    save_location : str, optional
+        Overwrite default storing in planetarypy archive. Defaults to None.
+    offline : bool, optional
+        Only use the cached kernel lists and local kernels. Defaults to False.
+    refresh : bool, optional
+        Ask NAIF for the kernel lists, even if the cached ones didn't expire yet.
+        Defaults to False.
+
+    Returns
+    -------
+    dict
+        Maps each window to the path of its metakernel.
+    """
+    plan = plan_subsets(
+        mission,
+        windows,
+        tolerance,
+        max_span,
+        save_location=save_location,
+        offline=offline,
+        refresh=refresh,
+    )
+    subsets = list({id(subset): subset for subset in plan.values()}.values())
+    if not offline:
+        downloads = {}
+        for subset in subsets:
+            for url in subset.kernel_urls:
+                downloads.setdefault(url, subset.get_local_path(url))
+        with record_transfers() as transfers:
+            download_urls(
+                list(downloads),
+                list(downloads.values()),
+                desc="Kernels downloaded",
+                retrieve=get_store().fetch,
+            )
+        logger.info(
+            "%s kernels for %d windows: %s", mission, len(plan), transfers.report()
+        )
+    metakernels = {}
+    for subset in subsets:
+        # checks for local kernels in offline mode and updates the catalog
+        subset.download_kernels(non_blocking=True, quiet=True)
+        metakernels[id(subset)] = subset.get_metakernel()
+    return {window: metakernels[id(subset)] for window, subset in plan.items()}
+
+
 ## Generic kernel management
 # These are a few generic kernels that are required for basic illumination
 # calculations as supported by this package.
-GENERIC_STORAGE = KERNEL_STORAGE / "generic"
-GENERIC_STORAGE.mkdir(exist_ok=True, parents=True)
 GENERIC_URL = NAIF_URL / "pub/naif/generic_kernels/"
 
 generic_kernel_names = [
@@ -358,21 +896,43 @@ generic_kernel_names = [
     "spk/planets/de430.bsp",
     "spk/satellites/mar097.bsp",
 ]
-generic_kernel_paths = [GENERIC_STORAGE.joinpath(i) for i in generic_kernel_names]
+
+
+def _generic_storage() -> Path:
+    return _folder(get_kernel_storage() / "generic")
+
+
+def get_generic_kernel_paths() -> list[Path]:
+    """Return the local paths of the generic kernels.
+
+    Also available as `generic_kernel_paths`.
+    """
+    storage = _generic_storage()
+    return [storage.joinpath(i) for i in generic_kernel_names]
+
+
+_PATHS["GENERIC_STORAGE"] = _generic_storage
+_PATHS["generic_kernel_paths"] = get_generic_kernel_paths
 
 
 def download_generic_kernels(overwrite=False):
     "Download all kernels as required by generic_kernel_list."
     dl_urls = [GENERIC_URL / i for i in generic_kernel_names]
-    for dl_url, savepath in zip(dl_urls, generic_kernel_paths):
+    fetched = []
+    for dl_url, savepath in zip(dl_urls, get_generic_kernel_paths()):
         if savepath.exists() and not overwrite:
             print(
                 savepath.name,
                 "already downloaded. Use `overwrite=True` to download again.",
             )
             continue
-        savepath.parent.mkdir(exist_ok=True, parents=True)
-        url_retrieve(dl_url, savepath)
+        # planetary ephemerides like de430.bsp are large enough to benefit
+        get_store().fetch(
+            dl_url, savepath, retrieve=url_retrieve_segmented, overwrite=overwrite
+        )
+        fetched.append((dl_url, savepath))
+    if fetched:
+        _catalog_downloads(*zip(*fetched))
 
 
 def load_generic_kernels():
@@ -380,27 +940,226 @@ def load_generic_kernels():
 
     Loads pure planetary bodies meta-kernel without spacecraft data.
 
-    Downloads any missing generic kernels.
+    Downloads any missing generic kernels. The kernels are loaded with the
+    kernel pool (see `get_pool`), which holds a reference to them until they
+    are released with `get_pool().release(get_generic_kernel_paths())`.
     """
-    if any([not p.exists() for p in generic_kernel_paths]):
+    paths = get_generic_kernel_paths()
+    if any([not p.exists() for p in paths]):
         download_generic_kernels()
-    for kernel in generic_kernel_paths:
-        spice.furnsh(str(kernel))
+    get_pool().load(paths)
+
+
+def ensure_kernels():
+    """Load the generic kernels, unless they are loaded already.
+
+    Cheap enough to call before every geometry calculation, which is what
+    `planetarypy.spice.spicer.Spicer` does, so that nothing is loaded or
+    downloaded when just importing modules.
+    """
+    pool = get_pool()
+    # the pool checks SPICE, so kernels unloaded with spice.kclear() are missing
+    missing = [p for p in get_generic_kernel_paths() if p not in pool]
+    if not missing:
+        return
+    if any(not p.exists() for p in missing):
+        download_generic_kernels()
+    pool.load(missing)
+
+
+## Local metakernels
+# Loading order of the kernel types in synthesized metakernels. Kernels loaded
+# later take precedence, so the time-dependent data comes last.
+KERNEL_TYPE_ORDER = ["LSK", "PCK", "FK", "IK", "SCLK", "SPK", "CK", "DSK"]
+_KERNEL_SUFFIXES = {".tls", ".tpc", ".bpc", ".tf", ".ti", ".tsc", ".bsp", ".bc", ".bds"}
+
+
+def _kpl_string(value: str, width: int = 78) -> list:
+    """Quote `value` for a text kernel, split into continued strings if needed.
+
+    SPICE reads at most 80 characters per string, longer paths are continued
+    with a trailing "+" in the next string.
+    """
+    value = value.replace("'", "''")
+    chunks = [value[i : i + width] for i in range(0, len(value), width)] or [""]
+    return [f"'{chunk}+'" for chunk in chunks[:-1]] + [f"'{chunks[-1]}'"]
+
+
+def synthesize_metakernel(
+    mission: str,
+    start: str,
+    stop: str = None,
+    save_location: str = None,
+    generic: bool = True,
+) -> Path:
+    """
+    Write a metakernel for a time window from the locally available kernels.
+
+    Unlike `Subsetter.get_metakernel`, this doesn't need NAIF's metakernel, so
+    it works without network access. The local kernel files of the mission are
+    added to the kernel catalog (see `get_catalog`), and SPK and CK files are
+    only used if their coverage overlaps the time window. The kernels are
+    ordered by `KERNEL_TYPE_ORDER`, and by file name within each type.
+
+    Parameters
+    ----------
+    mission : str
+        Mission shorthand in datasets dataframe.
+    start : str
+        Start time in either ISO or yyyy-jjj format.
+    stop : str, optional
+        Stop time in either ISO or yyyy-jjj format. Defaults to one day after
+        `start`.
+    save_location : str, optional
+        Folder of the kernels and the metakernel. Defaults to the mission folder
+        in the planetarypy archive.
+    generic : bool, optional
+        Include the generic kernels that are available locally, loaded before
+        the mission kernels of the same type. Defaults to True.
+
+    Returns
+    -------
+    Path
+        Path of the metakernel.
+    """
+    from .leapseconds import utc2et
+
+    start = _to_time(start)
+    stop = _to_time(stop) if stop else start + timedelta(days=1)
+    basepath = Path(save_location) if save_location else get_kernel_storage() / mission
+    files = sorted(
+        p for p in basepath.rglob("*") if p.suffix.lower() in _KERNEL_SUFFIXES
+    )
+    generic_files = (
+        [p for p in get_generic_kernel_paths() if p.exists()] if generic else []
+    )
+    # the catalog has resolved paths, the metakernel gets the original ones
+    local = {p.resolve(): p for p in generic_files + files}
+    catalog = get_catalog()
+    catalog.add(local)
+    types = catalog.kernels().set_index("path")["type"]
+    by_type = {kernel_type: [] for kernel_type in KERNEL_TYPE_ORDER}
+    for resolved, path in local.items():
+        kernel_type = types.get(str(resolved))
+        if kernel_type in by_type:
+            by_type[kernel_type].append(path)
+        else:
+            logger.warning(
+                "Leaving %s of unknown kernel type %s out of the metakernel.",
+                path,
+                kernel_type,
+            )
+    if not by_type["LSK"]:
+        raise IOError(f"No leapseconds kernel available locally for {mission}.")
+    et = utc2et([start.isot, stop.isot], lsk=by_type["LSK"][-1])
+    covering = set(catalog.overlapping(et[0], et[1]))
+    kernels = []
+    for kernel_type, paths in by_type.items():
+        if kernel_type in ("SPK", "CK"):
+            paths = [p for p in paths if p.resolve() in covering]
+        kernels += sorted(paths, key=lambda p: (p not in generic_files, p.name))
+
+    symbols = {"KERNELS": basepath}
+    if generic_files:
+        symbols["GENERIC"] = _generic_storage()
+    entries = []
+    for path in kernels:
+        for symbol, root in symbols.items():
+            if path.is_relative_to(root):
+                path = f"${symbol}/{path.relative_to(root).as_posix()}"
+                break
+        entries += _kpl_string(str(path))
+    # text kernel lines are limited to 132 characters, so one string per line
+    values = [s for root in symbols.values() for s in _kpl_string(str(root))]
+    lines = [
+        "KPL/MK",
+        "",
+        f"   Metakernel for {mission} from {start.isot} to {stop.isot},",
+        "   synthesized by planetarypy from the locally available kernels.",
+        "",
+        "\\begindata",
+        "",
+        "   PATH_VALUES = (",
+        *(f"      {value}" for value in values),
+        "   )",
+        "   PATH_SYMBOLS = (",
+        *(f"      '{symbol}'" for symbol in symbols),
+        "   )",
+        "   KERNELS_TO_LOAD = (",
+        *(f"      {entry}" for entry in entries),
+        "   )",
+        "",
+        "\\begintext",
+        "",
+    ]
+    savepath = basepath / (
+        f"{mission}_{start.strftime('%Y%m%d')}_{stop.strftime('%Y%m%d')}_local.tm"
+    )
+    savepath.parent.mkdir(exist_ok=True, parents=True)
+    savepath.write_text("\n".join(lines))
+    return savepath
+
+
+## Integrity
+def verify_kernels(
+    repair: bool = True, rehash: bool = False, max_workers: int = None
+) -> pd.DataFrame:
+    """
+    Check the downloaded kernels for missing or corrupt files, and repair them.
+
+    The kernel catalog (see `get_catalog`) records the size, modification time
+    and hash of the kernels, and the URL of downloaded ones.  Only files whose
+    modification time changed are hashed again (see `KernelCatalog.verify`).
+
+    Parameters
+    ----------
+    repair : bool, optional
+        Download missing and corrupt files with a known URL again. Defaults to
+        True.
+    rehash : bool, optional
+        Hash all files, regardless of size and modification time.
+    max_workers : int, optional
+        Number of hashing threads. Defaults to the number of CPUs.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The catalog entries with a `status` column: "ok", "missing" or
+        "corrupt", or "repaired" for files that were downloaded again.
+    """
+    catalog = get_catalog()
+    df = catalog.verify(rehash=rehash, max_workers=max_workers)
+    bad = df[df.status != "ok"]
+    if bad.empty:
+        return df
+    logger.warning("%d kernels are missing or corrupt.", len(bad))
+    bad = bad[bad.url.notna()]
+    if not repair or bad.empty:
+        return df
+    store = get_store()
+    for path, url in zip(bad.path, bad.url):
+        Path(path).unlink(missing_ok=True)
+        store.discard(url)
+    download_urls(
+        list(bad.url),
+        list(bad.path),
+        desc="Kernels repaired",
+        retrieve=store.fetch,
+    )
+    _catalog_downloads(list(bad.url), list(bad.path))
+    check = catalog.verify(bad.path, rehash=True)
+    repaired = check.path[check.status == "ok"]
+    df.loc[df.path.isin(repaired), "status"] = "repaired"
+    return df
 
 
 def show_loaded_kernels():
-    "Print overview of loaded kernels."
-    count = spice.ktotal("all")
-    if count == 0:
+    """Print overview of loaded kernels.
+
+    Use `loaded_kernels` or `get_pool().loaded()` to get them as a DataFrame.
+    """
+    df = get_pool().loaded()
+    if df.empty:
         print("No kernels loaded at this time.")
     else:
-        print("The loaded files are:\n(paths relative to kernels.KERNEL_STORAGE)\n")
-    for which in range(count):
-        out = spice.kdata(which, "all", 100, 100, 100)
-        print("Position:", which)
-        p = Path(out[0])
-        print("Path", p.relative_to(KERNEL_STORAGE))
-        print("Type:", out[1])
-        print("Source:", out[2])
-        print("Handle:", out[3])
-        # print("Found:", out[4])
+        print(df.to_string())
@@ -0,0 +1,227 @@
+"""Leap-second aware UTC <-> ET conversion for whole arrays of times.
+
+SPICE converts UTC to ephemeris time (ET, TDB seconds past J2000) with the
+model parameters of a leapseconds kernel (LSK).  Calling `spiceypy.utc2et` for
+every time step of a batch computation means one round-trip through CSPICE per
+value, so this module parses the LSK once and evaluates the same model with
+NumPy:
+
+    ET - UTC = DELTA_T_A + DELTA_AT + K * sin(E)
+    E = M + EB * sin(M)
+    M = M0 + M1 * TDT
+
+where DELTA_AT is the number of leap seconds in effect and TDT is terrestrial
+dynamical time (TAI + DELTA_T_A).  The results agree with SPICE's `str2et` and
+`et2utc` to well below a microsecond.
+"""
+
+__all__ = [
+    "J2000",
+    "LeapSeconds",
+    "load_lsk",
+    "utc2et",
+    "et2utc",
+]
+
+import re
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+J2000 = np.datetime64("2000-01-01T12:00:00", "ns")
+"""Reference epoch of SPICE's "UTC seconds past J2000"."""
+
+_NS_PER_SECOND = 1_000_000_000
+
+
+def _parse_lsk_data(text: str) -> dict:
+    """Return the raw variable assignments of the data blocks of a text kernel."""
+    data = []
+    in_data = False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("\\begindata"):
+            in_data = True
+        elif stripped.startswith("\\begintext"):
+            in_data = False
+        elif in_data:
+            data.append(line)
+    assignments = re.findall(
+        r"([\w/]+)\s*=\s*(\([^)]*\)|\S+)", "\n".join(data), flags=re.MULTILINE
+    )
+    return {name: value.strip("()").split() for name, value in assignments}
+
+
+def _to_float(value: str) -> float:
+    "Convert a kernel number, possibly with Fortran 'D' exponent, to float."
+    return float(value.upper().replace("D", "E"))
+
+
+class LeapSeconds:
+    """Model parameters and leap second table of a leapseconds kernel.
+
+    Parameters
+    ----------
+    delta_t_a : float
+        TDT - TAI in seconds (32.184).
+    k : float
+        Amplitude of the periodic TDB - TDT term.
+    eb : float
+        Eccentricity of the heliocentric Earth orbit.
+    m : tuple of float
+        M0 and M1 of the mean anomaly M = M0 + M1 * TDT.
+    leap_epochs : array of datetime64
+        UTC epochs at which the values of `delta_at` come into effect.
+    delta_at : array of int
+        TAI - UTC in seconds, starting at the corresponding `leap_epochs`.
+    """
+
+    def __init__(self, delta_t_a, k, eb, m, leap_epochs, delta_at):
+        self.delta_t_a = float(delta_t_a)
+        self.k = float(k)
+        self.eb = float(eb)
+        self.m0, self.m1 = (float(v) for v in m)
+        epochs = np.asarray(leap_epochs, dtype="datetime64[s]")
+        self.delta_at = np.asarray(delta_at, dtype=np.int64)
+        # leap epochs as UTC and TAI seconds past J2000
+        self._leap_utc = (epochs - J2000.astype("datetime64[s]")).astype(np.int64)
+        self._leap_tai = self._leap_utc + self.delta_at
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]):
+        """Read the DELTET variables from the leapseconds kernel at `path`."""
+        data = _parse_lsk_data(Path(path).read_text())
+        table = data["DELTET/DELTA_AT"]
+        epochs = [
+            datetime.strptime(date.lstrip("@").title(), "%Y-%b-%d")
+            for date in table[1::2]
+        ]
+        return cls(
+            delta_t_a=_to_float(data["DELTET/DELTA_T_A"][0]),
+            k=_to_float(data["DELTET/K"][0]),
+            eb=_to_float(data["DELTET/EB"][0]),
+            m=[_to_float(v) for v in data["DELTET/M"]],
+            leap_epochs=np.array(epochs, dtype="datetime64[s]"),
+            delta_at=[int(_to_float(v.rstrip(","))) for v in table[0::2]],
+        )
+
+    @property
+    def table(self) -> pd.DataFrame:
+        "The leap second table as DataFrame."
+        epochs = J2000.astype("datetime64[s]") + self._leap_utc
+        return pd.DataFrame({"epoch": epochs, "delta_at": self.delta_at})
+
+    def _delta_at(self, i):
+        "Return TAI - UTC for indices `i` into the leap second table."
+        # like SPICE, use one second less than the first entry before it
+        delta_at = self.delta_at[np.clip(i, 0, None)]
+        return np.where(i < 0, self.delta_at[0] - 1, delta_at)
+
+    def _periodic(self, tdt):
+        "Return TDB - TDT for terrestrial dynamical times `tdt`."
+        m = self.m0 + self.m1 * tdt
+        return self.k * np.sin(m + self.eb * np.sin(m))
+
+    def utc2et(self, times) -> np.ndarray:
+        """Convert UTC `times` to ephemeris times.
+
+        Parameters
+        ----------
+        times : datetime64 array-like, DatetimeIndex, or str
+            UTC times.  Timezone-aware input is converted to UTC first.
+
+        Returns
+        -------
+        np.ndarray
+            TDB seconds past J2000 as float64.
+        """
+        index = pd.DatetimeIndex(np.atleast_1d(times))
+        if index.tz is not None:
+            index = index.tz_convert(None)
+        ns = index.to_numpy(dtype="datetime64[ns]") - J2000
+        ns = ns.astype(np.int64)
+        seconds, fraction = np.divmod(ns, _NS_PER_SECOND)
+        i = np.searchsorted(self._leap_utc, seconds, side="right") - 1
+        tdt = seconds + self._delta_at(i) + self.delta_t_a
+        tdt = tdt + fraction / _NS_PER_SECOND
+        et = tdt + self._periodic(tdt)
+        et[index.isna()] = np.nan
+        return et
+
+    def et2utc(self, et) -> pd.DatetimeIndex:
+        """Convert ephemeris times `et` to UTC.
+
+        Times within a leap second map onto the first second after it, as
+        datetime64 values can't represent 23:59:60.
+
+        Parameters
+        ----------
+        et : float array-like
+            TDB seconds past J2000.
+
+        Returns
+        -------
+        pd.DatetimeIndex
+            Naive UTC times of dtype datetime64[ns].
+        """
+        et = np.atleast_1d(np.asarray(et, dtype=np.float64))
+        tdt = et.copy()
+        for _ in range(3):
+            tdt = et - self._periodic(tdt)
+        tai = tdt - self.delta_t_a
+        i = np.searchsorted(self._leap_tai, np.floor(tai), side="right") - 1
+        utc = tai - self._delta_at(i)
+        valid = np.isfinite(utc)
+        utc = np.where(valid, utc, 0)
+        seconds = np.floor(utc)
+        fraction = np.round((utc - seconds) * _NS_PER_SECOND).astype(np.int64)
+        ns = seconds.astype(np.int64) * _NS_PER_SECOND + fraction
+        values = J2000 + ns.astype("timedelta64[ns]")
+        values[~valid] = np.datetime64("NaT")
+        return pd.DatetimeIndex(values)
+
+
+@lru_cache()
+def load_lsk(path: Union[str, Path, None] = None) -> LeapSeconds:
+    """Load and cache the leapseconds kernel at `path`.
+
+    By default, the generic LSK of `planetarypy.spice.kernels` is used and
+    downloaded if it's not available yet.
+    """
+    if path is None:
+        from .kernels import download_generic_kernels, get_generic_kernel_paths
+
+        path = get_generic_kernel_paths()[0]
+        if not path.exists():
+            download_generic_kernels()
+    return LeapSeconds.from_file(path)
+
+
+def utc2et(times, lsk: Union[str, Path, None] = None) -> np.ndarray:
+    """Convert UTC `times` to ephemeris times (TDB seconds past J2000).
+
+    Parameters
+    ----------
+    times : datetime64 array-like, DatetimeIndex, or str
+        UTC times.
+    lsk : str or Path, optional
+        Leapseconds kernel to use. Defaults to the generic LSK.
+    """
+    return load_lsk(lsk).utc2et(times)
+
+
+def et2utc(et, lsk: Union[str, Path, None] = None) -> pd.DatetimeIndex:
+    """Convert ephemeris times (TDB seconds past J2000) to UTC datetime64 values.
+
+    Parameters
+    ----------
+    et : float array-like
+        Ephemeris times.
+    lsk : str or Path, optional
+        Leapseconds kernel to use. Defaults to the generic LSK.
+    """
+    return load_lsk(lsk).et2utc(et)
@@ -0,0 +1,205 @@
+"""Reference-counted management of the loaded SPICE kernels.
+
+`spiceypy.furnsh` loads a kernel again every time it's called, and nothing
+unloads kernels that aren't needed anymore, so jobs that go through many
+metakernels either pay for reloading the same files or run into the limits of
+SPICE's kernel and file tables.  `KernelPool` keeps track of the kernels it
+loaded: a kernel that is loaded already is not loaded again, users hold a
+reference while they need a kernel, and kernels without references stay loaded
+until the pool exceeds its budget, when the least recently used ones are
+unloaded.
+"""
+
+__all__ = ["KernelPool", "loaded_kernels"]
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Union
+
+import pandas as pd
+import spiceypy as spice
+
+
+def loaded_kernels() -> pd.DataFrame:
+    """Return the kernels in the SPICE kernel pool.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per loaded file with its path, type, source (the metakernel it
+        was loaded with, or an empty string) and handle, in loading order.
+    """
+    rows = []
+    for i in range(spice.ktotal("ALL")):
+        path, kernel_type, source, handle = spice.kdata(i, "ALL")
+        rows.append((path, kernel_type, source, handle))
+    return pd.DataFrame(rows, columns=["path", "type", "source", "handle"])
+
+
+def _is_furnished(path: str) -> bool:
+    "Check if the kernel at `path` is loaded in the SPICE kernel pool."
+    with spice.no_found_check():
+        return spice.kinfo(path)[3]
+
+
+def _files_of(path: str) -> list:
+    "Return the files loaded with `path`: the file itself, or a metakernel's files."
+    files = [path]
+    for i in range(spice.ktotal("ALL")):
+        file, _, source, _ = spice.kdata(i, "ALL")
+        if source == path:
+            files.append(file)
+    return files
+
+
+class KernelPool:
+    """Load and unload SPICE kernels with reference counts and an LRU budget.
+
+    Parameters
+    ----------
+    max_files : int, optional
+        Maximum number of files (including the files loaded by metakernels)
+        kept loaded by the pool. Defaults to 1000, well below the 5000 files
+        that SPICE can handle.
+    max_bytes : int, optional
+        Maximum total size of the files kept loaded. Defaults to no limit.
+
+    Kernels that are referenced are never unloaded, so the budget can be
+    exceeded while they are in use. Kernels that were loaded outside of the
+    pool are not loaded again, and not unloaded by the pool. Kernels that were
+    unloaded outside of the pool, e.g. by `spice.kclear`, are loaded again.
+
+    Examples
+    --------
+    >>> pool = KernelPool(max_files=200)
+    >>> with pool.kernels(metakernel):
+    ...     spice.spkpos("SATURN", et, "J2000", "NONE", "CASSINI")
+    """
+
+    def __init__(self, max_files: int = 1000, max_bytes: int = None):
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        # path -> dict(refs, files, size, owned, last_used), least recent first
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, path):
+        "Check if the pool has loaded `path`, and it wasn't unloaded since."
+        return str(Path(path)) in self._entries and _is_furnished(str(Path(path)))
+
+    @property
+    def n_files(self) -> int:
+        "Number of files loaded by the pool."
+        return sum(len(entry["files"]) for entry in self._entries.values())
+
+    @property
+    def n_bytes(self) -> int:
+        "Total size of the files loaded by the pool."
+        return sum(entry["size"] for entry in self._entries.values())
+
+    def load(self, paths: Union[str, Path, Iterable[Union[str, Path]]]):
+        """Load kernels, or add a reference to them if they're loaded already.
+
+        Every `load` should be matched by a `release` of the same paths.
+
+        Parameters
+        ----------
+        paths : str or Path, or iterable of them
+            Kernel files or metakernels, loaded in the given order.
+        """
+        if isinstance(paths, (str, Path)):
+            paths = [paths]
+        with self._lock:
+            for path in map(str, map(Path, paths)):
+                entry = self._entries.get(path)
+                furnished = _is_furnished(path)
+                if entry is None or not furnished:
+                    # new, or unloaded behind the pool's back, e.g. by kclear
+                    if not furnished:
+                        spice.furnsh(path)
+                    files = _files_of(path)
+                    entry = dict(
+                        refs=entry["refs"] if entry else 0,
+                        files=files,
+                        size=sum(Path(f).stat().st_size for f in files),
+                        owned=not furnished,
+                    )
+                    self._entries[path] = entry
+                entry["refs"] += 1
+                entry["last_used"] = time.time()
+                self._entries.move_to_end(path)
+            self._evict()
+
+    def release(self, paths: Union[str, Path, Iterable[Union[str, Path]]]):
+        """Remove a reference to kernels, making them candidates for unloading.
+
+        Parameters
+        ----------
+        paths : str or Path, or iterable of them
+            Kernel files or metakernels given to `load` before.
+        """
+        if isinstance(paths, (str, Path)):
+            paths = [paths]
+        with self._lock:
+            for path in map(str, map(Path, paths)):
+                entry = self._entries.get(path)
+                if entry is None or not entry["refs"]:
+                    raise ValueError(f"{path} is not referenced in the pool.")
+                entry["refs"] -= 1
+            self._evict()
+
+    @contextmanager
+    def kernels(self, paths: Union[str, Path, Iterable[Union[str, Path]]]):
+        "Hold references to kernels within a with block."
+        paths = [paths] if isinstance(paths, (str, Path)) else list(paths)
+        self.load(paths)
+        try:
+            yield self
+        finally:
+            self.release(paths)
+
+    def _over_budget(self) -> bool:
+        return self.n_files > self.max_files or (
+            self.max_bytes is not None and self.n_bytes > self.max_bytes
+        )
+
+    def _evict(self):
+        "Unload unreferenced kernels, least recently used first, to fit the budget."
+        for path in [p for p, entry in self._entries.items() if not entry["refs"]]:
+            if not self._over_budget():
+                break
+            self._unload(path)
+
+    def _unload(self, path: str):
+        entry = self._entries.pop(path)
+        if entry["owned"]:
+            spice.unload(path)
+
+    def clear(self):
+        "Unload all kernels loaded by the pool, regardless of references."
+        with self._lock:
+            for path in list(self._entries):
+                self._unload(path)
+
+    def loaded(self) -> pd.DataFrame:
+        """Return the loaded kernels with the pool's bookkeeping.
+
+        Like `loaded_kernels`, with the columns `refs` and `last_used` of the
+        kernel (or its metakernel) in the pool, missing for kernels loaded
+        outside of the pool.
+        """
+        df = loaded_kernels()
+        with self._lock:
+            entries = dict(self._entries)
+        tracked = [entries.get(src or path) for path, src in zip(df.path, df.source)]
+        df["refs"] = [e["refs"] if e else None for e in tracked]
+        df["last_used"] = pd.to_datetime(
+            [e["last_used"] if e else None for e in tracked], unit="s"
+        )
+        return df
@@ -12,17 +12,9 @@ import dateutil.parser as tparser
 import numpy as np
 import spiceypy as spice
 from astropy import units as u
-from astropy.constants import L_sun
-from astropy.visualization import quantity_support
-from matplotlib import pyplot as plt
 from traitlets import Enum, Float, HasTraits, Unicode
 
-import planets
 from ..exceptions import MissingParameterError, SpiceError, SPointNotSetError
-from .kernels import load_generic_kernels
-
-
-load_generic_kernels()
 
 
 Radii = namedtuple("Radii", "a b c")
@@ -200,6 +192,10 @@ class Spicer(HasTraits):
     _ref_frame = Unicode()
 
     def __init__(self, body, time=None, tilt=0, aspect=0, tau=0.0):
+        # importing kernels pulls in pandas and astropy.time, so defer it
+        from .kernels import ensure_kernels
+
+        ensure_kernels()
         self._body = body
         if time is None:
             self.time = dt.datetime.now()
@@ -294,6 +290,8 @@ class Spicer(HasTraits):
     @property
     def solar_constant(self):
         "float : With global value L_s, solar constant at coordinates of body center."
+        from astropy.constants import L_sun
+
         dist = spice.vnorm(self.center_to_sun.value) * u.km
         return (L_sun / (2 * tau * (dist)**2)).to(u.W / u.m / u.m)
 
@@ -608,6 +606,8 @@ class Spicer(HasTraits):
         for lon in longitudes:
             self.set_spoint_by(lat=0, lon=lon)
             fluxes.append(self.F_flat.value)
+        from matplotlib import pyplot as plt
+
         plt.plot(longitudes, fluxes)
         plt.xlabel("Longitudes [deg]")
         plt.ylabel("Fluxes [W/m^2]")
@@ -693,13 +693,19 @@ class EarthSpicer(Spicer):
 class MoonSpicer(Spicer):
     target = "MOON"
     obs = Enum([None, "EARTH"])
-    constants = planets.Moon
 
     def __init__(self, time=None, obs=None, inst=None):
         super().__init__(self.target, time=time)
         self.obs = obs
         self.instrument = inst
 
+    @property
+    def constants(self):
+        "Physical constants of the Moon from the `planets` package."
+        import planets
+
+        return planets.Moon
+
     @property
     def albedo_var(self):
         # motivated by P. Hayne's heat1d code
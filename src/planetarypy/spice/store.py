@@ -0,0 +1,197 @@
+"""Content-addressed store of kernel files.
+
+The same generic and mission kernels are needed under several mission folders
+and `save_location`s.  Instead of downloading and storing them again for each
+place, the store keeps one copy of each distinct file (a "blob", named by its
+SHA256 hash) and links it into the requested locations.  A small SQLite index
+maps the URLs that were downloaded to their blobs, so a URL is only fetched
+once, and a file with known checksum is never fetched if its blob exists.
+"""
+
+__all__ = ["KernelStore"]
+
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Union
+
+from ..utils import _monitor_transfer, file_hash, logger, url_retrieve
+from ._sqlite import connect
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    sha256 TEXT,
+    size INTEGER,
+    added REAL
+);
+CREATE INDEX IF NOT EXISTS urls_sha256 ON urls (sha256);
+"""
+
+
+def _link(source: Path, dest: Path):
+    "Hardlink `source` to `dest`, falling back to a symlink, then to a copy."
+    if dest.exists() and dest.samefile(source):
+        # renaming onto a link of the same file would do nothing
+        return
+    tmp = dest.with_name(f"{dest.name}.{os.getpid()}.link")
+    tmp.unlink(missing_ok=True)
+    try:
+        os.link(source, tmp)
+    except OSError:
+        try:
+            os.symlink(source, tmp)
+        except OSError:
+            shutil.copy2(source, tmp)
+    # replace atomically, so that `dest` is never missing or partial
+    os.replace(tmp, dest)
+
+
+class KernelStore:
+    """Store of kernel files, deduplicated by content.
+
+    Parameters
+    ----------
+    root : str or Path
+        Folder of the store, created if needed. It should be on the same file
+        system as the kernel folders, so that files can be hardlinked.
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+        self.blobs = self.root / "blobs"
+        self.blobs.mkdir(exist_ok=True, parents=True)
+        self.index = self.root / "index.sqlite"
+        with self._connect() as con:
+            con.executescript(_SCHEMA)
+
+    def _connect(self):
+        return connect(self.index)
+
+    def blob_path(self, sha256: str) -> Path:
+        "Path of the blob with the given SHA256 hex digest."
+        return self.blobs / sha256[:2] / sha256
+
+    def lookup(self, url: str) -> Union[Path, None]:
+        "Return the blob of a previously fetched URL, or None."
+        with self._connect() as con:
+            row = con.execute(
+                "SELECT sha256 FROM urls WHERE url = ?", (str(url),)
+            ).fetchone()
+        if row is None:
+            return None
+        blob = self.blob_path(row[0])
+        return blob if blob.exists() else None
+
+    def add(
+        self, path: Union[str, Path], url: str = None, sha256: str = None
+    ) -> Path:
+        """Move a file into the store and link it back to where it was.
+
+        Parameters
+        ----------
+        path : str or Path
+            The file to add.
+        url : str, optional
+            URL the file was downloaded from, recorded for later lookups.
+        sha256 : str, optional
+            SHA256 hex digest of the file, calculated if not given.
+
+        Returns
+        -------
+        Path
+            The blob of the file.
+        """
+        path = Path(path)
+        sha256 = sha256.lower() if sha256 else file_hash(path)
+        blob = self.blob_path(sha256)
+        if not blob.exists():
+            blob.parent.mkdir(exist_ok=True)
+            tmp = blob.with_name(f"{blob.name}.{os.getpid()}.tmp")
+            try:
+                os.link(path, tmp)
+            except OSError:
+                # the store is on another file system
+                shutil.copy2(path, tmp)
+            os.replace(tmp, blob)
+        elif not blob.samefile(path):
+            logger.debug("%s is a duplicate of %s.", path.name, blob)
+        _link(blob, path)
+        if url is not None:
+            with self._connect() as con, con:
+                con.execute(
+                    "INSERT OR REPLACE INTO urls VALUES (?, ?, ?, ?)",
+                    (str(url), sha256, blob.stat().st_size, time.time()),
+                )
+        return blob
+
+    def fetch(
+        self,
+        url: str,
+        outfile: Union[str, Path],
+        checksum: str = None,
+        retrieve=url_retrieve,
+        overwrite: bool = False,
+        **kwargs,
+    ) -> bool:
+        """Provide the file at `url` as `outfile`, downloading it only if needed.
+
+        The store is checked for the URL and, if given, for the `checksum`
+        first. Otherwise, or with `overwrite`, the file is downloaded and added
+        to the store.  The blob of `url` (see `lookup`) is named by the SHA256
+        of the file, so callers don't need to hash it again.
+
+        Parameters
+        ----------
+        url : str
+            The URL of the file.
+        outfile : str or Path
+            Where the file is needed.
+        checksum : str, optional
+            SHA256 hex digest of the file, if known.
+        retrieve : callable
+            Download function with the signature of `url_retrieve`.
+        overwrite : bool, optional
+            Download the file again, even if the store has it or the server
+            reports it unchanged. Other links to the old blob keep it.
+        **kwargs
+            Passed on to `retrieve`.
+
+        Returns
+        -------
+        bool
+            True if the file was downloaded, False if the store had it or the
+            server reported `outfile` unchanged.
+        """
+        outfile = Path(outfile)
+        outfile.parent.mkdir(exist_ok=True, parents=True)
+        blob = None if overwrite else self.lookup(url)
+        if blob is None and checksum is not None and not overwrite:
+            blob = self.blob_path(checksum.lower())
+            if not blob.exists():
+                blob = None
+        if blob is not None:
+            # reported like an up-to-date download to the transfer hooks
+            with _monitor_transfer(url, outfile) as transfer:
+                transfer["cache_hit"] = True
+                _link(blob, outfile)
+            return False
+        if overwrite:
+            kwargs["conditional"] = False
+        downloaded = retrieve(url, outfile, checksum=checksum, **kwargs)
+        # a downloaded file was verified against the checksum already
+        self.add(outfile, url=url, sha256=checksum if downloaded else None)
+        return downloaded
+
+    def discard(self, url: str):
+        """Forget a URL, and delete its blob if the blob is corrupt.
+
+        Used to repair files: the next `fetch` of the URL downloads it again.
+        """
+        blob = self.lookup(url)
+        with self._connect() as con, con:
+            con.execute("DELETE FROM urls WHERE url = ?", (str(url),))
+        if blob is not None and file_hash(blob) != blob.name:
+            logger.warning("Deleting corrupt blob %s.", blob)
+            blob.unlink()
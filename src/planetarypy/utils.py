@@ -3,28 +3,62 @@
 __all__ = [
     "logger",
     "replace_all_doy_times",
+    "configure_session",
+    "get_session",
     "parse_http_date",
     "get_remote_timestamp",
     "check_url_exists",
+    "DEFAULT_CHUNK_SIZE",
+    "file_hash",
+    "TransferEvent",
+    "TransferLog",
+    "add_transfer_hook",
+    "remove_transfer_hook",
+    "record_transfers",
+    "HTTP_CACHE_FILE",
+    "get_http_metadata",
+    "clear_http_cache",
     "url_retrieve",
+    "SEGMENTED_MIN_SIZE",
+    "url_retrieve_segmented",
+    "download_urls",
+    "download_urls_async",
     "have_internet",
     "file_variations",
 ]
 
+import asyncio
 import datetime as dt
 import email.utils as eut
+import hashlib
 import http.client as httplib
+import json
 import logging
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Union
-from urllib.request import urlopen
+from typing import Iterable, List, Union
+from urllib.parse import urlsplit
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 from tqdm.auto import tqdm
+from urllib3.util.retry import Retry
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+import numpy as np
 import pandas as pd
-from planetarypy.datetime import fromdoyformat
+from planetarypy.datetime import fromdoyformat_array
 
 logger = logging.getLogger(__name__)
 
@@ -35,13 +69,121 @@ def replace_all_doy_times(df: pd.DataFrame, timecol: str = "TIME"):
 
     All columns with timecol in the name will be converted and changes will be
     implemented on incoming dataframe in place (no returned dataframe)!
+
+    Each column is converted in one vectorized pass that parses its repeated
+    time strings only once. Columns are converted separately, so that a column
+    with UTC offsets can be next to one without. Dask DataFrames are supported
+    as well; there the conversion is added to the task graph and runs in
+    parallel per partition.
     """
+    cols = [col for col in df.columns if timecol in col]
+    if not cols:
+        return
+    if _is_dask_dataframe(df):
+        for col in cols:
+            df[col] = df[col].map_partitions(
+                fromdoyformat_array, meta=(col, "datetime64[ns]")
+            )
+        return
+    for col in cols:
+        df[col] = fromdoyformat_array(df[col])
+
 
-    for col in [col for col in df.columns if timecol in col]:
-        df[col] = df[col].map(fromdoyformat)
+def _is_dask_dataframe(df) -> bool:
+    """Check for a dask DataFrame without importing dask if it's not in use."""
+    dd = sys.modules.get("dask.dataframe")
+    return dd is not None and isinstance(df, dd.DataFrame)
 
 
 # Network and file handling
+# All network helpers share one pooled requests.Session per process, so that
+# downloading many files from the same server reuses its connections.
+_session_options = dict(
+    retries=5,
+    backoff_factor=0.5,
+    pool_connections=10,
+    pool_maxsize=16,
+    timeout=(10, 60),
+)
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+class _TimeoutHTTPAdapter(HTTPAdapter):
+    "HTTPAdapter applying a default timeout to all requests."
+
+    def __init__(self, timeout=None, **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def configure_session(**options):
+    """
+    Change the settings of the shared HTTP session.
+
+    The session is recreated with the new settings on next use.
+
+    Parameters
+    ----------
+    retries : int
+        Number of retries for failed connections and retryable status codes
+        (429, 500, 502, 503, 504).
+    backoff_factor : float
+        Retries wait `backoff_factor * 2 ** (retry - 1)` seconds.
+    pool_connections : int
+        Number of hosts to keep connection pools for.
+    pool_maxsize : int
+        Maximum number of connections kept alive per host.
+    timeout : float or tuple
+        Default (connect, read) timeout in seconds.
+    """
+    global _session
+    unknown = set(options) - set(_session_options)
+    if unknown:
+        raise TypeError(f"Unknown session options: {', '.join(sorted(unknown))}")
+    with _session_lock:
+        _session_options.update(options)
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def get_session() -> requests.Session:
+    """
+    Return the shared HTTP session with connection pooling and retries.
+
+    Each process gets its own session, so it's safe to use after forking.
+    """
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            retry = Retry(
+                total=_session_options["retries"],
+                backoff_factor=_session_options["backoff_factor"],
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=("HEAD", "GET"),
+                raise_on_status=False,
+            )
+            adapter = _TimeoutHTTPAdapter(
+                timeout=_session_options["timeout"],
+                max_retries=retry,
+                pool_connections=_session_options["pool_connections"],
+                pool_maxsize=_session_options["pool_maxsize"],
+            )
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+            _session_pid = os.getpid()
+        return _session
+
+
 def parse_http_date(http_date: str) -> dt.datetime:
     """Parse date string retrieved via urllib.request."""
     return dt.datetime(*eut.parsedate(http_date)[:6])
@@ -53,24 +195,314 @@ def get_remote_timestamp(url: str) -> dt.datetime:
 
     Useful for checking if there's an updated file available.
     """
-    with urlopen(str(url), timeout=10) as conn:
-        t = parse_http_date(conn.headers["last-modified"])
-    return t
+    response = get_session().head(str(url), allow_redirects=True)
+    response.raise_for_status()
+    return parse_http_date(response.headers["last-modified"])
 
 
 def check_url_exists(url):
     """Check if a URL exists."""
-    response = requests.head(url)
+    response = get_session().head(str(url))
     return response.status_code < 400
 
 
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+"""Default number of bytes per read in `url_retrieve`."""
+
+
+def file_hash(
+    path: Union[str, Path],
+    algorithm: str = "sha256",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> str:
+    """Return the hex digest of the file at `path` using hashlib's `algorithm`."""
+    h = hashlib.new(algorithm)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class TransferEvent(
+    namedtuple(
+        "TransferEvent",
+        "url outfile status bytes duration retries cache_hit error started",
+    )
+):
+    """Metrics of one file transfer, as passed to the transfer hooks.
+
+    Attributes
+    ----------
+    url : str
+        The requested URL.
+    outfile : Path
+        The local file path.
+    status : int or None
+        Final HTTP status code, None if no response was received.
+    bytes : int
+        Number of bytes received.
+    duration : float
+        Duration of the transfer in seconds.
+    retries : int
+        Number of retried requests.
+    cache_hit : bool
+        True if the transfer was skipped, because the local file is up-to-date.
+    error : str or None
+        Description of the error, if the transfer failed.
+    started : float
+        Start of the transfer as UNIX timestamp.
+    """
+
+    __slots__ = ()
+
+    @property
+    def throughput(self) -> float:
+        "Bytes per second."
+        return self.bytes / self.duration if self.duration > 0 else 0.0
+
+
+_transfer_hooks = []
+
+
+def add_transfer_hook(hook):
+    """
+    Call `hook` with a `TransferEvent` after each download attempt.
+
+    Hooks can be called from several threads at once.  Exceptions raised by
+    hooks are logged and otherwise ignored.
+    """
+    if hook not in _transfer_hooks:
+        _transfer_hooks.append(hook)
+
+
+def remove_transfer_hook(hook):
+    "Stop calling a hook added with `add_transfer_hook`."
+    if hook in _transfer_hooks:
+        _transfer_hooks.remove(hook)
+
+
+def _emit_transfer(event: TransferEvent):
+    for hook in list(_transfer_hooks):
+        try:
+            hook(event)
+        except Exception:
+            logger.exception("Transfer hook %r failed.", hook)
+
+
+@contextmanager
+def _monitor_transfer(url, outfile):
+    "Time a transfer and emit its event, filled in by the caller via the dict."
+    info = dict(status=None, bytes=0, retries=0, cache_hit=False, error=None)
+    started = time.time()
+    t0 = time.perf_counter()
+    try:
+        yield info
+    except BaseException as e:
+        info["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        if _transfer_hooks:
+            duration = time.perf_counter() - t0
+            event = TransferEvent(
+                str(url), Path(outfile), duration=duration, started=started, **info
+            )
+            _emit_transfer(event)
+
+
+def _count_retries(response: requests.Response) -> int:
+    "Number of retries urllib3 needed for `response`."
+    retries = getattr(response.raw, "retries", None)
+    return len(retries.history) if retries is not None else 0
+
+
+class TransferLog(list):
+    "List of `TransferEvent` collected by `record_transfers`."
+
+    def summary(self) -> dict:
+        """Aggregate the recorded transfers.
+
+        Throughput is based on the wall-clock time spanned by the downloads, so
+        that parallel downloads are accounted for.
+        """
+        downloads = [e for e in self if e.error is None and not e.cache_hit]
+        nbytes = sum(e.bytes for e in self)
+        if downloads:
+            wall_time = max(e.started + e.duration for e in downloads) - min(
+                e.started for e in downloads
+            )
+        else:
+            wall_time = 0.0
+        return dict(
+            transfers=len(self),
+            downloaded=len(downloads),
+            cache_hits=sum(e.cache_hit for e in self),
+            failed=sum(e.error is not None for e in self),
+            bytes=nbytes,
+            retries=sum(e.retries for e in self),
+            wall_time=wall_time,
+            throughput=nbytes / wall_time if wall_time > 0 else 0.0,
+            slowest=min(downloads, key=lambda e: e.throughput).url
+            if downloads
+            else None,
+        )
+
+    def report(self) -> str:
+        "One-line human readable summary."
+        s = self.summary()
+        return (
+            f"{s['downloaded']} downloaded, {s['cache_hits']} up-to-date, "
+            f"{s['failed']} failed, {s['bytes'] / 1e6:.1f} MB in "
+            f"{s['wall_time']:.1f} s ({s['throughput'] / 1e6:.2f} MB/s), "
+            f"{s['retries']} retries"
+        )
+
+
+@contextmanager
+def record_transfers():
+    """
+    Collect the `TransferEvent` of all downloads within the context.
+
+    Examples
+    --------
+    >>> with record_transfers() as transfers:
+    ...     url_retrieve(url, outfile)
+    >>> transfers.summary()
+    """
+    log = TransferLog()
+    add_transfer_hook(log.append)
+    try:
+        yield log
+    finally:
+        remove_transfer_hook(log.append)
+
+
+# Metadata (ETag, Last-Modified, size) of downloaded URLs is kept in a JSON file
+# under the storage root, so that later downloads can ask the server to only
+# send the file if it changed.  Several processes may download at once, so the
+# file is re-read whenever it changed, and updated under a file lock.
+HTTP_CACHE_FILE = "http_cache.json"
+_http_cache = {}  # path -> (file stat, metadata)
+_http_cache_lock = threading.Lock()
+
+
+def _http_cache_path() -> Path:
+    from .config import config
+
+    return Path(config.storage_root) / HTTP_CACHE_FILE
+
+
+def _file_stat(path: Path):
+    "Return (mtime, size) of a file to detect changes, or None if it's missing."
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _load_http_cache() -> dict:
+    "Return the metadata cache, reading it from disk if it changed."
+    path = _http_cache_path()
+    stat = _file_stat(path)
+    if path not in _http_cache or _http_cache[path][0] != stat:
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            data = {}
+        _http_cache[path] = (stat, data)
+    return _http_cache[path][1]
+
+
+@contextmanager
+def _http_cache_file_lock(path: Path):
+    "Hold an exclusive advisory lock for changing the metadata cache file."
+    if fcntl is None:
+        yield
+        return
+    with open(path.with_name(path.name + ".lock"), "a") as lockfile:
+        fcntl.flock(lockfile, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lockfile, fcntl.LOCK_UN)
+
+
+def get_http_metadata(url: str) -> dict:
+    """
+    Return the cached HTTP metadata of a previously downloaded URL.
+
+    Returns
+    -------
+    dict
+        With keys `etag`, `last_modified` and `size`, or empty if `url` wasn't
+        downloaded before.
+    """
+    with _http_cache_lock:
+        return dict(_load_http_cache().get(str(url), {}))
+
+
+def _store_http_metadata(url: str, headers, size: int):
+    "Store the validators of a completed download in the metadata cache."
+    etag = headers.get("etag")
+    last_modified = headers.get("last-modified")
+    path = _http_cache_path()
+    path.parent.mkdir(exist_ok=True, parents=True)
+    with _http_cache_lock, _http_cache_file_lock(path):
+        # merged into the latest version, which other processes may have changed
+        cache = _load_http_cache()
+        if etag is None and last_modified is None:
+            cache.pop(str(url), None)
+        else:
+            cache[str(url)] = dict(etag=etag, last_modified=last_modified, size=size)
+        tmpfile = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmpfile.write_text(json.dumps(cache, indent=1))
+        os.replace(tmpfile, path)
+        _http_cache[path] = (_file_stat(path), cache)
+
+
+def clear_http_cache():
+    "Remove all cached HTTP metadata."
+    with _http_cache_lock:
+        _http_cache.clear()
+        _http_cache_path().unlink(missing_ok=True)
+
+
+_IDENTITY = {"Accept-Encoding": "identity"}
+"Request header asking servers not to compress downloaded files."
+
+
+def _range_validator(headers) -> Union[str, None]:
+    "Return the If-Range value for resuming a response with `headers`."
+    etag = headers.get("etag")
+    # If-Range requires a strong validator
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("last-modified")
+
+
+def _conditional_headers(meta: dict) -> dict:
+    "Create If-None-Match/If-Modified-Since headers from cached metadata."
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    return headers
+
+
 def url_retrieve(
     url: str,
     outfile: str,
-    chunk_size: int = 4096,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
     user: str = None,
     passwd: str = None,
-):
+    resume: bool = True,
+    expected_size: int = None,
+    checksum: str = None,
+    hash_algorithm: str = "sha256",
+    progress: bool = True,
+    conditional: bool = True,
+) -> bool:
     """
     Downloads a file from url to outfile.
 
@@ -78,7 +510,17 @@ def url_retrieve(
     This downloader has built-in progress bar using tqdm and the `requests`
     package. Improves on standard `urllib` by adding time-out capability.
 
-    Testing different chunk_sizes, 128 was usually fastest, YMMV.
+    The data is first written to `<outfile>.part`, which is only renamed to
+    `outfile` once the download is complete and verified, so an interrupted
+    download never leaves a truncated `outfile` behind. A later call picks up
+    an existing `.part` file with an HTTP Range request, if the server supports
+    it, instead of starting over. The request carries the ETag or Last-Modified
+    value of the interrupted download as If-Range, so that a file that changed
+    on the server in the meantime is downloaded again from the start.
+
+    If `outfile` exists and was downloaded before, the server is asked to only
+    send the file if it changed since (conditional GET with the stored ETag and
+    Last-Modified values), so unchanged files are not transferred again.
 
     Inspired by https://stackoverflow.com/a/61575758/680232
 
@@ -94,23 +536,369 @@ def url_retrieve(
         if provided, create HTTPBasicAuth object
     passwd : str
         if provided, create HTTPBasicAuth object
+    resume : bool
+        Continue a previously interrupted download from its `.part` file.
+    expected_size : int, optional
+        Size in bytes the downloaded file must have. Defaults to the size
+        announced by the server, if any.
+    checksum : str, optional
+        Hex digest the downloaded file must have.
+    hash_algorithm : str
+        hashlib algorithm of `checksum`.
+    progress : bool
+        Show a progress bar for the download.
+    conditional : bool
+        Skip the download if the server reports `outfile` to be unchanged.
+
+    Returns
+    -------
+    bool
+        False if the download was skipped because the remote file is unchanged,
+        True otherwise.
+
+    Raises
+    ------
+    ConnectionError
+        If the server doesn't respond with the file.
+    IOError
+        If the downloaded file fails the size or checksum verification.
     """
     if user:
         auth = HTTPBasicAuth(user, passwd)
     else:
         auth = None
-    R = requests.get(url, stream=True, allow_redirects=True, auth=auth)
-    if R.status_code != 200:
-        raise ConnectionError(f"Could not download {url}\nError code: {R.status_code}")
-    with tqdm.wrapattr(
-        open(outfile, "wb"),
-        "write",
-        miniters=1,
-        total=int(R.headers.get("content-length", 0)),
-        desc=str(Path(outfile).name),
-    ) as fd:
-        for chunk in R.iter_content(chunk_size=chunk_size):
-            fd.write(chunk)
+    outfile = Path(outfile)
+    partfile = outfile.with_name(outfile.name + ".part")
+    # validator of the response the .part file was written from
+    validatorfile = partfile.with_name(partfile.name + ".validator")
+    offset = partfile.stat().st_size if resume and partfile.exists() else 0
+    validator = validatorfile.read_text() if validatorfile.exists() else ""
+    if not validator:
+        # without a validator, a changed remote file can't be detected
+        offset = 0
+    meta = get_http_metadata(url) if conditional else {}
+    # sizes, byte ranges and checksums refer to the file, not to a compressed body
+    headers = dict(_IDENTITY)
+    if offset:
+        headers.update({"Range": f"bytes={offset}-", "If-Range": validator})
+    elif outfile.exists() and outfile.stat().st_size == meta.get("size"):
+        headers.update(_conditional_headers(meta))
+    session = get_session()
+    with _monitor_transfer(url, outfile) as transfer:
+        R = session.get(str(url), stream=True, auth=auth, headers=headers)
+        transfer.update(status=R.status_code, retries=_count_retries(R))
+        if R.status_code == 304:
+            R.close()
+            transfer["cache_hit"] = True
+            logger.info("%s is unchanged, skipping download.", url)
+            return False
+        if offset and not _is_resumed_response(R, offset):
+            # the file changed (a 200 reply to If-Range sends all of it), or the
+            # server can't continue the partial download: start over
+            offset = 0
+            if R.status_code != 200:
+                R.close()
+                R = session.get(str(url), stream=True, auth=auth, headers=_IDENTITY)
+                transfer["status"] = R.status_code
+                transfer["retries"] += _count_retries(R)
+        with R:
+            if R.status_code not in (200, 206):
+                raise ConnectionError(
+                    f"Could not download {url}\nError code: {R.status_code}"
+                )
+            if not offset:
+                validatorfile.write_text(_range_validator(R.headers) or "")
+            length = R.headers.get("content-length")
+            if R.headers.get("content-encoding", "identity") != "identity":
+                # requests decodes the body, so its length isn't the file size
+                length = None
+            total = offset + int(length) if length is not None else None
+            # tqdm.wrapattr doesn't close the file, so do it here before verifying
+            with open(partfile, "ab" if offset else "wb") as f, tqdm.wrapattr(
+                f,
+                "write",
+                miniters=1,
+                initial=offset,
+                total=total or 0,
+                desc=str(outfile.name),
+                disable=not progress,
+            ) as fd:
+                for chunk in R.iter_content(chunk_size=chunk_size):
+                    fd.write(chunk)
+                    transfer["bytes"] += len(chunk)
+        validatorfile.unlink()
+        _verify_download(partfile, expected_size or total, checksum, hash_algorithm)
+        os.replace(partfile, outfile)
+    if conditional:
+        _store_http_metadata(url, R.headers, outfile.stat().st_size)
+    return True
+
+
+SEGMENTED_MIN_SIZE = 64 * 1024 * 1024
+"Files smaller than this (in bytes) are not worth a segmented download."
+
+
+def url_retrieve_segmented(
+    url: str,
+    outfile: str,
+    segments: int = 8,
+    min_size: int = SEGMENTED_MIN_SIZE,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    user: str = None,
+    passwd: str = None,
+    checksum: str = None,
+    hash_algorithm: str = "sha256",
+    progress: bool = True,
+    conditional: bool = True,
+) -> bool:
+    """
+    Download a large file over several connections in parallel.
+
+    Servers often throttle each connection, so a single stream can't use the
+    available bandwidth for files of hundreds of MB.  Here, the file is split
+    into `segments` byte ranges that are fetched in parallel threads and
+    written with positional writes into a preallocated `<outfile>.part`, which
+    is renamed to `outfile` after verifying its size (and checksum).
+
+    Falls back to `url_retrieve` if the file is smaller than `min_size`, if the
+    server doesn't announce the file size or byte range support, or if the
+    platform lacks `os.pwrite`.
+
+    Parameters
+    ----------
+    url : str
+        The URL to download
+    outfile : str
+        The path where to store the downloaded file.
+    segments : int
+        Number of parallel connections.
+    min_size : int
+        Minimum file size in bytes for a segmented download.
+    chunk_size, user, passwd, checksum, hash_algorithm, progress, conditional
+        See `url_retrieve`.
+
+    Returns
+    -------
+    bool
+        False if the download was skipped because the remote file is unchanged,
+        True otherwise.
+    """
+    auth = HTTPBasicAuth(user, passwd) if user else None
+    outfile = Path(outfile)
+    kwargs = dict(
+        chunk_size=chunk_size,
+        user=user,
+        passwd=passwd,
+        checksum=checksum,
+        hash_algorithm=hash_algorithm,
+        progress=progress,
+        conditional=conditional,
+    )
+    if not hasattr(os, "pwrite"):
+        return url_retrieve(url, outfile, **kwargs)
+    session = get_session()
+    head = session.head(str(url), allow_redirects=True, auth=auth, headers=_IDENTITY)
+    size = int(head.headers.get("content-length", 0))
+    if (
+        head.status_code != 200
+        or head.headers.get("accept-ranges", "").lower() != "bytes"
+        or head.headers.get("content-encoding", "identity") != "identity"
+        or size < max(min_size, segments)
+    ):
+        return url_retrieve(url, outfile, **kwargs)
+    meta = get_http_metadata(url) if conditional else {}
+    if outfile.exists() and outfile.stat().st_size == meta.get("size"):
+        validators = [meta.get("etag"), meta.get("last_modified")]
+        remote = [head.headers.get("etag"), head.headers.get("last-modified")]
+        if any(v is not None and v == r for v, r in zip(validators, remote)):
+            with _monitor_transfer(url, outfile) as transfer:
+                transfer.update(status=304, cache_hit=True)
+            logger.info("%s is unchanged, skipping download.", url)
+            return False
+
+    partfile = outfile.with_name(outfile.name + ".part")
+    bounds = np.linspace(0, size, segments + 1).astype(np.int64)
+    lock = threading.Lock()
+    bar = tqdm(
+        total=size,
+        unit="B",
+        unit_scale=True,
+        desc=str(outfile.name),
+        disable=not progress,
+    )
+
+    def fetch(fd, start, stop, transfer):
+        headers = {"Range": f"bytes={start}-{stop - 1}", **_IDENTITY}
+        with session.get(str(url), stream=True, auth=auth, headers=headers) as R:
+            with lock:
+                transfer["retries"] += _count_retries(R)
+            if not _is_resumed_response(R, start):
+                raise ConnectionError(
+                    f"Could not download bytes {start}-{stop - 1} of {url}\n"
+                    f"Error code: {R.status_code}"
+                )
+            position = start
+            for chunk in R.iter_content(chunk_size=chunk_size):
+                os.pwrite(fd, chunk, position)
+                position += len(chunk)
+                with lock:
+                    transfer["bytes"] += len(chunk)
+                    bar.update(len(chunk))
+
+    with _monitor_transfer(url, outfile) as transfer:
+        transfer.update(status=206, retries=_count_retries(head))
+        fd = os.open(partfile, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            if hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(fd, 0, size)
+            else:
+                os.ftruncate(fd, size)
+            with bar, ThreadPoolExecutor(max_workers=segments) as executor:
+                futures = [
+                    executor.submit(fetch, fd, start, stop, transfer)
+                    for start, stop in zip(bounds[:-1], bounds[1:])
+                ]
+                for future in futures:
+                    future.result()
+        except BaseException:
+            partfile.unlink(missing_ok=True)
+            raise
+        finally:
+            os.close(fd)
+        # the preallocated file always has the full size, so check what was received
+        if transfer["bytes"] != size:
+            partfile.unlink()
+            raise IOError(
+                f"Incomplete download of {outfile.name}: "
+                f"{transfer['bytes']} of {size} bytes."
+            )
+        _verify_download(partfile, size, checksum, hash_algorithm)
+        os.replace(partfile, outfile)
+    if conditional:
+        _store_http_metadata(url, head.headers, size)
+    return True
+
+
+async def download_urls_async(
+    urls: Iterable[str],
+    outfiles: Iterable[Union[str, Path]],
+    overwrite: bool = False,
+    max_per_host: int = 4,
+    progress: bool = True,
+    desc: str = "Files downloaded",
+    retrieve=None,
+    **kwargs,
+) -> List[Path]:
+    """
+    Download many files concurrently within one process.
+
+    Each download runs `url_retrieve` in a worker thread, with at most
+    `max_per_host` downloads from the same server at a time.  All downloads
+    are attempted even if some fail; the first error is raised at the end.
+
+    Parameters
+    ----------
+    urls : iterable of str
+        The URLs to download.
+    outfiles : iterable of str or Path
+        Local paths for each URL.
+    overwrite : bool
+        Download files even if they exist locally already.
+    max_per_host : int
+        Maximum number of simultaneous downloads per host.
+    progress : bool
+        Show one progress bar for the whole set of downloads.
+    desc : str
+        Description of the progress bar.
+    retrieve : callable, optional
+        Download function with the signature of `url_retrieve`, which is the
+        default.
+    **kwargs
+        Passed on to `retrieve`.
+
+    Returns
+    -------
+    list of Path
+        The local paths of the files.
+    """
+    urls = [str(url) for url in urls]
+    outfiles = [Path(outfile) for outfile in outfiles]
+    if len(urls) != len(outfiles):
+        raise ValueError("Need one output file per URL.")
+    retrieve = url_retrieve if retrieve is None else retrieve
+    semaphores = defaultdict(lambda: asyncio.Semaphore(max_per_host))
+    bar = tqdm(total=len(urls), desc=desc, disable=not progress)
+
+    async def download(url, outfile):
+        try:
+            if outfile.exists() and not overwrite:
+                with _monitor_transfer(url, outfile) as transfer:
+                    transfer["cache_hit"] = True
+                return
+            async with semaphores[urlsplit(url).netloc]:
+                outfile.parent.mkdir(exist_ok=True, parents=True)
+                await asyncio.to_thread(
+                    retrieve, url, outfile, progress=False, **kwargs
+                )
+        finally:
+            bar.update()
+
+    with bar:
+        results = await asyncio.gather(
+            *(download(url, outfile) for url, outfile in zip(urls, outfiles)),
+            return_exceptions=True,
+        )
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        logger.error("%d of %d downloads failed.", len(errors), len(urls))
+        raise errors[0]
+    return outfiles
+
+
+def download_urls(
+    urls: Iterable[str], outfiles: Iterable[Union[str, Path]], **kwargs
+) -> List[Path]:
+    """
+    Synchronous wrapper around `download_urls_async`.
+
+    Can also be called while an event loop is running (e.g. in Jupyter), in
+    which case the downloads run in their own thread and event loop.
+    See `download_urls_async` for the parameters.
+    """
+    coroutine = download_urls_async(urls, outfiles, **kwargs)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+def _is_resumed_response(response: requests.Response, offset: int) -> bool:
+    "Check if `response` continues a download at byte `offset`."
+    content_range = response.headers.get("content-range", "")
+    return response.status_code == 206 and content_range.startswith(
+        f"bytes {offset}-"
+    )
+
+
+def _verify_download(path: Path, size: int, checksum: str, hash_algorithm: str):
+    "Check size and checksum of downloaded file, removing it if corrupt."
+    actual_size = path.stat().st_size
+    if size is not None and actual_size != size:
+        if actual_size > size:
+            path.unlink()
+        raise IOError(
+            f"Incomplete download of {path.name}: {actual_size} of {size} bytes."
+        )
+    if checksum is not None:
+        actual = file_hash(path, hash_algorithm)
+        if actual != checksum.lower():
+            path.unlink()
+            raise IOError(
+                f"{hash_algorithm} checksum mismatch for {path.name}: "
+                f"expected {checksum}, got {actual}."
+            )
 
 
 def have_internet():
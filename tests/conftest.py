@@ -0,0 +1,270 @@
+"""Fixtures shared by the test modules."""
+
+import email.utils
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import numpy as np
+import pytest
+import spiceypy as spice
+from planetarypy import utils
+from planetarypy.config import config
+
+
+@pytest.fixture
+def storage_root(tmp_path):
+    "Store all data of the test in a temporary `config.storage_root`."
+    config.storage_root = tmp_path / "storage"
+    yield config.storage_root
+    config.storage_root = None
+
+
+# Downloads
+class _Handler(BaseHTTPRequestHandler):
+    """Serve the files of `server.remote`.
+
+    Requests are recorded in `server.requests`.  Responses have the ETag
+    `server.etag`, if set, and the Last-Modified time of the file if
+    `server.last_modified`, for conditional and resumed requests.  Range
+    requests are supported if `server.ranges`, bodies are compressed if
+    `server.gzip`, the status codes in `server.errors` are returned first, and
+    the connection is dropped after `server.fail_after` bytes once.
+    """
+
+    def _file(self):
+        return self.server.remote / urlsplit(self.path).path.lstrip("/")
+
+    def _send_status(self, status):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _validators(self, path) -> dict:
+        validators = {}
+        if self.server.etag:
+            validators["ETag"] = self.server.etag
+        if self.server.last_modified:
+            mtime = path.stat().st_mtime
+            validators["Last-Modified"] = email.utils.formatdate(mtime, usegmt=True)
+        return validators
+
+    def _unchanged(self, path) -> bool:
+        "Whether the client's copy is up to date, given the conditional headers."
+        validators = self._validators(path)
+        if "If-None-Match" in self.headers:
+            return self.headers["If-None-Match"] == validators.get("ETag")
+        if "If-Modified-Since" in self.headers and "Last-Modified" in validators:
+            since = email.utils.parsedate_to_datetime(self.headers["If-Modified-Since"])
+            return int(path.stat().st_mtime) <= since.timestamp()
+        return False
+
+    def do_HEAD(self):
+        path = self._file()
+        if not path.is_file():
+            self._send_status(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(path.stat().st_size))
+        if self.server.ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        for name, value in self._validators(path).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        path = self._file()
+        if server.errors:
+            self._send_status(server.errors.pop(0))
+            return
+        if not path.is_file():
+            self._send_status(404)
+            return
+        if self._unchanged(path):
+            self.send_response(304)
+            self.end_headers()
+            return
+        payload = path.read_bytes()
+        validators = self._validators(path)
+        byte_range = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if if_range is not None and if_range not in validators.values():
+            # changed since: the whole file
+            byte_range = None
+        if byte_range and server.ranges:
+            start, stop = byte_range.split("=")[1].split("-")
+            start = int(start)
+            stop = int(stop) + 1 if stop else len(payload)
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {start}-{stop - 1}/{len(payload)}"
+            )
+        else:
+            start, stop = 0, len(payload)
+            self.send_response(200)
+        body = payload[start:stop]
+        if server.gzip:
+            # compressed regardless of the Accept-Encoding request header
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in validators.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if server.fail_after is not None:
+            # simulate a dropped connection
+            self.wfile.write(body[: server.fail_after])
+            server.fail_after = None
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    @property
+    def payload(self) -> bytes:
+        "Content of the file at `kernel_url`."
+        return (self.remote / "kernel.bsp").read_bytes()
+
+    @payload.setter
+    def payload(self, value: bytes):
+        (self.remote / "kernel.bsp").write_bytes(value)
+
+
+@pytest.fixture
+def http_server(tmp_path, monkeypatch):
+    "Serve the files of `tmp_path / 'remote'` locally, see `_Handler`."
+    monkeypatch.setattr(utils, "_http_cache_path", lambda: tmp_path / "cache.json")
+    server = _Server(("127.0.0.1", 0), _Handler)
+    server.remote = tmp_path / "remote"
+    server.remote.mkdir()
+    server.payload = bytes(range(256)) * 4096
+    server.ranges = True
+    server.fail_after = None
+    server.errors = []
+    server.etag = None
+    server.last_modified = True
+    server.gzip = False
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    server.kernel_url = f"{server.url}/kernel.bsp"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+# SPICE kernels
+LSK = r"""KPL/LSK
+
+Leapseconds kernel with the contents of naif0012.tls, cut after 2009.
+
+\begindata
+
+DELTET/DELTA_T_A       =   32.184
+DELTET/K               =    1.657D-3
+DELTET/EB              =    1.671D-2
+DELTET/M               = (  6.239996D0   1.99096871D-7 )
+
+DELTET/DELTA_AT        = ( 10,   @1972-JAN-1
+                           11,   @1972-JUL-1
+                           12,   @1973-JAN-1
+                           13,   @1974-JAN-1
+                           14,   @1975-JAN-1
+                           15,   @1976-JAN-1
+                           16,   @1977-JAN-1
+                           17,   @1978-JAN-1
+                           18,   @1979-JAN-1
+                           19,   @1980-JAN-1
+                           20,   @1981-JUL-1
+                           21,   @1982-JUL-1
+                           22,   @1983-JUL-1
+                           23,   @1985-JUL-1
+                           24,   @1988-JAN-1
+                           25,   @1990-JAN-1
+                           26,   @1991-JAN-1
+                           27,   @1992-JUL-1
+                           28,   @1993-JUL-1
+                           29,   @1994-JUL-1
+                           30,   @1996-JAN-1
+                           31,   @1997-JUL-1
+                           32,   @1999-JAN-1
+                           33,   @2006-JAN-1
+                           34,   @2009-JAN-1 )
+
+\begintext
+"""
+
+# Cassini clock with one tick per TDB second since J2000
+SCLK = r"""KPL/SCLK
+\begindata
+SCLK_KERNEL_ID = ( @2000-01-01 )
+SCLK_DATA_TYPE_82 = ( 1 )
+SCLK01_TIME_SYSTEM_82 = ( 1 )
+SCLK01_N_FIELDS_82 = ( 1 )
+SCLK01_MODULI_82 = ( 1000000000 )
+SCLK01_OFFSETS_82 = ( 0 )
+SCLK01_OUTPUT_DELIM_82 = ( 1 )
+SCLK_PARTITION_START_82 = ( 0.0 )
+SCLK_PARTITION_END_82 = ( 1.0E9 )
+SCLK01_COEFFICIENTS_82 = ( 0.0 0.0 1.0 )
+"""
+
+
+@pytest.fixture
+def lsk() -> str:
+    "Text of a leapseconds kernel with the leap seconds until 2009."
+    return LSK
+
+
+@pytest.fixture
+def sclk() -> str:
+    "Text of a Cassini clock kernel with one tick per TDB second since J2000."
+    return SCLK
+
+
+@pytest.fixture
+def segments() -> list:
+    "(body, center, start, stop) of two segments for Cassini and one for Saturn."
+    return [(-82, 6, 0.0, 1000.0), (-82, 6, 2000.0, 3000.0), (6, 0, 0.0, 5000.0)]
+
+
+def _write_spk(path, segments):
+    handle = spice.spkopn(str(path), "test", 0)
+    for body, center, first, last in segments:
+        epochs = np.linspace(first, last, 5)
+        states = np.ones((5, 6)) * np.arange(1, 6)[:, None]
+        spice.spkw09(
+            handle, body, center, "J2000", first, last, "seg", 3, 5, states, epochs
+        )
+    spice.spkcls(handle)
+
+
+def _write_ck(path):
+    handle = spice.ckopn(str(path), "test", 0)
+    sclkdp = np.array([0.0, 100.0, 200.0])
+    quats = np.tile([1.0, 0.0, 0.0, 0.0], (3, 1))
+    avvs = np.zeros((3, 3))
+    spice.ckw01(
+        handle, 0.0, 200.0, -82000, "J2000", True, "att", 3, sclkdp, quats, avvs
+    )
+    spice.ckcls(handle)
+
+
+@pytest.fixture
+def write_spk():
+    "Function writing an SPK with the given (body, center, start, stop) segments."
+    return _write_spk
+
+
+@pytest.fixture
+def write_ck():
+    "Function writing a type 1 CK of Cassini's instrument -82000 at SCLK 0-200."
+    return _write_ck
@@ -137,3 +137,136 @@ def test_config_missions_property():
 def test_config_instruments_for_mission(mission, expected_instrument):
     instruments = config.list_instruments(mission)
     assert expected_instrument in instruments
+
+
+def test_config_lazy(tmp_path):
+    path = tmp_path / "lazy_config.toml"
+    lazy_config = Config(path, lazy=True)
+    assert not path.exists()
+    assert "cassini" in lazy_config.missions
+    assert path.exists()
+    # reading doesn't need the tomlkit document
+    assert lazy_config._tomldoc is None
+    lazy_config.set_value("missions.cassini.iss.indexes.index.timestamp", "now")
+    assert lazy_config.get_value("cassini.iss.indexes.index.timestamp") == "now"
+    assert Config(path).get_value("cassini.iss.indexes.index.timestamp") == "now"
+
+
+def test_config_storage_root_default(tmp_path, monkeypatch):
+    monkeypatch.setattr(Path, "home", lambda: tmp_path)
+    path = tmp_path / "config.toml"
+    new_config = Config(path)
+    assert new_config.storage_root == tmp_path / "planetarypy_data"
+    assert new_config.storage_root.is_dir()
+    assert Config(path).d["storage_root"] == str(tmp_path / "planetarypy_data")
+
+
+def test_config_index_urls():
+    urls = config.index_urls()
+    assert urls["cassini.iss.index"] == config.get_value(
+        "cassini.iss.indexes.index.url"
+    )
+    assert urls["mro.hirise.edr"].endswith("EDRCUMINDEX.LBL")
+
+
+def test_config_index_invalidation(tmp_path):
+    temp_config = Config(tmp_path / "test_config.toml")
+    temp_config.tomldoc["missions"]["cassini"]["iss"]["indexes"]["index"][
+        "url"
+    ] = "http://old.org"
+    temp_config.save()
+    assert temp_config.index_urls()["cassini.iss.index"] == "http://old.org"
+    temp_config["missions.cassini.iss.indexes.index.url"] = "http://new.org"
+    assert temp_config.get_value("cassini.iss.indexes.index.url") == "http://new.org"
+    assert temp_config.index_urls()["cassini.iss.index"] == "http://new.org"
+    assert "cassini" in temp_config.missions
+
+
+def test_config_batch(tmp_path):
+    path = tmp_path / "test_config.toml"
+    temp_config = Config(path)
+    before = path.read_text()
+    with temp_config.batch():
+        temp_config.set_value("missions.cassini.iss.indexes.index.timestamp", "t1")
+        temp_config["missions.cassini.uvis.indexes.index.timestamp"] = "t2"
+        assert path.read_text() == before
+    after = Config(path)
+    assert after.get_value("cassini.iss.indexes.index.timestamp") == "t1"
+    assert after.get_value("cassini.uvis.indexes.index.timestamp") == "t2"
+    # changes are discarded if the batch fails
+    with pytest.raises(RuntimeError):
+        with temp_config.batch():
+            temp_config.set_value("missions.cassini.iss.indexes.index.timestamp", "t3")
+            raise RuntimeError
+    assert temp_config.get_value("cassini.iss.indexes.index.timestamp") == "t1"
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_config_concurrent_writers(tmp_path):
+    path = tmp_path / "test_config.toml"
+    first = Config(path)
+    second = Config(path)
+    first.set_value("missions.cassini.iss.indexes.index.timestamp", "first")
+    second.set_value("missions.cassini.uvis.indexes.index.timestamp", "second")
+    merged = Config(path)
+    assert merged.get_value("cassini.iss.indexes.index.timestamp") == "first"
+    assert merged.get_value("cassini.uvis.indexes.index.timestamp") == "second"
+    assert second.get_value("cassini.iss.indexes.index.timestamp") == "first"
+
+
+def _set_timestamp(path, index):
+    Config(path).set_value(f"missions.cassini.uvis.indexes.{index}.timestamp", index)
+
+
+def test_config_parallel_processes(tmp_path):
+    import multiprocessing
+
+    path = tmp_path / "test_config.toml"
+    indexes = Config(path).list_indexes("cassini.uvis")
+    processes = [
+        multiprocessing.Process(target=_set_timestamp, args=(path, index))
+        for index in indexes
+    ]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+    final = Config(path)
+    for index in indexes:
+        assert final.get_value(f"cassini.uvis.indexes.{index}.timestamp") == index
+
+
+def test_config_reload(tmp_path):
+    path = tmp_path / "test_config.toml"
+    reader = Config(path, reload_interval=0)
+    key = "cassini.iss.indexes.index.url"
+    url = reader.get_value(key)
+    assert reader.index_urls()["cassini.iss.index"] == url
+    writer = Config(path)
+    writer.set_value("missions." + key, "http://new.org")
+    writer.set_value("storage_root", str(tmp_path / "data"))
+    assert reader.index_urls()["cassini.iss.index"] == "http://new.org"
+    assert reader.get_value(key) == "http://new.org"
+    assert reader.storage_root == tmp_path / "data"
+    # without a reload interval, changes are only seen after `reload`
+    manual = Config(path)
+    assert manual.index_urls()["cassini.iss.index"] == "http://new.org"
+    writer.set_value("missions." + key, url)
+    assert manual.get_value(key) == "http://new.org"
+    assert manual.reload()
+    assert manual.get_value(key) == url
+    assert manual.index_urls()["cassini.iss.index"] == url
+    assert not manual.reload()
+
+
+def test_config_storage_root_override(tmp_path):
+    path = tmp_path / "config.toml"
+    writer = Config(path)
+    writer.set_value("storage_root", str(tmp_path / "data"))
+    reader = Config(path)
+    reader.storage_root = tmp_path / "override"
+    writer.set_value("storage_root", str(tmp_path / "other"))
+    assert reader.reload()
+    assert reader.storage_root == tmp_path / "override"
+    reader.storage_root = None
+    assert reader.storage_root == tmp_path / "other"
@@ -17,6 +17,9 @@
 import datetime
 import unittest
 
+import numpy as np
+import pandas as pd
+
 from planetarypy import datetime as ppydt
 
 
@@ -126,3 +129,163 @@ class TestIsoZ(unittest.TestCase):
         for invalid_format in invalid_formats:
             with self.assertRaises(ValueError):
                 ppydt.fromisozformat(invalid_format)
+
+
+class TestDOYArray(unittest.TestCase):
+    def test_fromdoyformat_array_matches_scalar(self):
+        strings = [
+            "2010-110",
+            "2010110",
+            "2010-110T10:12:14",
+            "2010-110T10:12:14.123000",
+            "2010-110T10:12:14.5",
+            "2010-110T10",
+            "2010-110T10:12",
+            "2024-366T23:59:59",
+            "2010-110T10:12:14",
+        ]
+        result = ppydt.fromdoyformat_array(strings)
+        self.assertIsInstance(result, pd.DatetimeIndex)
+        self.assertEqual(result.dtype, np.dtype("datetime64[ns]"))
+        expected = [ppydt.fromdoyformat(s) for s in strings]
+        self.assertEqual(list(result.to_pydatetime()), expected)
+
+    def test_fromdoyformat_array_offsets(self):
+        result = ppydt.fromdoyformat_array(
+            ["2024-127T11:15:00+00:00", "2024-127T13:15:00+02:00", "2024-127T11:15:00Z"]
+        )
+        self.assertEqual(str(result.tz), "UTC")
+        expected = datetime.datetime(2024, 5, 6, 11, 15, tzinfo=datetime.timezone.utc)
+        self.assertTrue((result == expected).all())
+
+        mixed = ["2024-127T11:15:00+00:00", "2024-127T11:15:00"]
+        self.assertRaises(ValueError, ppydt.fromdoyformat_array, mixed)
+        self.assertTrue((ppydt.fromdoyformat_array(mixed, utc=True) == expected).all())
+
+    def test_fromdoyformat_array_fractional_offset(self):
+        for string in ["2020-001T01:02:03+01:00:30.5", "2020-001T01:02:03-0130"]:
+            result = ppydt.fromdoyformat_array([string])
+            expected = ppydt.fromdoyformat(string).astimezone(datetime.timezone.utc)
+            self.assertEqual(result[0].to_pydatetime(), expected)
+
+    def test_fromdoyformat_array_series_and_missing(self):
+        series = pd.Series(
+            ["2024-127T11:15:00", None, "2024-127T11:15:00"], index=[3, 4, 5]
+        )
+        result = ppydt.fromdoyformat_array(series)
+        self.assertIsInstance(result, pd.Series)
+        self.assertEqual(list(result.index), [3, 4, 5])
+        self.assertTrue(pd.isna(result[4]))
+        self.assertEqual(result[3], pd.Timestamp("2024-05-06T11:15:00"))
+        self.assertTrue(ppydt.fromdoyformat_array([None, None]).isna().all())
+
+    def test_fromdoyformat_array_invalid_format(self):
+        invalid_formats = [
+            "2024/127T11:15:00",
+            "2024-367T11:15:00",
+            "2023-366T11:15:00",
+            "2024-000T11:15:00",
+            "abcd-123T11:15:00",
+            "2022-10-01T13:20:00",
+            "2024-127T24:00:00",
+        ]
+        for invalid_format in invalid_formats:
+            with self.assertRaises(ValueError):
+                ppydt.fromdoyformat_array(["2024-127", invalid_format])
+
+
+class TestIsoZArray(unittest.TestCase):
+    def test_fromisozformat_array_matches_scalar(self):
+        strings = np.array(
+            [
+                "2022-10-01T13:20:00Z",
+                "2022-10-01T13:20:00.123456Z",
+                "2024-02-29T00:00:00Z",
+            ]
+        )
+        result = ppydt.fromisozformat_array(strings)
+        self.assertEqual(str(result.tz), "UTC")
+        expected = [ppydt.fromisozformat(s) for s in strings]
+        self.assertEqual(list(result.to_pydatetime()), expected)
+
+    def test_fromisozformat_array_invalid_formats(self):
+        invalid_formats = [
+            "2022-10-01T13:20:00+00:00",
+            "2022-10-01 13:20:00Z",
+            "2022-13-01T13:20:00Z",
+            "2022-10-32T13:20:00Z",
+            "2022-02-29T13:20:00Z",
+        ]
+        for invalid_format in invalid_formats:
+            with self.assertRaises(ValueError):
+                ppydt.fromisozformat_array([invalid_format])
+
+
+class TestFormatArray(unittest.TestCase):
+    times = pd.DatetimeIndex(
+        [
+            "2024-01-01T00:00:00",
+            "2024-05-06T11:15:00.123456",
+            "1999-12-31T23:59:59.5",
+            "2024-12-31T23:59:59",
+        ]
+    )
+
+    def test_doyformat_array_matches_scalar(self):
+        for timespec in ["auto", "hours", "minutes", "seconds", "milliseconds"]:
+            result = ppydt.doyformat_array(self.times, sep=" ", timespec=timespec)
+            expected = [
+                ppydt.doyformat(t, sep=" ", timespec=timespec)
+                for t in self.times.to_pydatetime()
+            ]
+            self.assertEqual(result.tolist(), expected)
+
+    def test_format_array_separators(self):
+        times = self.times.tz_localize("UTC")
+        for sep in ["--", "", " T "]:
+            self.assertEqual(
+                ppydt.doyformat_array(times, sep=sep).tolist(),
+                [ppydt.doyformat(t, sep=sep) for t in times.to_pydatetime()],
+            )
+            # like the scalar function, only single characters are accepted
+            self.assertRaises(TypeError, ppydt.isozformat, times[0], sep=sep)
+            self.assertRaises(TypeError, ppydt.isozformat_array, times, sep=sep)
+        self.assertEqual(
+            ppydt.isozformat_array(times, sep=" ").tolist(),
+            [ppydt.isozformat(t, sep=" ") for t in times.to_pydatetime()],
+        )
+
+    def test_doyformat_array_utc(self):
+        times = self.times.tz_localize("UTC")
+        self.assertEqual(
+            ppydt.doyformat_array(times).tolist(),
+            [ppydt.doyformat(t) for t in times.to_pydatetime()],
+        )
+
+    def test_isozformat_array_matches_scalar(self):
+        times = self.times.tz_localize("UTC")
+        for timespec in ["auto", "seconds", "microseconds"]:
+            result = ppydt.isozformat_array(times, timespec=timespec)
+            expected = [
+                ppydt.isozformat(t, timespec=timespec)
+                for t in times.to_pydatetime()
+            ]
+            self.assertEqual(result.tolist(), expected)
+        # naive datetime64 values are taken to be UTC
+        self.assertEqual(
+            ppydt.isozformat_array(self.times.to_numpy()).tolist(),
+            ppydt.isozformat_array(times).tolist(),
+        )
+
+    def test_isozformat_array_non_utc(self):
+        times = self.times.tz_localize("UTC").tz_convert("Europe/Berlin")
+        self.assertRaises(ValueError, ppydt.isozformat_array, times)
+
+    def test_format_array_nat(self):
+        times = np.array(["2024-05-06T11:15", "NaT"], dtype="datetime64[ns]")
+        self.assertEqual(
+            ppydt.isozformat_array(times).tolist(), ["2024-05-06T11:15:00Z", "NaT"]
+        )
+        self.assertEqual(
+            ppydt.doyformat_array(times).tolist(), ["2024-127T11:15:00", "NaT"]
+        )
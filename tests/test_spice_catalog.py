@@ -0,0 +1,115 @@
+import os
+import sqlite3
+from contextlib import closing
+
+import pytest
+import spiceypy as spice
+
+from planetarypy.spice.catalog import KernelCatalog
+
+
+@pytest.fixture
+def catalog(tmp_path, write_spk, segments):
+    write_spk(tmp_path / "test.bsp", segments)
+    (tmp_path / "test.tpc").write_text("KPL/PCK\n\\begindata\nBODY6_GM = 1.0\n")
+    return KernelCatalog(tmp_path / "catalog.sqlite")
+
+
+def test_catalog_add(catalog, tmp_path):
+    assert catalog.add([tmp_path / "test.bsp", tmp_path / "test.tpc"]) == 2
+    kernels = catalog.kernels()
+    assert kernels.type.tolist() == ["SPK", "PCK"]
+    assert kernels["size"][0] == (tmp_path / "test.bsp").stat().st_size
+    assert len(kernels.sha256[0]) == 64
+    coverage = catalog.coverage("CASSINI")
+    assert coverage[["start", "stop"]].values.tolist() == [[0, 1000], [2000, 3000]]
+    # unchanged files are skipped
+    assert catalog.add(tmp_path.glob("test.*")) == 0
+
+
+def test_catalog_covering(catalog, tmp_path):
+    catalog.add(tmp_path / "test.bsp")
+    spk = (tmp_path / "test.bsp").resolve()
+    assert catalog.covering(500.0, -82) == [spk]
+    assert catalog.covering(1500.0, "CASSINI") == []
+    assert catalog.covering(1500.0) == [spk]
+    assert catalog.covering(1500.0, kernel_type="ck") == []
+    assert catalog.covering(6000.0) == []
+    assert catalog.overlapping(1200.0, 1800.0, "CASSINI") == []
+    assert catalog.overlapping(1200.0, 2200.0, "CASSINI") == [spk]
+
+
+def test_catalog_update_and_prune(catalog, tmp_path, write_spk, segments):
+    catalog.add(tmp_path / "test.bsp")
+    (tmp_path / "test.bsp").unlink()
+    write_spk(tmp_path / "test.bsp", segments[2:])
+    assert catalog.add(tmp_path / "test.bsp") == 1
+    assert catalog.coverage().id.tolist() == [6]
+    (tmp_path / "test.bsp").unlink()
+    assert catalog.prune() == 1
+    assert catalog.kernels().empty
+    assert catalog.coverage().empty
+
+
+def test_catalog_ck_coverage(catalog, tmp_path, write_ck, lsk, sclk):
+    write_ck(tmp_path / "test.bc")
+    ck = (tmp_path / "test.bc").resolve()
+    # without the SCLK, the coverage can't be converted to ET
+    assert catalog.add(ck) == 1
+    assert catalog.kernels().type.tolist() == ["CK"]
+    assert catalog.coverage().empty
+    assert catalog.add(ck) == 1
+    (tmp_path / "test.tls").write_text(lsk)
+    (tmp_path / "test.tsc").write_text(sclk)
+    assert catalog.add(tmp_path.glob("test.*")) == 5
+    assert catalog.kernels("CK").path.tolist() == [str(ck)]
+    coverage = catalog.coverage(-82000)
+    # type 1 segments have discrete pointing instances
+    assert coverage.start.tolist() == coverage.stop.tolist() == [0, 100, 200]
+    assert catalog.covering(100.0, kernel_type="CK") == [ck]
+    assert catalog.covering(50.0, kernel_type="CK") == []
+    assert catalog.add(tmp_path.glob("test.*")) == 0
+    # the time kernels were only loaded to read the coverage
+    assert spice.ktotal("ALL") == 0
+
+
+def test_catalog_urls(tmp_path, write_spk, segments):
+    path = tmp_path / "old.sqlite"
+    # a catalog from before URLs were recorded
+    with closing(sqlite3.connect(path)) as con:
+        con.execute(
+            "CREATE TABLE kernels (path TEXT PRIMARY KEY, type TEXT, size INTEGER, "
+            "mtime REAL, sha256 TEXT, added REAL)"
+        )
+    catalog = KernelCatalog(path)
+    spk = tmp_path / "test.bsp"
+    write_spk(spk, segments)
+    catalog.add(spk)
+    assert catalog.kernels().url.isna().all()
+    url = "http://host/test.bsp"
+    assert catalog.add(spk, urls={spk: url}) == 0
+    assert catalog.kernels().url.tolist() == [url]
+    # the URL is kept for repairs when the file changes
+    os.utime(spk, (0, 0))
+    assert catalog.add(spk) == 1
+    assert catalog.kernels().url.tolist() == [url]
+
+
+def test_catalog_verify(catalog, tmp_path, monkeypatch):
+    paths = [tmp_path / f"{name}.tpc" for name in "abc"]
+    for i, path in enumerate(paths):
+        path.write_text(f"KPL/PCK\n\\begindata\nBODY{i}_GM = 1.0\n")
+    catalog.add(paths)
+    assert catalog.verify().status.tolist() == ["ok"] * 3
+    # touched, but intact: rehashed once, then trusted again
+    os.utime(paths[0], (0, 0))
+    paths[1].write_text(paths[1].read_text().replace("1.0", "2.0"))
+    paths[2].unlink()
+    assert catalog.verify().status.tolist() == ["ok", "corrupt", "missing"]
+    hashed = []
+    monkeypatch.setattr("planetarypy.spice.catalog.file_hash", hashed.append)
+    assert catalog.verify([paths[0]]).status.tolist() == ["ok"]
+    assert hashed == []
+    # files without checksum can't be verified
+    catalog.add(tmp_path / "test.bsp", checksum=False)
+    assert len(catalog.verify()) == 3
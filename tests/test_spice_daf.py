@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+import spiceypy as spice
+from planetarypy.spice.daf import read_file_record, read_summaries, summarize
+
+
+def test_read_spk_summaries(tmp_path, write_spk, segments):
+    path = tmp_path / "test.bsp"
+    write_spk(path, segments)
+    record = read_file_record(path)
+    assert (record.idword, record.nd, record.ni) == ("DAF/SPK", 2, 6)
+    df = read_summaries(path)
+    assert df[["target", "center", "start", "stop"]].values.tolist() == [
+        [body, center, first, last] for body, center, first, last in segments
+    ]
+    assert (df.frame == 1).all() and (df.type == 9).all()
+    assert df.name.tolist() == ["seg"] * 3
+    # the same as SPICE's own summaries
+    handle = spice.dafopr(str(path))
+    try:
+        spice.dafbfs(handle)
+        for row in df.itertuples():
+            assert spice.daffna()
+            dc, ic = spice.dafus(spice.dafgs(), 2, 6)
+            assert list(ic) == [
+                row.target, row.center, row.frame, row.type, row.begin, row.end
+            ]
+    finally:
+        spice.dafcls(handle)
+
+
+def test_read_ck_summaries_and_summarize(tmp_path, write_spk, write_ck, segments):
+    write_ck(tmp_path / "test.bc")
+    write_spk(tmp_path / "test.bsp", segments[:1])
+    ck = read_summaries(tmp_path / "test.bc")
+    columns = ["instrument", "type", "angular_velocity", "start", "stop"]
+    assert ck[columns].values.tolist() == [[-82000, 1, 1, 0.0, 200.0]]
+    df = summarize([tmp_path / "test.bsp", tmp_path / "test.bsp"])
+    assert df.path.tolist() == [str(tmp_path / "test.bsp")] * 2
+    assert df.target.tolist() == [-82, -82]
+
+
+def test_big_endian(tmp_path):
+    "A hand-made big-endian DAF with one summary."
+    header = bytearray(1024)
+    header[:8] = b"DAF/SPK "
+    header[8:16] = np.array([2, 6], ">i4").tobytes()
+    header[76:88] = np.array([2, 2, 1000], ">i4").tobytes()
+    header[88:96] = b"BIG-IEEE"
+    summary = bytearray(1024)
+    summary[:24] = np.array([0.0, 0.0, 1.0], ">f8").tobytes()
+    summary[24:40] = np.array([-10.0, 10.0], ">f8").tobytes()
+    summary[40:64] = np.array([399, 10, 17, 2, 641, 900], ">i4").tobytes()
+    names = bytearray(b" " * 1024)
+    names[:5] = b"earth"
+    path = tmp_path / "big.bsp"
+    path.write_bytes(bytes(header + summary + names))
+    df = read_summaries(path)
+    assert df.drop(columns="name").values.tolist() == [
+        [-10, 10, 399, 10, 17, 2, 641, 900]
+    ]
+    assert df.name.tolist() == ["earth"]
+
+
+def test_not_a_daf(tmp_path):
+    (tmp_path / "test.tls").write_text("KPL/LSK\n")
+    with pytest.raises(ValueError):
+        read_summaries(tmp_path / "test.tls")
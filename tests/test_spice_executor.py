@@ -0,0 +1,39 @@
+import os
+
+import numpy as np
+import pytest
+import spiceypy as spice
+from planetarypy.spice.executor import GeometryExecutor
+from planetarypy.spice.kernels import get_pool
+
+
+def positions(et, observer="SATURN BARYCENTER"):
+    return np.array(spice.spkpos("CASSINI", et, "J2000", "NONE", observer)[0])
+
+
+def worker_state(et):
+    return np.full(len(et), os.getpid()), np.full(len(et), spice.ktotal("ALL"))
+
+
+@pytest.fixture
+def spk(tmp_path, write_spk):
+    path = tmp_path / "test.bsp"
+    write_spk(path, [(-82, 6, 0.0, 1000.0)])
+    yield path
+    get_pool().clear()
+
+
+@pytest.mark.parametrize("fork", [True, False])
+def test_executor_map(spk, fork):
+    et = np.linspace(0, 1000, 11)
+    spice.furnsh(str(spk))
+    expected = positions(et)
+    spice.unload(str(spk))
+    with GeometryExecutor(spk, max_workers=2, fork=fork) as executor:
+        xyz = executor.map(positions, et, observer="SATURN BARYCENTER")
+        pids, n_kernels = executor.map(worker_state, et, shards=4)
+    assert np.array_equal(xyz, expected)
+    assert len(set(pids)) <= 2 and os.getpid() not in pids
+    assert (n_kernels == 1).all()
+    # the kernels loaded for forked workers stay in the pool until evicted
+    assert spk in get_pool() if fork else spice.ktotal("ALL") == 0
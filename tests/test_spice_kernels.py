@@ -1,6 +1,18 @@
+import os
+import time
+import zipfile
+from datetime import timedelta
+from pathlib import Path
+
 import pandas as pd
+import pytest
+import spiceypy as spice
 from astropy.time import Time
+from planetarypy.config import config
 from planetarypy.spice import kernels
+from planetarypy.spice.leapseconds import utc2et
+from planetarypy.spice.pool import KernelPool
+from planetarypy.utils import file_hash, record_transfers
 
 
 def test_receive_datasets_dataframe():
@@ -23,3 +35,292 @@ def test_Subsetter_filenames():
     subset = kernels.Subsetter("cassini", "2011-02-13", "2011-02-14")
     assert subset.urls_file == "urls_cosp_1000_110213_110214.txt"
     assert subset.metakernel_file == "cas_2011_v18_110213_110214.tm"
+
+
+@pytest.fixture
+def datasets_server(http_server, monkeypatch, storage_root):
+    "Serve a datasets table with `http_server`, and cache it in `storage_root`."
+    http_server.csv = http_server.remote / "datasets.csv"
+    http_server.csv.write_text(
+        "shorthand,path,Start Time,Stop Time\n"
+        "cassini,pds/data/co-s_j_e_v-spice-6-v1.0/cosp_1000,1997-10-15,2017-09-15\n"
+    )
+    monkeypatch.setattr(kernels, "datasets_url", f"{http_server.url}/datasets.csv")
+    monkeypatch.setattr(kernels, "_datasets", None)
+    return http_server
+
+
+def test_get_datasets_cache(datasets_server):
+    df = kernels.get_datasets()
+    assert df.at["cassini", "Stop Time"] == "2017-09-15"
+    assert kernels.DATASETS_CACHE.exists()
+    assert kernels.datasets is df
+    # offline fallback to the cached copy
+    datasets_server.csv.unlink()
+    assert kernels.get_datasets(refresh=True).equals(df)
+
+
+def test_get_datasets_corrupt_cache(datasets_server):
+    kernels.get_datasets()
+    kernels.DATASETS_CACHE.write_bytes(b"not a pickle")
+    kernels._datasets = None
+    df = kernels.get_datasets()
+    assert df.at["cassini", "Stop Time"] == "2017-09-15"
+    assert pd.read_pickle(kernels.DATASETS_CACHE).equals(df)
+    # without a readable cache, a failed download is an error
+    kernels.DATASETS_CACHE.write_bytes(b"not a pickle")
+    kernels._datasets = None
+    datasets_server.csv.unlink()
+    with pytest.raises(ConnectionError):
+        kernels.get_datasets()
+    assert not kernels.DATASETS_CACHE.exists()
+
+
+def test_get_datasets_background_refresh(datasets_server):
+    kernels.get_datasets()
+    csv = datasets_server.csv
+    csv.write_text(csv.read_text().replace("2017-09-15", "2017-09-16"))
+    stale = kernels.get_datasets(ttl=timedelta(0))
+    assert stale.at["cassini", "Stop Time"] == "2017-09-15"
+    kernels._refresh_thread.join()
+    assert kernels.get_datasets().at["cassini", "Stop Time"] == "2017-09-16"
+
+
+def test_Subsetter_cache(datasets_server, tmp_path, monkeypatch):
+    kernel_url = f"{datasets_server.url}/ck/kernel.bc"
+    (datasets_server.remote / "ck").mkdir()
+    (datasets_server.remote / "ck" / "kernel.bc").write_bytes(b"kernel")
+    with zipfile.ZipFile(datasets_server.remote / "subset.zip", "w") as z:
+        z.writestr("urls_cosp_1000_110213_110214.txt", kernel_url + "\n")
+        z.writestr("cas_2011_v18_110213_110214.tm", "PATH_VALUES = ( './data' )\n")
+    monkeypatch.setattr(kernels, "BASE_URL", f"{datasets_server.url}/subset.zip")
+    with pytest.raises(IOError):
+        kernels.Subsetter("cassini", "2011-02-13", offline=True)
+    subset = kernels.Subsetter("cassini", "2011-02-13", save_location=tmp_path / "k")
+    assert subset.kernel_urls == [kernel_url]
+    assert subset.cache_path.exists()
+
+    # from now on, everything is local
+    (datasets_server.remote / "subset.zip").unlink()
+    cached = kernels.Subsetter("cassini", "2011-02-13", save_location=tmp_path / "k")
+    assert cached.kernel_names == ["ck/kernel.bc"]
+    metakernel = kernels.get_metakernel_and_files(
+        "cassini", "2011-02-13", None, save_location=tmp_path / "k"
+    )
+    assert metakernel.read_text() == f"PATH_VALUES = ( '{tmp_path / 'k'}' )\n"
+    assert (tmp_path / "k" / "ck" / "kernel.bc").read_bytes() == b"kernel"
+    catalog = kernels.get_catalog()
+    assert catalog.kernels().path.tolist() == [str(tmp_path / "k" / "ck" / "kernel.bc")]
+    assert kernels.list_kernels_for_day("cassini", "2011-02-13", offline=True) == [
+        "ck/kernel.bc"
+    ]
+
+
+def test_Subsetter_cache_expiry(datasets_server, tmp_path, monkeypatch):
+    def serve(name):
+        with zipfile.ZipFile(datasets_server.remote / "subset.zip", "w") as z:
+            z.writestr("urls_cosp_1000.txt", f"{datasets_server.url}/{name}.bc\n")
+            z.writestr("cas_2011_v18.tm", "PATH_VALUES = ( './data' )\n")
+        return f"{datasets_server.url}/{name}.bc"
+
+    def list_urls(**kwargs):
+        subset = kernels.Subsetter("cassini", "2011-02-13", **kwargs)
+        # as if the response was cached two days ago
+        two_days_ago = time.time() - 2 * 86400
+        os.utime(subset.cache_path, (two_days_ago, two_days_ago))
+        return subset.kernel_urls
+
+    monkeypatch.setattr(kernels, "BASE_URL", f"{datasets_server.url}/subset.zip")
+    a = serve("a")
+    assert list_urls() == [a]
+    b = serve("b")
+    assert list_urls() == [a]
+    assert list_urls(refresh=True) == [b]
+    # windows that ended recently expire sooner
+    c = serve("c")
+    monkeypatch.setattr(kernels, "SUBSET_RECENT", timedelta(days=365 * 100))
+    assert list_urls() == [c]
+    # the expired response is used if NAIF can't be reached
+    (datasets_server.remote / "subset.zip").unlink()
+    assert list_urls() == [c]
+
+
+def test_merge_windows():
+    windows = [
+        ("2011-02-20", "2011-02-21"),
+        ("2011-02-13", "2011-02-14"),
+        ("2011-02-14T12:00", "2011-02-15"),
+    ]
+    merged = kernels.merge_windows(windows)
+    assert [(str(start.iso), str(stop.iso), ids) for start, stop, ids in merged] == [
+        ("2011-02-13 00:00:00.000", "2011-02-14 00:00:00.000", [1]),
+        ("2011-02-14 12:00:00.000", "2011-02-15 00:00:00.000", [2]),
+        ("2011-02-20 00:00:00.000", "2011-02-21 00:00:00.000", [0]),
+    ]
+    merged = kernels.merge_windows(windows, tolerance=timedelta(days=1))
+    assert [ids for _, _, ids in merged] == [[1, 2], [0]]
+    merged = kernels.merge_windows(
+        windows, tolerance=timedelta(days=7), max_span=timedelta(days=2)
+    )
+    assert [ids for _, _, ids in merged] == [[1, 2], [0]]
+
+
+def test_merge_windows_max_span():
+    days = [(f"2011-{day:03d}", None) for day in range(1, 366)]
+    merged = kernels.merge_windows(days, timedelta(days=1), timedelta(days=7))
+    assert len(merged) == 53
+    spans = [(stop - start).to_datetime() for start, stop, _ in merged]
+    assert max(spans) == timedelta(days=7)
+    assert sorted(i for _, _, ids in merged for i in ids) == list(range(365))
+    # a longer window on its own is kept
+    long = [("2011-001", "2011-100"), ("2011-050", "2011-051")]
+    merged = kernels.merge_windows(long, max_span=timedelta(days=7))
+    assert [ids for _, _, ids in merged] == [[0], [1]]
+
+
+def test_get_metakernels_and_files(datasets_server, tmp_path, monkeypatch):
+    kernel_urls = [f"{datasets_server.url}/ck/{name}.bc" for name in "ab"]
+    (datasets_server.remote / "ck").mkdir()
+    for name in "ab":
+        (datasets_server.remote / "ck" / f"{name}.bc").write_bytes(b"kernel")
+    with zipfile.ZipFile(datasets_server.remote / "subset.zip", "w") as z:
+        z.writestr("urls_cosp_1000.txt", "\n".join(kernel_urls) + "\n")
+        z.writestr("cas_2011_v18.tm", "PATH_VALUES = ( './data' )\n")
+    monkeypatch.setattr(kernels, "BASE_URL", f"{datasets_server.url}/subset.zip")
+    windows = [
+        ("2011-02-13", "2011-02-14"),
+        ("2011-02-14", "2011-02-15"),
+        ("2011-03-01", "2011-03-02"),
+    ]
+    plan = kernels.plan_subsets("cassini", windows, save_location=tmp_path / "k")
+    assert plan[windows[0]] is plan[windows[1]]
+    assert plan[windows[0]].stop == Time("2011-02-15")
+    assert plan[windows[2]] is not plan[windows[0]]
+
+    with record_transfers() as transfers:
+        metakernels = kernels.get_metakernels_and_files(
+            "cassini", windows, save_location=tmp_path / "k"
+        )
+    downloads = [event.url for event in transfers if not event.cache_hit]
+    assert sorted(downloads) == kernel_urls
+    assert set(metakernels) == set(windows)
+    assert metakernels[windows[2]].exists()
+    # identical kernels are stored once
+    a, b = (tmp_path / "k" / "ck" / f"{name}.bc" for name in "ab")
+    assert a.samefile(b)
+
+
+def test_synthesize_metakernel(
+    datasets_server, tmp_path, caplog, lsk, sclk, write_spk, write_ck
+):
+    # long enough to need continued strings in the metakernel
+    root = tmp_path / ("kernels_" * 12)
+    for folder in ["lsk", "fk", "sclk", "spk", "ck"]:
+        (root / folder).mkdir(parents=True)
+    (root / "lsk" / "naif0012.tls").write_text(lsk)
+    (root / "fk" / "cas_v40.tf").write_text("KPL/FK\n\\begindata\nFRAME_X = 1\n")
+    (root / "fk" / "broken.tf").write_text("not a kernel\n")
+    # 2011-02-13 is about 3.51e8 s past J2000
+    write_spk(root / "spk" / "now.bsp", [(-82, 6, 3.5e8, 3.52e8)])
+    write_spk(root / "spk" / "old.bsp", [(-82, 6, 0.0, 1000.0)])
+    # the clock starts at 2011-02-13T12:00, so the CK covers that time
+    et = utc2et(["2011-02-13T12:00"], lsk=root / "lsk" / "naif0012.tls")[0]
+    sclk = sclk.replace("0.0 0.0 1.0", f"0.0 {float(et)!r} 1.0")
+    (root / "sclk" / "cas00172.tsc").write_text(sclk)
+    write_ck(root / "ck" / "att.bc")
+    metakernel = kernels.synthesize_metakernel(
+        "cassini", "2011-02-13", save_location=root, generic=False
+    )
+    assert metakernel.parent == root
+    spice.kclear()
+    try:
+        spice.furnsh(str(metakernel))
+        loaded = [spice.kdata(i, "ALL")[0] for i in range(1, spice.ktotal("ALL"))]
+    finally:
+        spice.kclear()
+    assert [Path(p).relative_to(root).as_posix() for p in loaded] == [
+        "lsk/naif0012.tls",
+        "fk/cas_v40.tf",
+        "sclk/cas00172.tsc",
+        "spk/now.bsp",
+        "ck/att.bc",
+    ]
+    assert "broken.tf of unknown kernel type" in caplog.text
+    # offline requests without a cached subset fall back to the local kernels
+    assert (
+        kernels.get_metakernel_and_files(
+            "cassini", "2011-02-13", None, save_location=root, offline=True
+        )
+        == metakernel
+    )
+
+
+def test_ensure_kernels_after_kclear(tmp_path, monkeypatch, write_spk):
+    paths = [tmp_path / "a.bsp", tmp_path / "b.bsp"]
+    for path in paths:
+        write_spk(path, [(-82, 6, 0.0, 1000.0)])
+    monkeypatch.setattr(kernels, "get_generic_kernel_paths", lambda: paths)
+    monkeypatch.setattr(kernels, "_pool", KernelPool())
+    spice.kclear()
+    try:
+        kernels.ensure_kernels()
+        assert spice.ktotal("ALL") == 2
+        spice.kclear()
+        kernels.ensure_kernels()
+        assert spice.ktotal("ALL") == 2
+    finally:
+        spice.kclear()
+
+
+def test_storage_follows_config(storage_root, tmp_path):
+    kernel_storage = storage_root / "spice_kernels"
+    assert kernels.KERNEL_STORAGE == kernel_storage
+    assert kernels.get_catalog().path == kernel_storage / "catalog.sqlite"
+    assert kernels.get_generic_kernel_paths()[0].parent.parent == (
+        kernel_storage / "generic"
+    )
+    assert kernels.SUBSET_CACHE == kernel_storage / "subsets"
+
+    config.storage_root = tmp_path / "other"
+    assert kernels.KERNEL_STORAGE == tmp_path / "other" / "spice_kernels"
+    assert kernels.KERNEL_STORAGE.is_dir()
+    assert kernels.get_store().root == tmp_path / "other" / "spice_kernels" / "store"
+    assert kernels.DATASETS_CACHE.parent == kernels.KERNEL_STORAGE
+
+
+def test_verify_kernels_repairs(http_server, storage_root):
+    for name in "ab":
+        (http_server.remote / f"{name}.bsp").write_bytes(name.encode() * 1000)
+    urls = [f"{http_server.url}/{name}.bsp" for name in "ab"]
+    paths = [kernels.KERNEL_STORAGE / f"{name}.bsp" for name in "ab"]
+    for url, path in zip(urls, paths):
+        kernels.download_one_url(url, path)
+    assert kernels.get_catalog().kernels().url.tolist() == urls
+
+    with open(paths[0], "r+b") as f:
+        f.write(b"x")
+    assert kernels.verify_kernels(repair=False).status.tolist() == ["corrupt", "ok"]
+    result = kernels.verify_kernels()
+    assert result.status.tolist() == ["repaired", "ok"]
+    assert paths[0].read_bytes() == b"a" * 1000
+    assert kernels.verify_kernels().status.tolist() == ["ok", "ok"]
+
+
+def test_downloads_are_hashed_once(http_server, storage_root, monkeypatch):
+    hashed = []
+
+    def counting_hash(path, *args, **kwargs):
+        hashed.append(Path(path).name)
+        return file_hash(path, *args, **kwargs)
+
+    for module in ["store", "catalog"]:
+        monkeypatch.setattr(f"planetarypy.spice.{module}.file_hash", counting_hash)
+    for name in "ab":
+        (http_server.remote / f"{name}.bsp").write_bytes(name.encode() * 1000)
+    urls = [f"{http_server.url}/{name}.bsp" for name in "ab"]
+    paths = [kernels.KERNEL_STORAGE / f"{name}.bsp" for name in "ab"]
+    kernels.download_urls(urls, paths, retrieve=kernels.get_store().fetch)
+    kernels._catalog_downloads(urls, paths)
+    assert sorted(hashed) == ["a.bsp", "b.bsp"]
+    blobs = [kernels.get_store().lookup(url).name for url in urls]
+    assert kernels.get_catalog().kernels().sha256.tolist() == blobs
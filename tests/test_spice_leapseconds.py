@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+import spiceypy as spice
+
+from planetarypy.spice.leapseconds import J2000, LeapSeconds
+
+
+@pytest.fixture
+def lsk_path(tmp_path, lsk):
+    path = tmp_path / "test.tls"
+    path.write_text(lsk)
+    spice.furnsh(str(path))
+    yield path
+    spice.unload(str(path))
+
+
+@pytest.fixture
+def times():
+    rng = np.random.default_rng(42)
+    start = np.datetime64("1965-01-01", "ns")
+    offsets = rng.integers(0, 60 * 365 * 86400 * 10**6, 2000) * 1000
+    edges = ["1971-12-31T23:59:59.9", "2008-12-31T23:59:59.5", "2009-01-01"]
+    return np.concatenate(
+        [start + offsets.astype("m8[ns]"), np.array(edges, dtype="M8[ns]")]
+    )
+
+
+def test_read_lsk(lsk_path):
+    lsk = LeapSeconds.from_file(lsk_path)
+    assert lsk.delta_t_a == 32.184
+    assert lsk.m1 == 1.99096871e-7
+    assert len(lsk.table) == 25
+    assert lsk.table.iloc[-1].tolist() == [pd.Timestamp("2009-01-01"), 34]
+
+
+def test_utc2et_matches_spice(lsk_path, times):
+    lsk = LeapSeconds.from_file(lsk_path)
+    expected = [spice.str2et(str(t)) for t in times]
+    np.testing.assert_allclose(lsk.utc2et(times), expected, rtol=0, atol=1e-6)
+    assert lsk.utc2et(J2000)[0] == pytest.approx(64.183927, abs=1e-6)
+
+
+def test_et2utc_matches_spice(lsk_path, times):
+    lsk = LeapSeconds.from_file(lsk_path)
+    et = np.array([spice.str2et(str(t)) for t in times])
+    expected = pd.DatetimeIndex([spice.et2utc(e, "ISOC", 7) for e in et])
+    diff = (lsk.et2utc(et) - expected).to_numpy().astype(np.int64)
+    assert np.abs(diff).max() < 1000
+    # round trip
+    diff = (lsk.et2utc(lsk.utc2et(times)).to_numpy() - times).astype(np.int64)
+    assert np.abs(diff).max() < 1000
+
+
+def test_missing_values(lsk_path):
+    lsk = LeapSeconds.from_file(lsk_path)
+    assert np.isnan(lsk.utc2et(["2000-01-01", None])[1])
+    assert pd.isna(lsk.et2utc([0.0, np.nan])[1])
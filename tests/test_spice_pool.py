@@ -0,0 +1,81 @@
+import pytest
+import spiceypy as spice
+from planetarypy.spice.pool import KernelPool, loaded_kernels
+
+
+@pytest.fixture
+def spks(tmp_path, write_spk):
+    spice.kclear()
+    paths = []
+    for i, body in enumerate([-82, 6, 699]):
+        path = tmp_path / f"{i}.bsp"
+        write_spk(path, [(body, 0, 0.0, 1000.0)])
+        paths.append(path)
+    yield paths
+    spice.kclear()
+
+
+def test_pool_refcounts(spks):
+    pool = KernelPool()
+    pool.load(spks[0])
+    pool.load([spks[0], spks[1]])
+    assert spice.ktotal("ALL") == 2
+    loaded = pool.loaded()
+    assert loaded.path.tolist() == [str(spks[0]), str(spks[1])]
+    assert loaded.refs.tolist() == [2, 1]
+    pool.release([spks[0], spks[1]])
+    pool.release(spks[0])
+    # unreferenced kernels stay loaded within the budget
+    assert spice.ktotal("ALL") == 2
+    with pytest.raises(ValueError):
+        pool.release(spks[0])
+    pool.clear()
+    assert spice.ktotal("ALL") == 0
+
+
+def test_pool_lru_eviction(spks):
+    pool = KernelPool(max_files=2)
+    for path in spks[:2]:
+        with pool.kernels(path):
+            pass
+    # spks[0] is the least recently used one
+    with pool.kernels(spks[1]), pool.kernels(spks[2]):
+        assert loaded_kernels().path.tolist() == [str(spks[1]), str(spks[2])]
+    pool.load(spks[0])
+    # referenced kernels are kept, even if over budget
+    pool.load(spks[1])
+    pool.load(spks[2])
+    assert len(pool) == 3 and spks[0] in pool
+    assert spice.ktotal("ALL") == 3
+
+
+def test_pool_metakernel_and_external(spks, tmp_path):
+    spice.furnsh(str(spks[2]))
+    metakernel = tmp_path / "test.tm"
+    metakernel.write_text(
+        "KPL/MK\n\\begindata\n"
+        f"KERNELS_TO_LOAD = (\n'{spks[0]}'\n'{spks[1]}'\n)\n"
+        "\\begintext\n"
+    )
+    pool = KernelPool(max_bytes=0)
+    with pool.kernels([metakernel, spks[2]]):
+        assert pool.n_files == 4
+        loaded = pool.loaded()
+        assert loaded.source.tolist() == ["", "", str(metakernel), str(metakernel)]
+        assert loaded.refs.tolist() == [1, 1, 1, 1]
+    assert len(pool) == 0
+    # the externally loaded kernel stays loaded
+    assert loaded_kernels().path.tolist() == [str(spks[2])]
+
+
+def test_pool_after_kclear(spks):
+    pool = KernelPool()
+    pool.load(spks[0])
+    spice.kclear()
+    assert spks[0] not in pool
+    # loaded again, keeping the reference
+    pool.load(spks[0])
+    assert spks[0] in pool
+    assert pool.loaded().refs.tolist() == [2]
+    pool.clear()
+    assert spice.ktotal("ALL") == 0
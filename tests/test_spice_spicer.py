@@ -0,0 +1,13 @@
+import subprocess
+import sys
+
+
+def test_import_is_lazy():
+    code = (
+        "import sys, spiceypy\n"
+        "from planetarypy.spice.spicer import MarsSpicer\n"
+        "assert spiceypy.ktotal('ALL') == 0\n"
+        "assert 'matplotlib' not in sys.modules\n"
+        "assert 'planetarypy.spice.kernels' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
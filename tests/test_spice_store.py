@@ -0,0 +1,65 @@
+from planetarypy.spice.store import KernelStore
+from planetarypy.utils import file_hash, url_retrieve
+
+
+def test_fetch_deduplicates(http_server, tmp_path):
+    (http_server.remote / "a.bsp").write_bytes(b"kernel" * 1000)
+    (http_server.remote / "b.bsp").write_bytes(b"kernel" * 1000)
+    store = KernelStore(tmp_path / "store")
+    first = tmp_path / "mission1" / "a.bsp"
+    assert store.fetch(f"{http_server.url}/a.bsp", first) is True
+    blob = store.lookup(f"{http_server.url}/a.bsp")
+    assert blob.samefile(first)
+
+    # same URL elsewhere: linked, not downloaded
+    (http_server.remote / "a.bsp").unlink()
+    second = tmp_path / "mission2" / "a.bsp"
+    assert store.fetch(f"{http_server.url}/a.bsp", second) is False
+    assert second.samefile(first)
+    assert blob.stat().st_nlink == 3
+
+    # other URL with the same content: one blob
+    third = tmp_path / "mission3" / "b.bsp"
+    assert store.fetch(f"{http_server.url}/b.bsp", third) is True
+    assert third.samefile(blob)
+    assert [p for p in store.blobs.rglob("*") if p.is_file()] == [blob]
+
+
+def test_fetch_known_checksum(http_server, tmp_path):
+    local = tmp_path / "local.tls"
+    local.write_bytes(b"leapseconds")
+    store = KernelStore(tmp_path / "store")
+    store.add(local)
+    outfile = tmp_path / "lsk" / "naif0012.tls"
+    # not served at all, but known by its checksum
+    url = f"{http_server.url}/naif0012.tls"
+    assert store.fetch(url, outfile, checksum=file_hash(local)) is False
+    assert outfile.read_bytes() == b"leapseconds"
+
+
+def test_fetch_unchanged(http_server, tmp_path):
+    url = f"{http_server.url}/a.bsp"
+    (http_server.remote / "a.bsp").write_bytes(b"kernel" * 1000)
+    outfile = tmp_path / "a.bsp"
+    url_retrieve(url, outfile)
+    store = KernelStore(tmp_path / "store")
+    # not in the store yet, but the http_server reports it unchanged
+    assert store.fetch(url, outfile) is False
+    assert store.lookup(url).samefile(outfile)
+
+
+def test_fetch_overwrite(http_server, tmp_path):
+    url = f"{http_server.url}/a.bsp"
+    (http_server.remote / "a.bsp").write_bytes(b"old" * 1000)
+    store = KernelStore(tmp_path / "store")
+    first, second = tmp_path / "first.bsp", tmp_path / "second.bsp"
+    store.fetch(url, first)
+    # changed on the http_server: only downloaded again with `overwrite`
+    (http_server.remote / "a.bsp").write_bytes(b"new" * 2000)
+    assert store.fetch(url, second) is False
+    assert second.read_bytes() == b"old" * 1000
+    assert store.fetch(url, second, overwrite=True) is True
+    assert second.read_bytes() == b"new" * 2000
+    assert store.lookup(url).samefile(second)
+    # the other link keeps the old blob
+    assert first.read_bytes() == b"old" * 1000
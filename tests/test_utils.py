@@ -1,7 +1,13 @@
 """Tests for utils module."""
 
+import asyncio
+import datetime as dt
+import hashlib
+import os
 from pathlib import Path
+import pandas as pd
 import pytest
+import requests
 
 from planetarypy import utils
 
@@ -52,3 +58,308 @@ def test_file_variations_non_list():
     for invalid_input in invalid_inputs:
         with pytest.raises((TypeError, AttributeError)):
             utils.file_variations(fname, invalid_input)
+
+
+# Time conversion
+def _index_table():
+    return pd.DataFrame(
+        {
+            "START_TIME": ["2024-127T11:15:00", "2024-127T11:16:00", None],
+            "STOP_TIME": ["2024-127T11:16:00", "2024-127T11:16:00.500", None],
+            "EXPOSURE": [1.0, 2.0, 3.0],
+        },
+        index=[10, 11, 12],
+    )
+
+
+def test_replace_all_doy_times():
+    df = _index_table()
+    utils.replace_all_doy_times(df)
+    assert df["START_TIME"].dtype == "datetime64[ns]"
+    assert df["STOP_TIME"].dtype == "datetime64[ns]"
+    assert df.loc[11, "START_TIME"] == pd.Timestamp("2024-05-06T11:16:00")
+    assert df.loc[11, "STOP_TIME"] == pd.Timestamp("2024-05-06T11:16:00.5")
+    assert pd.isna(df.loc[12, "START_TIME"])
+    assert df["EXPOSURE"].tolist() == [1.0, 2.0, 3.0]
+
+
+def test_replace_all_doy_times_mixed_offsets():
+    df = _index_table()
+    df["START_TIME"] = ["2024-127T11:15:00Z", "2024-127T13:16:00+02:00", None]
+    utils.replace_all_doy_times(df)
+    assert str(df["START_TIME"].dt.tz) == "UTC"
+    assert df.loc[11, "START_TIME"] == pd.Timestamp("2024-05-06T11:16:00Z")
+    assert df["STOP_TIME"].dtype == "datetime64[ns]"
+
+
+def test_replace_all_doy_times_dask():
+    dd = pytest.importorskip("dask.dataframe")
+    ddf = dd.from_pandas(_index_table(), npartitions=2)
+    utils.replace_all_doy_times(ddf)
+    expected = _index_table()
+    utils.replace_all_doy_times(expected)
+    pd.testing.assert_frame_equal(ddf.compute(), expected)
+
+
+# Downloads
+def test_url_retrieve(http_server, tmp_path):
+    outfile = tmp_path / "kernel.bsp"
+    checksum = hashlib.sha256(http_server.payload).hexdigest()
+    utils.url_retrieve(http_server.kernel_url, outfile, checksum=checksum)
+    assert outfile.read_bytes() == http_server.payload
+    assert not (tmp_path / "kernel.bsp.part").exists()
+    assert utils.file_hash(outfile) == checksum
+
+
+def test_url_retrieve_resume(http_server, tmp_path):
+    outfile = tmp_path / "kernel.bsp"
+    http_server.etag = '"v1"'
+    http_server.fail_after = 100_000
+    with pytest.raises(requests.exceptions.RequestException):
+        utils.url_retrieve(http_server.kernel_url, outfile, chunk_size=1024)
+    assert not outfile.exists()
+    partial_size = (tmp_path / "kernel.bsp.part").stat().st_size
+    assert 0 < partial_size <= 100_000
+
+    utils.url_retrieve(http_server.kernel_url, outfile)
+    assert http_server.requests[-1]["Range"] == f"bytes={partial_size}-"
+    assert http_server.requests[-1]["If-Range"] == '"v1"'
+    assert outfile.read_bytes() == http_server.payload
+    assert list(tmp_path.glob("kernel.bsp.*")) == []
+
+
+def test_url_retrieve_resume_changed_file(http_server, tmp_path):
+    outfile = tmp_path / "kernel.bsp"
+    http_server.etag = '"v1"'
+    http_server.fail_after = 100_000
+    with pytest.raises(requests.exceptions.RequestException):
+        utils.url_retrieve(http_server.kernel_url, outfile, chunk_size=1024)
+    # same size, other content: the old part must not be continued
+    http_server.payload = http_server.payload[::-1]
+    http_server.etag = '"v2"'
+    utils.url_retrieve(http_server.kernel_url, outfile)
+    assert len(http_server.requests) == 2
+    assert outfile.read_bytes() == http_server.payload
+
+
+def test_url_retrieve_no_resume_without_validator(http_server, tmp_path):
+    http_server.last_modified = False
+    outfile = tmp_path / "kernel.bsp"
+    http_server.fail_after = 100_000
+    with pytest.raises(requests.exceptions.RequestException):
+        utils.url_retrieve(http_server.kernel_url, outfile, chunk_size=1024)
+    utils.url_retrieve(http_server.kernel_url, outfile)
+    assert "Range" not in http_server.requests[-1]
+    assert outfile.read_bytes() == http_server.payload
+
+
+def test_url_retrieve_resume_unsupported(http_server, tmp_path):
+    http_server.ranges = False
+    outfile = tmp_path / "kernel.bsp"
+    (tmp_path / "kernel.bsp.part").write_bytes(b"garbage")
+    utils.url_retrieve(http_server.kernel_url, outfile)
+    assert outfile.read_bytes() == http_server.payload
+
+
+def test_url_retrieve_verification(http_server, tmp_path):
+    outfile = tmp_path / "kernel.bsp"
+    with pytest.raises(IOError):
+        utils.url_retrieve(http_server.kernel_url, outfile, checksum="0" * 64)
+    assert not outfile.exists()
+    assert not (tmp_path / "kernel.bsp.part").exists()
+    with pytest.raises(IOError):
+        utils.url_retrieve(http_server.kernel_url, outfile, expected_size=10)
+    assert not outfile.exists()
+
+
+def test_url_retrieve_compressed(http_server, tmp_path):
+    outfile = tmp_path / "kernel.bsp"
+    http_server.gzip = True
+    checksum = hashlib.sha256(http_server.payload).hexdigest()
+    utils.url_retrieve(http_server.kernel_url, outfile, checksum=checksum)
+    assert outfile.read_bytes() == http_server.payload
+    assert http_server.requests[-1]["Accept-Encoding"] == "identity"
+
+
+@pytest.fixture
+def session_options(monkeypatch):
+    "Let a test configure the shared session, restoring it afterwards."
+    monkeypatch.setattr(utils, "_session_options", dict(utils._session_options))
+    monkeypatch.setattr(utils, "_session", None)
+    yield
+    if utils._session is not None:
+        utils._session.close()
+
+
+def test_get_session_is_shared(session_options):
+    session = utils.get_session()
+    assert utils.get_session() is session
+    utils.configure_session(backoff_factor=0)
+    assert utils.get_session() is not session
+    with pytest.raises(TypeError):
+        utils.configure_session(foo=1)
+
+
+def test_url_retrieve_retries_server_errors(http_server, tmp_path, session_options):
+    utils.configure_session(backoff_factor=0)
+    http_server.errors = [503, 502]
+    outfile = tmp_path / "kernel.bsp"
+    utils.url_retrieve(http_server.kernel_url, outfile)
+    assert outfile.read_bytes() == http_server.payload
+    assert len(http_server.requests) == 3
+
+
+def test_head_helpers(http_server):
+    # Tue, 15 Nov 1994 08:12:31 GMT
+    os.utime(http_server.remote / "kernel.bsp", (784887151, 784887151))
+    assert utils.check_url_exists(http_server.kernel_url)
+    assert not utils.check_url_exists(http_server.kernel_url.replace(".bsp", ".txt"))
+    assert utils.get_remote_timestamp(http_server.kernel_url) == dt.datetime(
+        1994, 11, 15, 8, 12, 31
+    )
+
+
+def test_download_urls(http_server, tmp_path):
+    urls = [f"{http_server.kernel_url}?{i}" for i in range(6)]
+    outfiles = [tmp_path / "sub" / f"kernel{i}.bsp" for i in range(6)]
+    outfiles[0].parent.mkdir()
+    outfiles[0].write_bytes(b"local")
+    paths = utils.download_urls(urls, outfiles, max_per_host=2, progress=False)
+    assert paths == outfiles
+    assert outfiles[0].read_bytes() == b"local"
+    assert all(p.read_bytes() == http_server.payload for p in outfiles[1:])
+    assert len(http_server.requests) == 5
+
+
+def test_download_urls_in_running_loop(http_server, tmp_path):
+    async def main():
+        return utils.download_urls(
+            [http_server.kernel_url], [tmp_path / "kernel.bsp"], progress=False
+        )
+
+    assert asyncio.run(main()) == [tmp_path / "kernel.bsp"]
+    assert (tmp_path / "kernel.bsp").read_bytes() == http_server.payload
+
+
+def test_download_urls_reports_errors(http_server, tmp_path):
+    http_server.errors = [404]
+    urls = [f"{http_server.kernel_url}?{i}" for i in range(3)]
+    outfiles = [tmp_path / f"kernel{i}.bsp" for i in range(3)]
+    with pytest.raises(ConnectionError):
+        utils.download_urls(urls, outfiles, max_per_host=1, progress=False)
+    assert sum(p.exists() for p in outfiles) == 2
+
+
+def test_url_retrieve_conditional(http_server, tmp_path):
+    http_server.etag = '"v1"'
+    outfile = tmp_path / "kernel.bsp"
+    assert utils.url_retrieve(http_server.kernel_url, outfile)
+    meta = utils.get_http_metadata(http_server.kernel_url)
+    assert meta["etag"] == '"v1"'
+    assert meta["size"] == len(http_server.payload)
+    assert not utils.url_retrieve(http_server.kernel_url, outfile)
+    assert http_server.requests[-1]["If-None-Match"] == '"v1"'
+    assert outfile.read_bytes() == http_server.payload
+    # a changed remote file is downloaded again
+    http_server.etag = '"v2"'
+    http_server.payload = http_server.payload[::-1]
+    assert utils.url_retrieve(http_server.kernel_url, outfile)
+    assert outfile.read_bytes() == http_server.payload
+    # a modified local file is downloaded unconditionally
+    outfile.write_bytes(b"modified")
+    assert utils.url_retrieve(http_server.kernel_url, outfile)
+    assert "If-None-Match" not in http_server.requests[-1]
+    utils.clear_http_cache()
+    assert utils.get_http_metadata(http_server.kernel_url) == {}
+
+
+def _store_metadata(first):
+    for i in range(first, first + 10):
+        utils._store_http_metadata(f"http://host/{i}.bsp", {"etag": f'"{i}"'}, i)
+
+
+def test_http_metadata_concurrent_processes(tmp_path, monkeypatch):
+    import multiprocessing
+
+    monkeypatch.setattr(utils, "_http_cache_path", lambda: tmp_path / "cache.json")
+    utils._store_http_metadata("http://host/parent.bsp", {"etag": '"p"'}, 1)
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=_store_metadata, args=(i,)) for i in (0, 10)]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+    # no process overwrote the entries of another one
+    for i in range(20):
+        assert utils.get_http_metadata(f"http://host/{i}.bsp")["etag"] == f'"{i}"'
+    assert utils.get_http_metadata("http://host/parent.bsp")["size"] == 1
+
+
+def test_url_retrieve_segmented(http_server, tmp_path):
+    http_server.etag = '"v1"'
+    outfile = tmp_path / "kernel.bsp"
+    checksum = hashlib.sha256(http_server.payload).hexdigest()
+    assert utils.url_retrieve_segmented(
+        http_server.kernel_url, outfile, segments=4, min_size=0, checksum=checksum
+    )
+    assert outfile.read_bytes() == http_server.payload
+    ranges = sorted(r["Range"] for r in http_server.requests)
+    assert len(ranges) == 4
+    assert ranges[0] == "bytes=0-262143"
+    assert not (tmp_path / "kernel.bsp.part").exists()
+    # unchanged file is skipped after the HEAD request
+    assert not utils.url_retrieve_segmented(http_server.kernel_url, outfile, min_size=0)
+    assert len(http_server.requests) == 4
+
+
+def test_url_retrieve_segmented_fallback(http_server, tmp_path):
+    outfile = tmp_path / "kernel.bsp"
+    utils.url_retrieve_segmented(http_server.kernel_url, outfile)
+    assert outfile.read_bytes() == http_server.payload
+    assert len(http_server.requests) == 1
+    assert "Range" not in http_server.requests[0]
+    http_server.ranges = False
+    utils.url_retrieve_segmented(http_server.kernel_url, outfile, min_size=0)
+    assert len(http_server.requests) == 2
+
+
+def test_record_transfers(http_server, tmp_path, session_options):
+    http_server.etag = '"v1"'
+    http_server.errors = [503]
+    utils.configure_session(backoff_factor=0)
+    outfiles = [tmp_path / f"kernel{i}.bsp" for i in range(2)]
+    events = []
+    utils.add_transfer_hook(events.append)
+    with utils.record_transfers() as transfers:
+        utils.download_urls([http_server.kernel_url] * 2, outfiles, progress=False)
+        utils.url_retrieve(http_server.kernel_url, outfiles[0])
+    utils.remove_transfer_hook(events.append)
+    utils.url_retrieve(http_server.kernel_url, outfiles[1], conditional=False)
+    assert events == transfers
+    assert len(transfers) == 3
+    summary = transfers.summary()
+    assert summary["downloaded"] == 2
+    assert summary["cache_hits"] == 1
+    assert summary["failed"] == 0
+    assert summary["retries"] == 1
+    assert summary["bytes"] == 2 * len(http_server.payload)
+    assert transfers[-1].status == 304
+    assert transfers[0].status == 200
+    assert transfers[0].throughput > 0
+    assert "2 downloaded, 1 up-to-date" in transfers.report()
+
+
+def test_record_transfers_failure(http_server, tmp_path):
+    http_server.errors = [404]
+    with utils.record_transfers() as transfers:
+        with pytest.raises(ConnectionError):
+            utils.url_retrieve(http_server.kernel_url, tmp_path / "kernel.bsp")
+    assert transfers[0].status == 404
+    assert transfers[0].error.startswith("ConnectionError")
+    assert transfers.summary()["failed"] == 1
+
+
+def test_url_retrieve_small_file(http_server, tmp_path):
+    http_server.payload = b"kernel"
+    utils.url_retrieve(http_server.kernel_url, tmp_path / "kernel.bc")
+    assert (tmp_path / "kernel.bc").read_bytes() == b"kernel"